@@ -6,16 +6,23 @@ adapt_and_generate_guide.py
 2) Generate example sentences and JSONL spans based on actual column values.
 3) Print a tailored annotation guide snippet for quick copy-paste.
 
+Templates are parsed once; eligible rows and templates are selected with
+vectorized null masks; span offsets are recorded while each template is
+filled (no text.find), and chunks of examples can be generated in parallel
+(--workers) for millions of examples (--replace --n 1000000).
+
 Outputs:
  - <outdir>/examples_s0.txt
  - <outdir>/examples_s0.jsonl
 """
 import argparse
 import os
-import pandas as pd
-import random
 import json
-from html import unescape
+from concurrent.futures import ProcessPoolExecutor
+from string import Formatter
+
+import numpy as np
+import pandas as pd
 
 TEMPLATES = [
     "{campaign} increased sales of {product} via the {channel} channel.",
@@ -63,61 +70,99 @@ def detect_columns(df):
             mapping.setdefault("metric_value", c)
     return mapping
 
-def safe_get(row, col):
-    if col and col in row and pd.notna(row[col]):
-        return str(row[col]).strip()
-    return None
-
-def build_sentence_and_spans(row, mapping):
-    available = {}
+def parse_template(template):
+    """
+    Splits a template once into literal text and placeholder names:
+    returns a list of (literal, placeholder or None) pairs.
+    """
+    return [(literal, name) for literal, name, _, _ in Formatter().parse(template)]
+
+PARSED_TEMPLATES = [parse_template(t) for t in TEMPLATES]
+TEMPLATE_FIELDS = [[name for _, name in parts if name] for parts in PARSED_TEMPLATES]
+
+def fill_template(parts, values):
+    """
+    Fills a parsed template and returns (text, spans); span offsets are
+    recorded while the text is assembled, so repeated values stay correct.
+    """
+    out, spans, pos = [], [], 0
+    for literal, name in parts:
+        out.append(literal)
+        pos += len(literal)
+        if name:
+            val = values[name]
+            out.append(val)
+            spans.append({"start": pos, "end": pos + len(val), "label": name.upper()})
+            pos += len(val)
+    return "".join(out), spans
+
+FALLBACK_FIELDS = ["campaign", "product", "channel", "supplier", "invoice", "po", "role", "team"]
+
+def fallback_sentence(values):
+    parts, spans, pos = [], [], 0
+    for k in FALLBACK_FIELDS:
+        v = values.get(k)
+        if v:
+            if parts:
+                pos += 1
+            spans.append({"start": pos, "end": pos + len(v), "label": k.upper()})
+            parts.append(v)
+            pos += len(v)
+    if not parts:
+        return None, None
+    return " ".join(parts) + ".", spans
+
+def value_table(df, mapping):
+    """
+    Returns ({placeholder: object array of stripped strings, None where
+    missing}, {placeholder: bool presence mask}).
+    """
+    table, present = {}, {}
     for k, col in mapping.items():
-        available[k] = safe_get(row, col)
-    # choose templates that are satisfied by available fields
-    candidates = []
-    for t in TEMPLATES:
-        placeholders = [p.strip("{}") for p in [part for part in t.replace("'", "").split() if "{" in part]]
-        required = [ph for ph in placeholders if ph]
-        ok = True
-        for ph in required:
-            if ph not in available or not available[ph]:
-                ok = False
-                break
-        if ok:
-            candidates.append(t)
-    if not candidates:
-        # fallback: create a concatenated sentence
-        parts = []
-        spans = []
-        text = ""
-        for k in ["campaign","product","channel","supplier","invoice","po","role","team"]:
-            v = available.get(k)
-            if v:
-                if text:
-                    text += " "
-                start = len(text)
-                text += v
-                end = len(text)
-                spans.append({"start": start, "end": end, "label": k.upper()})
+        vals = df[col].astype("string").str.strip()
+        mask = (vals.notna() & (vals != "")).to_numpy(dtype=bool)
+        table[k] = vals.astype(object).where(mask, None).to_numpy()
+        present[k] = mask
+    return table, present
+
+def eligibility(present, n_rows):
+    """
+    Vectorized (rows x templates) mask: a template is eligible for a row when
+    all of its placeholders are mapped and non-empty.
+    """
+    mask = np.ones((n_rows, len(TEMPLATES)), dtype=bool)
+    for t, fields in enumerate(TEMPLATE_FIELDS):
+        for name in fields:
+            mask[:, t] &= present[name] if name in present else False
+    return mask
+
+def generate_chunk(chunk_values, eligible, seed):
+    """
+    Builds (text, spans) examples for one chunk of pre-extracted rows.
+    ``chunk_values`` maps placeholder -> values; ``eligible`` is the chunk's
+    template mask. Templates are picked uniformly among eligible ones.
+    """
+    rng = np.random.default_rng(seed)
+    choice = np.where(eligible.any(axis=1), (rng.random(eligible.shape) * eligible).argmax(axis=1), -1)
+    keys = list(chunk_values)
+    examples = []
+    for i, t in enumerate(choice.tolist()):
+        values = {k: chunk_values[k][i] for k in keys}
+        if t >= 0:
+            text, spans = fill_template(PARSED_TEMPLATES[t], values)
+        else:
+            text, spans = fallback_sentence(values)
         if text:
-            text = text + "."
-            return text, spans
-        return None, None
-    template = random.choice(candidates)
-    filled = {}
-    for ph in mapping:
-        val = available.get(ph)
-        if val:
-            filled[ph] = val
-    text = template.format(**filled)
-    spans = []
-    for label, col in mapping.items():
-        val = safe_get(row, col)
-        if not val:
-            continue
-        idx = text.find(val)
-        if idx >= 0:
-            spans.append({"start": idx, "end": idx + len(val), "label": label.upper()})
-    return text, spans
+            examples.append((text, spans))
+    return examples
+
+def write_examples(chunk_results, ftxt, fjson):
+    n = 0
+    for examples in chunk_results:
+        ftxt.write("".join(text + "\n" for text, _ in examples))
+        fjson.write("".join(json.dumps({"text": text, "spans": spans}, ensure_ascii=False) + "\n" for text, spans in examples))
+        n += len(examples)
+    return n
 
 def print_recommendation_guide(mapping):
     # fill the doc template with actual column names
@@ -147,9 +192,11 @@ def main():
     parser.add_argument("--outdir", "-o", default="nlp/training_data/dev")
     parser.add_argument("--n", type=int, default=20)
     parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--replace", action="store_true", help="Sample rows with replacement (n may exceed the row count)")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="Examples generated per task")
+    parser.add_argument("--workers", type=int, default=1)
     args = parser.parse_args()
 
-    random.seed(args.seed)
     os.makedirs(args.outdir, exist_ok=True)
 
     df = try_read_csv(args.input)
@@ -157,36 +204,41 @@ def main():
     print("Detected column mapping suggestion:\n", mapping)
     print_recommendation_guide(mapping)
 
-    # candidate rows that have at least one of the main entity fields
-    candidate_rows = df.index[df.apply(lambda r: any(pd.notna(r.get(mapping.get(k))) for k in ["campaign","product","channel","supplier"]), axis=1)].tolist()
-    if not candidate_rows:
-        candidate_rows = df.index.tolist()
-
-    sample_idx = random.sample(candidate_rows, min(args.n, len(candidate_rows)))
-
-    examples_txt = []
-    examples_jsonl = []
-
-    for idx in sample_idx:
-        row = df.loc[idx]
-        text, spans = build_sentence_and_spans(row, mapping)
-        if not text:
-            continue
-        examples_txt.append(text)
-        examples_jsonl.append({"text": text, "spans": spans})
-
+    # candidate rows that have at least one of the main entity fields (vectorized)
+    table, present = value_table(df, mapping)
+    has_main = np.zeros(len(df), dtype=bool)
+    for k in ["campaign", "product", "channel", "supplier"]:
+        if k in present:
+            has_main |= present[k]
+    candidate_rows = np.flatnonzero(has_main)
+    if not len(candidate_rows):
+        candidate_rows = np.arange(len(df))
+
+    rng = np.random.default_rng(args.seed)
+    if args.replace:
+        sample_idx = rng.choice(candidate_rows, args.n, replace=True)
+    else:
+        sample_idx = rng.choice(candidate_rows, min(args.n, len(candidate_rows)), replace=False)
+    eligible = eligibility(present, len(df))
+
+    chunks = [sample_idx[i:i + args.chunk_size] for i in range(0, len(sample_idx), args.chunk_size)]
+    tasks = [
+        ({k: vals[idx] for k, vals in table.items()}, eligible[idx], args.seed + 1 + c)
+        for c, idx in enumerate(chunks)
+    ]
     txt_path = os.path.join(args.outdir, "examples_s0.txt")
     jsonl_path = os.path.join(args.outdir, "examples_s0.jsonl")
 
-    with open(txt_path, "w", encoding="utf-8") as f:
-        for s in examples_txt:
-            f.write(s + "\n")
-
-    with open(jsonl_path, "w", encoding="utf-8") as f:
-        for obj in examples_jsonl:
-            f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+    written = 0
+    with open(txt_path, "w", encoding="utf-8") as ftxt, open(jsonl_path, "w", encoding="utf-8") as fjson:
+        if args.workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=args.workers) as pool:
+                results = pool.map(generate_chunk, *zip(*tasks))
+                written = write_examples(results, ftxt, fjson)
+        else:
+            written = write_examples((generate_chunk(*task) for task in tasks), ftxt, fjson)
 
-    print(f"Wrote {len(examples_txt)} examples to {txt_path} and {jsonl_path}")
+    print(f"Wrote {written} examples to {txt_path} and {jsonl_path}")
     print("\n---\nNow copy the suggested guide above into docs/annotation_guide_v0.1.md and adjust any label wording or examples as needed.")
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+benchmark_training.py
+Short, fixed-seed CPU training runs of the HEL-14 NER config over a sweep of
+batch size, tok2vec width, dropout and tok2vec layout.
+
+- Every run trains on the same word budget (--train-words), so configs with
+  larger batches do not simply see more data, then scores ents_f on the dev
+  corpus. --train-limit / --eval-limit cap the examples loaded per run.
+- Runs execute one at a time in a fresh spawned process; peak RSS is that
+  process's ru_maxrss.
+- tok2vec layout: "separate" is config.cfg as shipped, where the ner model
+  embeds its own HashEmbedCNN and the standalone tok2vec component is
+  computed but never read. "shared" makes ner listen to the tok2vec
+  component (spacy.Tok2VecListener.v1) so the embedding runs once.
+- The baseline is the config's own batch size / width / dropout / layout.
+  The recommended config is the fastest run whose ents_f is within
+  --tolerance of the baseline; it is written (fully filled) to --output.
+- --profile N prints the top N functions by cumulative time for one
+  baseline-sized run.
+
+The corpus is the sharded DocBin output of jsonl_to_docbin.py.
+
+Usage:
+    python nlp/scripts/benchmark_training.py --train nlp/training_data/train --dev nlp/training_data/dev \
+        --batch-sizes 500,1000,2000 --widths 64,96 --dropouts 0.1,0.2
+"""
+import argparse
+import cProfile
+import copy
+import itertools
+import json
+import multiprocessing
+import os
+import pstats
+import random
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+LAYOUTS = ("separate", "shared")
+
+
+def csv_list(cast):
+    return lambda value: [cast(v) for v in value.split(",") if v.strip()]
+
+
+def set_path(config, dotted, value):
+    *parents, key = dotted.split(".")
+    for name in parents:
+        config = config[name]
+    config[key] = value
+
+
+def filled_config(path):
+    """
+    Returns the fully filled (defaults resolved, not interpolated) config.
+    """
+    import spacy
+    config = spacy.util.load_config(path, interpolate=False)
+    return spacy.util.load_model_from_config(config, auto_fill=True).config
+
+
+def baseline_params(config):
+    return {
+        "batch_size": config["training"]["batcher"]["size"],
+        "width": config["components"]["tok2vec"]["model"]["width"],
+        "dropout": config["training"]["dropout"],
+        "layout": "shared" if "Listener" in config["components"]["ner"]["model"]["tok2vec"]["@architectures"] else "separate",
+    }
+
+
+def apply_params(config, params, train=None, dev=None, train_limit=None, dev_limit=None):
+    config = copy.deepcopy(config)
+    set_path(config, "training.batcher.size", params["batch_size"])
+    set_path(config, "training.dropout", params["dropout"])
+    set_path(config, "components.tok2vec.model.width", params["width"])
+    if params["layout"] == "shared":
+        config["components"]["ner"]["model"]["tok2vec"] = {
+            "@architectures": "spacy.Tok2VecListener.v1",
+            "width": params["width"],
+            "upstream": "tok2vec",
+        }
+    else:
+        tok2vec = copy.deepcopy(config["components"]["tok2vec"]["model"])
+        config["components"]["ner"]["model"]["tok2vec"] = tok2vec
+    if train:
+        set_path(config, "paths.train", train)
+    if dev:
+        set_path(config, "paths.dev", dev)
+    if train_limit is not None:
+        set_path(config, "corpora.train.limit", train_limit)
+    if dev_limit is not None:
+        set_path(config, "corpora.dev.limit", dev_limit)
+    return config
+
+
+def train_run(config_str, train_words):
+    """
+    Worker: initializes and trains one config; returns the measurements.
+    """
+    from thinc.api import Config
+    from spacy.training.initialize import init_nlp
+    from spacy.util import registry, resolve_dot_names
+    from spacy.schemas import ConfigSchemaTraining
+
+    config = Config().from_str(config_str, interpolate=False)
+    nlp = init_nlp(config)
+    interpolated = config.interpolate()
+    T = registry.resolve(interpolated["training"], schema=ConfigSchemaTraining)
+    train_corpus, dev_corpus = resolve_dot_names(interpolated, [T["train_corpus"], T["dev_corpus"]])
+    train_examples = list(train_corpus(nlp))
+    dev_examples = list(dev_corpus(nlp))
+    optimizer, batcher, dropout = T["optimizer"], T["batcher"], T["dropout"]
+
+    if not any(len(eg.reference) for eg in train_examples):
+        raise ValueError(f"Training corpus {interpolated['paths']['train']} has no tokens; nothing to benchmark")
+
+    rng = random.Random(T["seed"])
+    words = steps = 0
+    losses = {}
+    start = time.perf_counter()
+    while words < train_words:
+        rng.shuffle(train_examples)
+        for batch in batcher(train_examples):
+            nlp.update(batch, drop=dropout, sgd=optimizer, losses=losses)
+            words += sum(len(eg.reference) for eg in batch)
+            steps += 1
+            if words >= train_words:
+                break
+    train_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scores = nlp.evaluate(dev_examples)
+    eval_s = time.perf_counter() - start
+    dev_words = sum(len(eg.reference) for eg in dev_examples)
+    return {
+        "steps": steps,
+        "words": words,
+        "train_s": round(train_s, 2),
+        "train_wps": round(words / max(train_s, 1e-9)),
+        "eval_wps": round(dev_words / max(eval_s, 1e-9)),
+        "ents_f": round(scores.get("ents_f") or 0.0, 4),
+        "ents_p": round(scores.get("ents_p") or 0.0, 4),
+        "ents_r": round(scores.get("ents_r") or 0.0, 4),
+        "loss_ner": round(float(losses.get("ner", 0.0)), 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def run_isolated(config_str, train_words):
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(train_run, config_str, train_words).result()
+
+
+def profile_run(config_str, train_words, top):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    train_run(config_str, train_words)
+    profiler.disable()
+    pstats.Stats(profiler).sort_stats("cumulative").print_stats(top)
+
+
+def recommend(results, baseline, tolerance):
+    """
+    Fastest run whose ents_f is within tolerance of the baseline run.
+    """
+    eligible = [r for r in results if r["ents_f"] >= baseline["ents_f"] - tolerance]
+    return max(eligible, key=lambda r: r["train_wps"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", default="nlp/configs/config.cfg")
+    parser.add_argument("--train", default="nlp/training_data/train", help="DocBin file or shard directory")
+    parser.add_argument("--dev", default="nlp/training_data/dev", help="DocBin file or shard directory")
+    parser.add_argument("--batch-sizes", type=csv_list(int), default=[500, 1000, 2000])
+    parser.add_argument("--widths", type=csv_list(int), default=[64, 96])
+    parser.add_argument("--dropouts", type=csv_list(float), default=[0.1, 0.2])
+    parser.add_argument("--layouts", type=csv_list(str), default=list(LAYOUTS))
+    parser.add_argument("--train-words", type=int, default=200_000, help="Word budget per run")
+    parser.add_argument("--train-limit", type=int, default=20_000, help="Training examples loaded per run (0 = all)")
+    parser.add_argument("--eval-limit", type=int, default=2000, help="Dev examples scored per run (0 = all)")
+    parser.add_argument("--tolerance", type=float, default=0.005, help="Allowed ents_f drop vs. the baseline")
+    parser.add_argument("--results", default="nlp/output/training_benchmark.jsonl")
+    parser.add_argument("--output", default="nlp/configs/config.recommended.cfg")
+    parser.add_argument("--profile", type=int, default=0, help="Print top N functions of a baseline run and exit")
+    args = parser.parse_args()
+
+    for path in (args.train, args.dev):
+        if not os.path.exists(path):
+            sys.exit(f"{path} not found; generate it with adapt_and_generate_guide.py + jsonl_to_docbin.py")
+    unknown = set(args.layouts) - set(LAYOUTS)
+    if unknown:
+        sys.exit(f"Unknown layout(s): {', '.join(sorted(unknown))} (choose from {', '.join(LAYOUTS)})")
+
+    base_config = filled_config(args.config)
+    baseline = baseline_params(base_config)
+    if args.profile:
+        config = apply_params(base_config, baseline, args.train, args.dev, args.train_limit, args.eval_limit)
+        profile_run(config.to_str(), args.train_words, args.profile)
+        return
+
+    grid = [dict(zip(("batch_size", "width", "dropout", "layout"), combo))
+            for combo in itertools.product(args.batch_sizes, args.widths, args.dropouts, args.layouts)]
+    if baseline not in grid:
+        grid.insert(0, baseline)
+    print(f"Baseline {baseline}; {len(grid)} runs of {args.train_words:,} words each")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.results)), exist_ok=True)
+    results = []
+    with open(args.results, "w", encoding="utf-8") as f:
+        for i, params in enumerate(grid, 1):
+            config = apply_params(base_config, params, args.train, args.dev, args.train_limit, args.eval_limit)
+            record = dict(params, **run_isolated(config.to_str(), args.train_words))
+            record["baseline"] = params == baseline
+            results.append(record)
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            print(f"[{i}/{len(grid)}] batch={params['batch_size']:<5} width={params['width']:<4} "
+                  f"dropout={params['dropout']:<4} {params['layout']:<8} "
+                  f"{record['train_wps']:>7,} words/s  ents_f={record['ents_f']:.3f}  "
+                  f"rss={record['peak_rss_mb']:.0f}MB")
+
+    base = next(r for r in results if r["baseline"])
+    best = recommend(results, base, args.tolerance)
+    params = {k: best[k] for k in ("batch_size", "width", "dropout", "layout")}
+    apply_params(base_config, params).to_disk(args.output)
+    print(f"Baseline: {base['train_wps']:,} words/s, ents_f={base['ents_f']:.3f}, rss={base['peak_rss_mb']:.0f}MB")
+    print(f"Recommended {params}: {best['train_wps']:,} words/s "
+          f"({best['train_wps'] / max(base['train_wps'], 1):.2f}x), ents_f={best['ents_f']:.3f}, "
+          f"rss={best['peak_rss_mb']:.0f}MB")
+    print("Wrote:", args.output, args.results)
+
+
+if __name__ == "__main__":
+    main()
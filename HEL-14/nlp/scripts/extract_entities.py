@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+extract_entities.py
+Run the trained HEL-14 NER pipeline over raw text and write entity spans.
+
+Documents are streamed through nlp.pipe (batch_size / n_process); every
+component except ner and the components it listens to (Tok2VecListener
+upstreams in the model config) is excluded at load time. The shipped
+model's ner embeds its own tok2vec, so only ner runs. With n_process > 1
+spaCy forks workers that each hold one copy of the model; use at most one
+process per physical core (on a single core it only adds IPC overhead).
+
+Input:  .txt (one document per line), .jsonl (--field, default "text") or
+        .csv (--column, e.g. invoiceText in data/raw/invoices.csv)
+Output: jsonl  one record per document {"id", "ents": [{start, end, label, text}]}
+        csv    columnar, one row per entity: id,start,end,label,text
+
+Usage:
+    python nlp/scripts/extract_entities.py --input ../data/raw/invoices.csv --column invoiceText \
+        --output nlp/output/invoice_ents.jsonl --batch-size 1024 --n-process 4
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import spacy
+
+DEFAULT_MODEL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models", "model-best")
+KEEP_COMPONENTS = ("ner",)
+
+
+def listened_components(block, pipeline):
+    """
+    Names of the pipeline components that Tok2VecListener layers in a
+    component's config block listen to ("*": any tok2vec / transformer).
+    """
+    found = set()
+    if isinstance(block, dict):
+        if "Listener" in str(block.get("@architectures", "")):
+            upstream = block.get("upstream", "*")
+            found.update(name for name in pipeline
+                         if name == upstream or (upstream == "*" and name in ("tok2vec", "transformer")))
+        for value in block.values():
+            found |= listened_components(value, pipeline)
+    return found
+
+
+def load_ner(model=DEFAULT_MODEL):
+    """
+    Loads the pipeline with everything except ner and its listened-to
+    components excluded.
+    """
+    config = spacy.util.load_config(os.path.join(model, "config.cfg"))
+    pipeline = config["nlp"]["pipeline"]
+    keep = set(KEEP_COMPONENTS)
+    for name in KEEP_COMPONENTS:
+        keep |= listened_components(config["components"].get(name, {}), pipeline)
+    return spacy.load(model, exclude=[name for name in pipeline if name not in keep])
+
+
+def read_documents(path, field="text", column=None, id_column=None):
+    """
+    Yields (doc_id, text) pairs without loading the whole file.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if ext == ".csv":
+            for i, row in enumerate(csv.DictReader(f)):
+                yield (row[id_column] if id_column else i), row.get(column) or ""
+        elif ext == ".jsonl":
+            for i, line in enumerate(f):
+                if line.strip():
+                    obj = json.loads(line)
+                    yield obj.get("id", i), obj.get(field) or ""
+        else:
+            for i, line in enumerate(f):
+                yield i, line.rstrip("\n")
+
+
+def extract(nlp, documents, batch_size=1024, n_process=1):
+    """
+    Yields (doc_id, ents) for an iterable of (doc_id, text) pairs.
+    """
+    for doc, doc_id in nlp.pipe(((text, doc_id) for doc_id, text in documents),
+                                as_tuples=True, batch_size=batch_size, n_process=n_process):
+        yield doc_id, [
+            {"start": e.start_char, "end": e.end_char, "label": e.label_, "text": e.text} for e in doc.ents
+        ]
+
+
+def write_jsonl(results, f):
+    for doc_id, ents in results:
+        f.write(json.dumps({"id": doc_id, "ents": ents}, ensure_ascii=False) + "\n")
+        yield len(ents)
+
+
+def write_csv(results, f):
+    writer = csv.writer(f)
+    writer.writerow(["id", "start", "end", "label", "text"])
+    for doc_id, ents in results:
+        writer.writerows([doc_id, e["start"], e["end"], e["label"], e["text"]] for e in ents)
+        yield len(ents)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", required=True)
+    parser.add_argument("--output", default="-", help="Output path ('-' for stdout)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default=None, help="Default: from --output extension")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--field", default="text", help="Text field for .jsonl input")
+    parser.add_argument("--column", default="text", help="Text column for .csv input")
+    parser.add_argument("--id-column", default=None, help="Id column for .csv input (default: row number)")
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--n-process", type=int, default=1)
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.output.endswith(".csv") else "jsonl")
+    nlp = load_ner(args.model)
+    print(f"Loaded {args.model} with components {nlp.pipe_names}", file=sys.stderr)
+
+    if args.output != "-":
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    start = time.perf_counter()
+    docs = ents = 0
+    try:
+        results = extract(nlp, read_documents(args.input, args.field, args.column, args.id_column),
+                          batch_size=args.batch_size, n_process=args.n_process)
+        for n in (write_csv if fmt == "csv" else write_jsonl)(results, out):
+            docs += 1
+            ents += n
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"Processed {docs} docs, {ents} entities in {elapsed:.2f}s ({docs / max(elapsed, 1e-9):,.0f} docs/sec)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,70 +1,163 @@
 #!/usr/bin/env python3
 """
 jsonl_to_docbin.py
-Convert examples_s0.jsonl -> train.spacy & dev.spacy
+Convert annotation JSONL ({"text", "spans": [{start, end, label}]}) into
+sharded train/dev DocBins.
+
+- The input is streamed in shards of --shard-size lines; at most
+  2 x --workers shards are in flight, so memory stays flat on multi-GB
+  exports.
+- Every example goes to train or dev by a hash of its text (salted with
+  --seed), so the split is deterministic and needs no full shuffle.
+- Worker processes build the DocBins and write
+  <outdir>/train/shard-NNNNN.spacy and <outdir>/dev/shard-NNNNN.spacy;
+  spaCy reads a directory of .spacy files as one corpus, and
+  nlp/configs/config.cfg points at these directories:
+      python -m spacy train nlp/configs/config.cfg
+- Spans are aligned with alignment_mode="contract", falling back to
+  "expand" when contracting leaves no token; unaligned, trimmed, expanded
+  and overlapping spans are counted, not printed per example, and so are
+  malformed ones (non-list "spans", span not an object, start/end not
+  integers, missing label), which are skipped.
 """
-import spacy
-from spacy.tokens import DocBin
+import argparse
+import glob
 import json
-import random
 import os
-import argparse
+import time
+import zlib
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 
-def read_jsonl(path):
-    with open(path, encoding="utf-8") as f:
-        for line in f:
-            yield json.loads(line)
-
-def make_docbin(items, nlp):
-    db = DocBin()
-    for it in items:
-        text = it["text"]
-        doc = nlp.make_doc(text)
-        ents = []
-        for s in it.get("spans", []):
-            start, end, label = s["start"], s["end"], s["label"]
-            span = doc.char_span(start, end, label=label, alignment_mode="contract")
-            if span is None:
-                # fallback: try exact token boundary
-                span = doc.char_span(start, end, label=label, alignment_mode="expand")
+import spacy
+from spacy.tokens import DocBin
+from spacy.util import filter_spans
+
+HASH_BUCKETS = 10_000
+
+_nlp = None
+
+
+def init_worker(lang):
+    global _nlp
+    _nlp = spacy.blank(lang)
+
+
+def is_dev(text, dev_split, seed):
+    return zlib.crc32(f"{seed}:{text}".encode("utf-8")) % HASH_BUCKETS < dev_split * HASH_BUCKETS
+
+
+def is_valid_span(s):
+    return (isinstance(s, dict) and isinstance(s.get("start"), int) and isinstance(s.get("end"), int)
+            and isinstance(s.get("label"), str) and s["label"] != "")
+
+
+def make_doc(nlp, item, counts):
+    text = item["text"]
+    doc = nlp.make_doc(text)
+    ents = []
+    spans = item.get("spans", [])
+    if not isinstance(spans, list):
+        counts["malformed"] += 1
+        spans = []
+    for s in spans:
+        counts["spans"] += 1
+        if not is_valid_span(s):
+            counts["malformed"] += 1
+            continue
+        span = doc.char_span(s["start"], s["end"], label=s["label"], alignment_mode="contract")
+        if span is None:
+            # fallback: widen to the enclosing token boundaries
+            span = doc.char_span(s["start"], s["end"], label=s["label"], alignment_mode="expand")
             if span is None:
-                print("Warning: could not create span for", text, s)
-            else:
-                ents.append(span)
+                counts["unaligned"] += 1
+                continue
+            counts["expanded"] += 1
+        elif span.start_char != s["start"] or span.end_char != s["end"]:
+            counts["trimmed"] += 1
+        ents.append(span)
+    kept = filter_spans(ents)
+    counts["overlapping"] += len(ents) - len(kept)
+    doc.ents = kept
+    return doc
+
+
+def convert_shard(shard, lines, outdir, dev_split, seed):
+    """
+    Worker: converts one shard of raw JSONL lines and writes its DocBins.
+    Returns the shard's counters.
+    """
+    counts = Counter()
+    bins = {"train": DocBin(), "dev": DocBin()}
+    for line in lines:
+        if not line.strip():
+            continue
         try:
-            doc.ents = ents
-        except Exception as e:
-            print("Failed setting ents:", e)
-        db.add(doc)
-    return db
+            item = json.loads(line)
+        except json.JSONDecodeError:
+            counts["bad_json"] += 1
+            continue
+        if not isinstance(item, dict) or not isinstance(item.get("text"), str):
+            counts["malformed"] += 1
+            continue
+        split = "dev" if is_dev(item.get("text", ""), dev_split, seed) else "train"
+        bins[split].add(make_doc(_nlp, item, counts))
+        counts[split] += 1
+    for split, db in bins.items():
+        if len(db):
+            db.to_disk(os.path.join(outdir, split, f"shard-{shard:05d}.spacy"))
+    return counts
+
+
+def read_shards(path, shard_size):
+    with open(path, encoding="utf-8") as f:
+        shard = []
+        for line in f:
+            shard.append(line)
+            if len(shard) >= shard_size:
+                yield shard
+                shard = []
+        if shard:
+            yield shard
+
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("--input", default="nlp/training_data/dev/examples_s0.jsonl")
+    parser.add_argument("--input", default="nlp/training_data/examples_s0.jsonl")
     parser.add_argument("--outdir", default="nlp/training_data")
     parser.add_argument("--dev-split", type=float, default=0.2)
     parser.add_argument("--lang", default="en")
+    parser.add_argument("--seed", type=int, default=0, help="Salt for the hash-based split")
+    parser.add_argument("--shard-size", type=int, default=10_000, help="Examples per shard / .spacy file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
     args = parser.parse_args()
 
-    os.makedirs(args.outdir, exist_ok=True)
-    nlp = spacy.blank(args.lang)
-
-    items = list(read_jsonl(args.input))
-    random.shuffle(items)
-    cut = int(len(items) * (1 - args.dev_split))
-    train_items = items[:cut]
-    dev_items = items[cut:]
+    for split in ("train", "dev"):
+        split_dir = os.path.join(args.outdir, split)
+        os.makedirs(split_dir, exist_ok=True)
+        for old in glob.glob(os.path.join(split_dir, "shard-*.spacy")):
+            os.remove(old)
 
-    print(f"Total examples: {len(items)}, train: {len(train_items)}, dev: {len(dev_items)}")
+    start = time.perf_counter()
+    totals = Counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(args.lang,)) as pool:
+        pending = deque()
+        for i, lines in enumerate(read_shards(args.input, args.shard_size)):
+            pending.append(pool.submit(convert_shard, i, lines, args.outdir, args.dev_split, args.seed))
+            if len(pending) >= 2 * args.workers:
+                totals.update(pending.popleft().result())
+        while pending:
+            totals.update(pending.popleft().result())
 
-    train_db = make_docbin(train_items, nlp)
-    dev_db = make_docbin(dev_items, nlp)
+    elapsed = time.perf_counter() - start
+    n = totals["train"] + totals["dev"]
+    print(f"Total examples: {n}, train: {totals['train']}, dev: {totals['dev']} "
+          f"in {elapsed:.1f}s ({n / max(elapsed, 1e-9):,.0f} examples/sec)")
+    print(f"Spans: {totals['spans']}, unaligned: {totals['unaligned']}, trimmed: {totals['trimmed']}, "
+          f"expanded: {totals['expanded']}, overlapping: {totals['overlapping']}, malformed: {totals['malformed']}, "
+          f"bad JSON lines: {totals['bad_json']}")
+    print("Wrote:", os.path.join(args.outdir, "train"), os.path.join(args.outdir, "dev"))
 
-    train_path = os.path.join(args.outdir, "train.spacy")
-    dev_path = os.path.join(args.outdir, "dev.spacy")
-    train_db.to_disk(train_path)
-    dev_db.to_disk(dev_path)
-    print("Wrote:", train_path, dev_path)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
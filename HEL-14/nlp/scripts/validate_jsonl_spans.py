@@ -1,19 +1,167 @@
 #!/usr/bin/env python3
+"""
+validate_jsonl_spans.py
+Validate annotation JSONL ({"text", "spans": [{start, end, label}]}) before
+converting it with jsonl_to_docbin.py.
+
+Checks per span / example:
+  bad_json      line is not valid JSON or has no "text"
+  malformed     "text" is not a string, "spans" is not a list, or a span is not an object
+  bounds        start/end not integers, or not 0 <= start < end <= len(text)
+  label         missing or empty label
+  whitespace    span starts or ends on whitespace (untrimmed boundary)
+  overlap       span overlaps an earlier one (sorted-interval sweep)
+  misaligned    start/end do not fall on tokenizer boundaries (doc.ents would fail)
+
+The input is streamed in shards that are validated in worker processes
+(tokenization runs batched through nlp.tokenizer.pipe). Prints a summary
+and writes every problem as one JSON line to --errors. Exits with status 1
+if any error was found.
+
+Usage:
+    python nlp/scripts/validate_jsonl_spans.py --input nlp/training_data/examples_s0.jsonl --workers 4
+"""
+import argparse
 import json
+import os
 import sys
-p = "nlp/training_data/dev/examples_s0.jsonl"
-bad = 0
-for i, line in enumerate(open(p, encoding="utf-8")):
-    obj = json.loads(line)
-    text = obj.get("text","")
-    spans = obj.get("spans",[])
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import spacy
+
+_nlp = None
+
+
+def init_worker(lang, check_tokens):
+    global _nlp
+    _nlp = spacy.blank(lang) if check_tokens else None
+
+
+def check_example(text, spans):
+    """
+    Returns (valid spans, problems) for one example without tokenization.
+    """
+    problems, valid = [], []
     for s in spans:
-        st, ed = s["start"], s["end"]
-        if text[st:ed] != text[st:ed]: pass
-        if st < 0 or ed > len(text) or st >= ed:
-            print(f"Bad span in line {i+1}: {s} on text: {text!r}")
-            bad += 1
-if bad==0:
-    print("No obvious span errors.")
-else:
-    print(f"Found {bad} bad spans.")
\ No newline at end of file
+        if not isinstance(s, dict):
+            problems.append(("malformed", s, "span is not an object"))
+            continue
+        start, end = s.get("start"), s.get("end")
+        if not isinstance(start, int) or not isinstance(end, int) or not 0 <= start < end <= len(text):
+            problems.append(("bounds", s, f"text length {len(text)}"))
+            continue
+        if not s.get("label"):
+            problems.append(("label", s, None))
+        if text[start].isspace() or text[end - 1].isspace():
+            problems.append(("whitespace", s, repr(text[start:end])))
+        valid.append(s)
+
+    max_end, max_span = -1, None
+    for s in sorted(valid, key=lambda s: (s["start"], s["end"])):
+        if s["start"] < max_end:
+            problems.append(("overlap", s, {"with": max_span}))
+        if s["end"] > max_end:
+            max_end, max_span = s["end"], s
+    return valid, problems
+
+
+def validate_shard(first_line, lines, batch_size):
+    """
+    Worker: validates one shard; returns (counters, error records).
+    """
+    counts, errors = Counter(), []
+    to_tokenize = []  # (line number, text, valid spans)
+    for offset, line in enumerate(lines):
+        line_no = first_line + offset
+        if not line.strip():
+            continue
+        counts["examples"] += 1
+        try:
+            obj = json.loads(line)
+            text, spans = obj["text"], obj.get("spans", [])
+        except (json.JSONDecodeError, KeyError, TypeError):
+            counts["bad_json"] += 1
+            errors.append({"line": line_no, "check": "bad_json"})
+            continue
+        if not isinstance(text, str) or not isinstance(spans, list):
+            counts["malformed"] += 1
+            errors.append({"line": line_no, "check": "malformed",
+                           "detail": f"text: {type(text).__name__}, spans: {type(spans).__name__}"})
+            continue
+        counts["spans"] += len(spans)
+        valid, problems = check_example(text, spans)
+        for check, span, detail in problems:
+            counts[check] += 1
+            errors.append({"line": line_no, "check": check, "span": span, "detail": detail})
+        if _nlp is not None and valid:
+            to_tokenize.append((line_no, text, valid))
+
+    if _nlp is not None:
+        docs = _nlp.tokenizer.pipe((text for _, text, _ in to_tokenize), batch_size=batch_size)
+        for (line_no, text, valid), doc in zip(to_tokenize, docs):
+            for s in valid:
+                if doc.char_span(s["start"], s["end"], alignment_mode="strict") is None:
+                    counts["misaligned"] += 1
+                    errors.append({"line": line_no, "check": "misaligned", "span": s, "detail": text[s["start"]:s["end"]]})
+    return counts, errors
+
+
+def read_shards(path, shard_size):
+    with open(path, encoding="utf-8") as f:
+        shard, first = [], 1
+        for i, line in enumerate(f, 1):
+            shard.append(line)
+            if len(shard) >= shard_size:
+                yield first, shard
+                shard, first = [], i + 1
+        if shard:
+            yield first, shard
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", default="nlp/training_data/examples_s0.jsonl")
+    parser.add_argument("--errors", default=None, help="Error JSONL path (default: <input>.errors.jsonl)")
+    parser.add_argument("--lang", default="en", help="Tokenizer language for the alignment check")
+    parser.add_argument("--no-tokenizer", action="store_true", help="Skip the tokenizer alignment check")
+    parser.add_argument("--shard-size", type=int, default=20_000)
+    parser.add_argument("--batch-size", type=int, default=1000, help="Tokenizer batch size")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    errors_path = args.errors or os.path.splitext(args.input)[0] + ".errors.jsonl"
+    start = time.perf_counter()
+    totals = Counter()
+
+    def drain(future, f):
+        counts, errors = future.result()
+        totals.update(counts)
+        f.writelines(json.dumps(e, ensure_ascii=False) + "\n" for e in errors)
+
+    with open(errors_path, "w", encoding="utf-8") as f, \
+            ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                                initargs=(args.lang, not args.no_tokenizer)) as pool:
+        pending = deque()
+        for first, lines in read_shards(args.input, args.shard_size):
+            pending.append(pool.submit(validate_shard, first, lines, args.batch_size))
+            if len(pending) >= 2 * args.workers:
+                drain(pending.popleft(), f)
+        while pending:
+            drain(pending.popleft(), f)
+
+    checks = ["bad_json", "malformed", "bounds", "label", "whitespace", "overlap", "misaligned"]
+    n_errors = sum(totals[c] for c in checks)
+    print(f"Validated {totals['examples']} examples, {totals['spans']} spans in {time.perf_counter() - start:.2f}s")
+    for c in checks:
+        print(f"  {c:<11} {totals[c]}")
+    if n_errors == 0:
+        print("No span errors.")
+    else:
+        print(f"Found {n_errors} problems; details in {errors_path}")
+    sys.exit(1 if n_errors else 0)
+
+
+if __name__ == "__main__":
+    main()
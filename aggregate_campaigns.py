@@ -1,37 +1,64 @@
+import argparse
 import pandas as pd
 
-# 1. Load raw ad-group level data
-df = pd.read_csv("data/processed/marketing/campaigns_v1.csv")
+from etl.instrumentation import count, span
+from etl.marketing.campaign_data import load_campaign_rows
+from etl.marketing.kpi_engine import KPIEngine
 
-# 2. Clean column names (remove whitespace)
-df.columns = df.columns.str.strip()
+# Stage timings are recorded when run with PERF_TRACE=1 (see etl/instrumentation.py)
 
-# 3. 피벗 집계 설정
 # 숫자형 컬럼은 합계(sum), 나머지는 대표값(first) 사용
-numeric_cols = [
+NUMERIC_COLS = [
     "budget", "actual_spend", "impressions", "clicks", "views",
     "sessions", "conversions", "revenue"
 ]
+TEXT_COLS = ["campaign_name", "brand_name", "category", "country", "objective", "currency"]
 
-# 만약 숫자 컬럼 중 일부가 없을 수도 있으니 존재 여부로 필터링
-numeric_cols = [c for c in numeric_cols if c in df.columns]
 
-# 4. Pivot (groupby 대신 pivot_table 사용)
-agg_dict = {col: "sum" for col in numeric_cols}
-text_cols = ["campaign_name", "brand_name", "category", "country", "objective", "currency"]
-for col in text_cols:
-    if col in df.columns:
-        agg_dict[col] = "first"
+def summarize_campaigns(df, engine=None):
+    """
+    Pivots ad-group rows to one row per campaign (measures summed, text
+    attributes first) and recomputes the ratio KPIs from the summed measures.
+    """
+    # 만약 숫자 컬럼 중 일부가 없을 수도 있으니 존재 여부로 필터링
+    agg_dict = {col: "sum" for col in NUMERIC_COLS if col in df.columns}
+    for col in TEXT_COLS:
+        if col in df.columns:
+            agg_dict[col] = "first"
 
-df_summary = df.pivot_table(
-    index="campaign_id",
-    values=list(agg_dict.keys()),
-    aggfunc=agg_dict,
-    fill_value=0
-).reset_index()
+    # Pivot (groupby 대신 pivot_table 사용)
+    with span("aggregate"):
+        df_summary = df.pivot_table(
+            index="campaign_id",
+            values=list(agg_dict.keys()),
+            aggfunc=agg_dict,
+            fill_value=0
+        ).reset_index()
+    count("rows.campaigns", len(df_summary))
 
-# 5. Export summarized dataset
-output_path = "data/processed/marketing/campaigns_summary.csv"
-df_summary.to_csv(output_path, index=False)
+    # Recompute ratio KPIs (roas, ctr, cvr, ...) from the summed measures
+    with span("score"):
+        kpis = (engine or KPIEngine()).evaluate_frame(df_summary)
+        return pd.concat([df_summary, kpis], axis=1)
 
-print(f"[OK] Pivoted to {len(df_summary)} campaigns and saved as {output_path}")
\ No newline at end of file
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", default="data/processed/marketing/campaigns_v1.csv")
+    parser.add_argument("--output", default="data/processed/marketing/campaigns_summary.csv")
+    args = parser.parse_args()
+
+    # 1. Load raw ad-group level data
+    # (column names are stripped and "81,557"-style numbers parsed by the loader)
+    with span("load"):
+        df = load_campaign_rows(args.input)
+    count("rows.ad_groups", len(df))
+
+    # 2. Pivot + KPIs
+    df_summary = summarize_campaigns(df)
+
+    # 3. Export summarized dataset
+    with span("export"):
+        df_summary.to_csv(args.output, index=False)
+
+    print(f"[OK] Pivoted to {len(df_summary)} campaigns and saved as {args.output}")
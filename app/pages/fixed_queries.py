@@ -3,27 +3,113 @@ import pandas as pd
 import json
 import os
 
+from pagination import SortedIndex, DEFAULT_PAGE_SIZE, paginate
+from etl.cross_domain_queries import CrossDomainQueries
+from etl.marketing.kpi_cube import KPICube, DIMENSIONS
+from etl.procurement.spend_analytics import refresh_rollup
+
 # -----------------------------
 # Corrected Data Folder Path
 # -----------------------------
 # Streamlit app is inside: helixgraph/app/
 # Data folder is:          helixgraph/data/processed/marketing/
-BASE_DIR = os.path.dirname(os.path.dirname(__file__))   # helixgraph/
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # helixgraph/
 DATA_DIR = os.path.join(BASE_DIR, "data", "processed", "marketing")
+DICT_DIR = os.path.join(BASE_DIR, "data", "dictionaries", "marketing")
 
+@st.cache_data
 def load_campaigns():
     path = os.path.join(DATA_DIR, "campaigns_v1.csv")
     return pd.read_csv(path)
 
+@st.cache_data
 def load_products():
     path = os.path.join(DATA_DIR, "products_v1.csv")
     return pd.read_csv(path)
 
 def load_channels():
-    path = os.path.join(DATA_DIR, "channels.json")
+    path = os.path.join(DICT_DIR, "channels.json")
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
+# -----------------------------
+# Sorted indexes (built once per session)
+# -----------------------------
+@st.cache_resource
+def campaign_index(column):
+    return SortedIndex(load_campaigns(), column, order_by="campaign_id")
+
+@st.cache_resource
+def product_index(column):
+    return SortedIndex(load_products(), column, order_by="product_id")
+
+@st.cache_resource
+def cross_domain_queries():
+    return CrossDomainQueries.from_csv()
+
+@st.cache_resource
+def kpi_cube():
+    return KPICube.build()
+
+@st.cache_resource
+def spend_rollup():
+    return refresh_rollup()[0]
+
+def run_query_button(query_choice, selected):
+    """
+    Keeps the last executed query in session state so that paging
+    (which reruns the script) does not reset the result view.
+    """
+    if st.button("Run Query"):
+        st.session_state.fixed_query = (query_choice, selected)
+    return st.session_state.get("fixed_query") == (query_choice, selected)
+
+def page_number_input(pages, key):
+    """
+    Page selector whose kept state is clamped to ``pages``, so switching to a
+    smaller result does not leave it past the last page.
+    """
+    if st.session_state.get(key, 1) > pages:
+        st.session_state[key] = pages
+    return st.number_input("Page", min_value=1, max_value=pages, key=key)
+
+def render_paginated(index, value, key):
+    """
+    Renders only the visible page of rows matching ``value`` plus the total count.
+    """
+    total = index.count(value)
+    if total == 0:
+        st.info("No matching rows.")
+        return
+
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        page_size = st.selectbox(
+            "Rows per page", [25, DEFAULT_PAGE_SIZE, 100, 250], index=1, key=f"{key}_page_size"
+        )
+    pages = (total + page_size - 1) // page_size
+    with col2:
+        # One page state per selection and page size: a new selection starts on page 1
+        page_no = page_number_input(pages, f"{key}_page_no_{value}_{page_size}")
+
+    page = index.page(value, offset=(page_no - 1) * page_size, limit=page_size)
+    st.caption(f"{page['total']:,} rows · page {page['page']} of {page['pages']}")
+    st.dataframe(page["rows"], use_container_width=True, hide_index=True)
+
+def render_paginated_frame(df, key):
+    """
+    Same as render_paginated() for a result that is already small and in memory.
+    """
+    total = len(df)
+    if total == 0:
+        st.info("No matching rows.")
+        return
+    pages = (total + DEFAULT_PAGE_SIZE - 1) // DEFAULT_PAGE_SIZE
+    page_no = page_number_input(pages, f"{key}_page_no")
+    page = paginate(df, offset=(page_no - 1) * DEFAULT_PAGE_SIZE, limit=DEFAULT_PAGE_SIZE)
+    st.caption(f"{page['total']:,} rows · page {page['page']} of {page['pages']}")
+    st.dataframe(page["rows"], use_container_width=True, hide_index=True)
+
 # -----------------------------
 # Fixed Query UI Page
 # -----------------------------
@@ -34,8 +120,8 @@ def fixed_query_page():
 
     # Load Data
     try:
-        campaigns = load_campaigns()
-        products = load_products()
+        load_campaigns()
+        load_products()
         channels = load_channels()
     except Exception as e:
         st.error(f"❌ Failed to load data: {e}")
@@ -50,6 +136,10 @@ def fixed_query_page():
         "Find Campaigns by Brand",
         "Find Products by Brand",
         "List Channels and Subcategories",
+        "Campaign → Orders → SKU Revenue",
+        "Supplier → POs → Late Invoices",
+        "KPI Rollup (Brand / Channel / Month)",
+        "Spend Rollup (Category Drill-down)",
     ]
 
     query_choice = st.selectbox("Select a Query", query_options)
@@ -61,12 +151,11 @@ def fixed_query_page():
     if query_choice == "Find Campaigns by Category":
         st.subheader("📂 Filter Campaigns by Category")
 
-        categories = sorted(campaigns["category"].dropna().unique())
-        selected = st.selectbox("Select Category", categories)
+        index = campaign_index("category")
+        selected = st.selectbox("Select Category", index.values())
 
-        if st.button("Run Query"):
-            result = campaigns[campaigns["category"] == selected]
-            st.dataframe(result, use_container_width=True)
+        if run_query_button(query_choice, selected):
+            render_paginated(index, selected, "campaigns_category")
 
     # ====================================================
     # 2) Find Campaigns by Channel
@@ -77,9 +166,8 @@ def fixed_query_page():
         channel_names = [c["name"] for c in channels]
         selected = st.selectbox("Select Channel", channel_names)
 
-        if st.button("Run Query"):
-            result = campaigns[campaigns["channel"] == selected]
-            st.dataframe(result, use_container_width=True)
+        if run_query_button(query_choice, selected):
+            render_paginated(campaign_index("channel"), selected, "campaigns_channel")
 
     # ====================================================
     # 3) Find Campaigns by Brand
@@ -87,12 +175,11 @@ def fixed_query_page():
     elif query_choice == "Find Campaigns by Brand":
         st.subheader("🏷️ Filter Campaigns by Brand")
 
-        brands = sorted(campaigns["brand_name"].dropna().unique())
-        selected = st.selectbox("Select Brand", brands)
+        index = campaign_index("brand_name")
+        selected = st.selectbox("Select Brand", index.values())
 
-        if st.button("Run Query"):
-            result = campaigns[campaigns["brand_name"] == selected]
-            st.dataframe(result, use_container_width=True)
+        if run_query_button(query_choice, selected):
+            render_paginated(index, selected, "campaigns_brand")
 
     # ====================================================
     # 4) Find Products by Brand
@@ -100,12 +187,11 @@ def fixed_query_page():
     elif query_choice == "Find Products by Brand":
         st.subheader("🛒 Filter Products by Brand")
 
-        product_brands = sorted(products["brand"].dropna().unique())
-        selected = st.selectbox("Select Brand", product_brands)
+        index = product_index("brand")
+        selected = st.selectbox("Select Brand", index.values())
 
-        if st.button("Run Query"):
-            result = products[products["brand"] == selected]
-            st.dataframe(result, use_container_width=True)
+        if run_query_button(query_choice, selected):
+            render_paginated(index, selected, "products_brand")
 
     # ====================================================
     # 5) Display channels.json full structure
@@ -118,3 +204,84 @@ def fixed_query_page():
             st.write("Subcategories:")
             st.write(", ".join(ch["subcategories"]))
             st.markdown("---")
+
+    # ====================================================
+    # 6) Campaign -> Orders -> SKUs (join index)
+    # ====================================================
+    elif query_choice == "Campaign → Orders → SKU Revenue":
+        st.subheader("🔗 Revenue by SKU for a Campaign")
+
+        queries = cross_domain_queries()
+        selected = st.selectbox("Select Campaign", queries.campaign_ids())
+
+        if run_query_button(query_choice, selected):
+            result = queries.campaign_sku_revenue(selected)
+            st.metric("Revenue", f"{result['revenue'].sum():,.0f}")
+            render_paginated_frame(result, "campaign_sku_revenue")
+
+    # ====================================================
+    # 7) Supplier -> POs -> Invoices (join index)
+    # ====================================================
+    elif query_choice == "Supplier → POs → Late Invoices":
+        st.subheader("🔗 Late Invoice Payments for a Supplier")
+
+        queries = cross_domain_queries()
+        selected = st.selectbox("Select Supplier", queries.supplier_codes())
+
+        if run_query_button(query_choice, selected):
+            invoices = queries.supplier_invoices(selected)
+            late = invoices[invoices["late_payment_flag"].astype(bool)]
+            st.write(f"{len(late)} of {len(invoices)} invoices were paid late.")
+            render_paginated_frame(late, "supplier_late_invoices")
+
+    # ====================================================
+    # 8) KPI rollup served from the precomputed cube
+    # ====================================================
+    elif query_choice == "KPI Rollup (Brand / Channel / Month)":
+        st.subheader("📈 KPI Rollup")
+
+        cube = kpi_cube()
+        group_by = st.multiselect("Group by", DIMENSIONS, default=["channel"])
+        kpis = st.multiselect("KPIs", cube.kpi_codes(), default=["roas", "ctr", "cvr"])
+        months = st.multiselect("Months (optional)", sorted(cube.dim_values["month"]))
+
+        if group_by:
+            filters = {"month": months} if months else {}
+            result = cube.query(group_by, kpis=kpis, **filters)
+            render_paginated_frame(result, "kpi_rollup")
+
+    # ====================================================
+    # 9) Procurement spend drill-down over the L1-L4 category tree
+    # ====================================================
+    elif query_choice == "Spend Rollup (Category Drill-down)":
+        st.subheader("🌳 Spend by Category")
+
+        rollup = spend_rollup()
+        months = st.multiselect("Months (optional)", sorted(rollup.months))
+        month = months or None
+
+        # One select per level; "(all)" stops the drill-down at the parent
+        node = 0
+        for level in range(1, 5):
+            kids = rollup.children(node, month=month)
+            if kids.empty:
+                break
+            labels = ["(all)"] + kids["category"].tolist()
+            picked = st.selectbox(f"L{level} category", labels, key=f"spend_rollup_L{level}")
+            if picked == "(all)":
+                break
+            node = int(kids.loc[kids["category"] == picked, "node"].iloc[0])
+
+        totals = rollup.totals(node, month=month)
+        cols = st.columns(4)
+        cols[0].metric("Spend", f"{totals['spend']:,.0f}")
+        cols[1].metric("Open to invoice", f"{totals['open_value']:,.0f}")
+        cols[2].metric("Purchase orders", f"{totals['pos']:,}")
+        cols[3].metric("Suppliers", f"{totals['suppliers']:,}")
+
+        by = st.radio("Break down by", ["Subcategory", "Supplier", "Month"], horizontal=True, key="spend_rollup_by")
+        if by == "Subcategory":
+            result = rollup.children(node, month=month)
+        else:
+            result = rollup.breakdown(node, by=by.lower(), month=month)
+        render_paginated_frame(result, f"spend_rollup_{by.lower()}")
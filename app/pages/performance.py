@@ -0,0 +1,105 @@
+import json
+import os
+import streamlit as st
+import pandas as pd
+
+from etl import instrumentation
+from etl.instrumentation import HISTORY_PATH, TRACE_ENV
+
+STAGES = ("load", "aggregate", "score", "retrieve", "generate")
+
+
+def summary_frame(summary):
+    """
+    One row per span name, slowest first.
+    """
+    if not summary:
+        return pd.DataFrame()
+    df = pd.DataFrame.from_dict(summary, orient="index").rename_axis("span").reset_index()
+    return df[["span", "calls", "total_ms", "mean_ms", "max_ms", "peak_rss_mb"]].sort_values("total_ms", ascending=False)
+
+
+def history_frame(runs):
+    """
+    One row per recorded run, one column per top-level stage (total ms).
+    """
+    rows = []
+    for r in runs:
+        row = {"started": r["started"], "wall_ms": r["wall_ms"], "peak_rss_mb": r["peak_rss_mb"]}
+        for name, stats in r["summary"].items():
+            if "." not in name:  # nested spans are already inside their stage
+                row[name] = stats["total_ms"]
+        rows.append(row)
+    return pd.DataFrame(rows).set_index("started")
+
+
+# -----------------------------
+# Performance Page
+# -----------------------------
+def performance_page():
+
+    st.title("⏱️ Performance")
+    st.caption("Per-stage timings, counters and peak memory of instrumented runs.")
+
+    st.markdown("---")
+
+    # -----------------------------
+    # This app session
+    # -----------------------------
+    st.subheader("This session")
+    tracer = instrumentation.tracer()
+    if tracer is None:
+        st.info(f"Instrumentation is off. Start the app with {TRACE_ENV}=1 to record this session.")
+    else:
+        summary = tracer.summary()
+        if summary:
+            st.dataframe(summary_frame(summary), hide_index=True)
+        else:
+            st.write("No spans recorded yet; ask a RAG Chat question or run a query first.")
+        if tracer.counters:
+            st.json(tracer.counters)
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Export trace"):
+                st.session_state.perf_trace_path = instrumentation.export()
+        with col2:
+            st.download_button("Download trace JSON", json.dumps(tracer.trace()),
+                               file_name=os.path.basename(tracer.path), mime="application/json")
+        if st.session_state.get("perf_trace_path"):
+            st.caption(f"Written to {st.session_state.perf_trace_path} (open in chrome://tracing or ui.perfetto.dev)")
+
+    st.markdown("---")
+
+    # -----------------------------
+    # Recorded runs
+    # -----------------------------
+    st.subheader("Recorded runs")
+    runs = instrumentation.load_history()
+    if not runs:
+        st.info(f"No runs in {HISTORY_PATH}. Run a script with {TRACE_ENV}=1, "
+                f"e.g. `{TRACE_ENV}=1 python aggregate_campaigns.py`.")
+        return
+
+    names = sorted({r["run"] for r in runs})
+    run_name = st.selectbox("Run", names)
+    selected = [r for r in runs if r["run"] == run_name]
+
+    threshold = st.slider("Regression threshold (%)", 5, 100, 20, step=5) / 100
+    flagged = instrumentation.regressions(selected, threshold=threshold)
+    for name, last_ms, base_ms, ratio in flagged:
+        st.warning(f"{name}: {last_ms:.1f} ms in the last run vs. median {base_ms:.1f} ms ({ratio}x)")
+    if len(selected) > 1 and not flagged:
+        st.success("No stage regressed against the previous runs.")
+
+    history = history_frame(selected)
+    stage_cols = [c for c in history.columns if c not in ("wall_ms", "peak_rss_mb")]
+    ordered = [c for c in STAGES if c in stage_cols] + [c for c in stage_cols if c not in STAGES]
+    if ordered and len(history) > 1:
+        st.line_chart(history[ordered])
+    st.dataframe(history.iloc[::-1])
+
+    last = selected[-1]
+    st.markdown(f"**Last run** ({last['started']}, {last['wall_ms']:.0f} ms, peak {last['peak_rss_mb']:.0f} MB)")
+    st.dataframe(summary_frame(last["summary"]), hide_index=True)
+    if last.get("counters"):
+        st.json(last["counters"])
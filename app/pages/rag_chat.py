@@ -1,13 +1,106 @@
-import streamlit as st
+import html
 import time
+import streamlit as st
+
+import warmup
+from rag.answer_cache import AnswerCache
+from rag.corpus import data_version
+from rag.pipeline import AnswerPipeline
+
+HISTORY_WINDOW = 20      # messages rendered by default
+STREAM_REFRESH_S = 0.05  # minimum interval between streamed UI updates
+
 
 # -----------------------------
-# RAG Chat Page (UI Only)
+# Answer backend (loaded once per process)
+# -----------------------------
+@st.cache_resource(show_spinner="Loading retrieval index...")
+def answer_pipeline():
+    # preloaded in the background by warmup.start() when the app opened
+    retriever = warmup.take("answer_retriever")
+    return AnswerPipeline(retriever, cache=AnswerCache(retriever.retriever.embedder))
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def current_data_version():
+    return data_version()
+
+
+def fresh_pipeline():
+    """
+    Returns the answer pipeline, reloading it (and dropping its answer
+    cache) when the graph snapshot on disk has changed.
+    """
+    pipeline = answer_pipeline()
+    if pipeline.version != current_data_version():
+        answer_pipeline.clear()
+        pipeline = answer_pipeline()
+    return pipeline
+
+
+def message_html(role, content):
+    if role == "user":
+        return f"""
+            <div class='box' style='border-color:#333; margin-bottom:10px;'>
+                <b>🧑 You:</b><br>{html.escape(content)}
+            </div>
+            """
+    return f"""
+            <div class='box' style='border-color:#555; background-color:#0F0F0F; margin-bottom:10px;'>
+                <b>🤖 Assistant:</b><br>{html.escape(content).replace(chr(10), '<br>')}
+            </div>
+            """
+
+
+def add_message(role, content):
+    # rendered once and kept, so reruns only re-emit the stored HTML
+    st.session_state.chat_history.append({"role": role, "content": content, "html": message_html(role, content)})
+
+
+def queue_question(question):
+    if question and question.strip():
+        st.session_state.pending_question = question.strip()
+
+
+def queue_input():
+    queue_question(st.session_state.rag_user_input)
+    st.session_state.rag_user_input = ""
+
+
+def stream_answer(question):
+    """
+    Submits ``question`` to the pipeline and renders tokens as they arrive.
+    """
+    history = [{"role": m["role"], "content": m["content"]} for m in st.session_state.chat_history]
+    add_message("user", question)
+    st.markdown(st.session_state.chat_history[-1]["html"], unsafe_allow_html=True)
+
+    pipeline = fresh_pipeline()
+    stream = pipeline.submit(question, history)
+    placeholder = st.empty()
+    last_update = 0.0
+    try:
+        for _ in stream:
+            now = time.perf_counter()
+            if now - last_update >= STREAM_REFRESH_S:
+                placeholder.markdown(message_html("assistant", stream.text + " ▌"), unsafe_allow_html=True)
+                last_update = now
+    except Exception as e:
+        st.session_state.chat_history.pop()
+        placeholder.error(f"Answer failed: {e}")
+        return
+    add_message("assistant", stream.text)
+    placeholder.markdown(st.session_state.chat_history[-1]["html"], unsafe_allow_html=True)
+    st.session_state.rag_metadata = dict(stream.metadata, answer_cache=pipeline.cache.stats())
+
+
+# -----------------------------
+# RAG Chat Page
 # -----------------------------
 def rag_chat_page():
 
     st.title("💬 RAG Chat Interface")
-    st.caption("Conversational interface for exploring graph insights. (UI Only)")
+    st.caption("Conversational interface for exploring graph insights.")
 
     st.markdown("---")
 
@@ -15,7 +108,7 @@ def rag_chat_page():
     # Chat Session State
     # -----------------------------
     if "chat_history" not in st.session_state:
-        st.session_state.chat_history = []   # list of dicts: {role: "user"/"assistant", content: "..."}
+        st.session_state.chat_history = []   # list of dicts: {role: "user"/"assistant", content: "...", html: "..."}
 
     # -----------------------------
     # Example Questions (Inline Box)
@@ -39,37 +132,23 @@ def rag_chat_page():
         ]
 
         for i, q in enumerate(examples):
-            if cols[i % 2].button(q):
-                st.session_state.chat_history.append({"role": "user", "content": q})
-                st.session_state.chat_history.append({
-                    "role": "assistant",
-                    "content": "(placeholder) This is where the RAG answer will appear."
-                })
+            cols[i % 2].button(q, on_click=queue_question, args=(q,))
 
     st.markdown("---")
 
     # -----------------------------
     # Chat Message Rendering
     # -----------------------------
-    for msg in st.session_state.chat_history:
-        if msg["role"] == "user":
-            st.markdown(
-                f"""
-                <div class='box' style='border-color:#333; margin-bottom:10px;'>
-                    <b>🧑 You:</b><br>{msg['content']}
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
-        else:
-            st.markdown(
-                f"""
-                <div class='box' style='border-color:#555; background-color:#0F0F0F; margin-bottom:10px;'>
-                    <b>🤖 Assistant:</b><br>{msg['content']}
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
+    history = st.session_state.chat_history
+    if len(history) > HISTORY_WINDOW and not st.toggle(f"Show full history ({len(history)} messages)"):
+        st.caption(f"{len(history) - HISTORY_WINDOW} earlier messages hidden.")
+        history = history[-HISTORY_WINDOW:]
+    if history:
+        st.markdown("".join(msg["html"] for msg in history), unsafe_allow_html=True)
+
+    pending = st.session_state.pop("pending_question", None)
+    if pending:
+        stream_answer(pending)
 
     # -----------------------------
     # User Input Bar (Aligned)
@@ -79,21 +158,10 @@ def rag_chat_page():
     col1, col2 = st.columns([5, 1])
 
     with col1:
-        user_input = st.text_input("Ask a question:", key="rag_user_input")
+        st.text_input("Ask a question:", key="rag_user_input")
 
     with col2:
-        if st.button("Send"):
-            if user_input.strip():
-                st.session_state.chat_history.append({"role": "user", "content": user_input})
-
-                with st.spinner("Thinking..."):
-                    time.sleep(0.4)
-                    response = "(placeholder) RAG model response will go here."
-
-                st.session_state.chat_history.append({
-                    "role": "assistant",
-                    "content": response
-                })
+        st.button("Send", on_click=queue_input)
 
     # -----------------------------
     # Metadata Box
@@ -103,16 +171,14 @@ def rag_chat_page():
     st.markdown(
         """
         <div class='box'>
-            <h4>📘 Retrieval Metadata (Placeholder)</h4>
-            <p>Displays retrieved nodes, relationships, similarity scores, etc.</p>
+            <h4>📘 Retrieval Metadata</h4>
+            <p>Retrieved nodes, relationships, scores and top chunks for the last question.</p>
         </div>
         """,
         unsafe_allow_html=True
     )
 
-    st.json({
-        "retrieved_nodes": ["Campaign_A", "Product_4422", "Order_9912"],
-        "similarity_scores": [0.88, 0.79, 0.76],
-        "top_chunks": ["chunk_01", "chunk_05"],
-        "note": "Mock metadata — real metadata comes from backend RAG API."
-    })
+    if "rag_metadata" in st.session_state:
+        st.json(st.session_state.rag_metadata)
+    else:
+        st.info("Ask a question to see retrieval metadata.")
@@ -0,0 +1,93 @@
+import numpy as np
+
+# -----------------------------
+# Server-side pagination helpers
+# -----------------------------
+# Results are never handed to the browser in full: a query resolves to a
+# contiguous range of a sorted row index, and only the rows of the visible
+# page are materialised. Cost per page is O(log N + page size).
+
+DEFAULT_PAGE_SIZE = 50
+
+
+def _sort_keys(series):
+    """
+    Returns a NumPy array of sortable keys (missing values become "").
+    """
+    if series.dtype == object or str(series.dtype) in ("string", "str", "category"):
+        return series.fillna("").astype(str).to_numpy()
+    return series.to_numpy()
+
+
+class SortedIndex:
+    def __init__(self, df, key, order_by=None):
+        """
+        Builds a row index of ``df`` sorted by ``key`` (and optionally ``order_by``
+        inside each key), so equality filters become a binary search.
+
+        Args:
+            df (pd.DataFrame): The table to index. It is not copied.
+            key (str): Column used for equality filtering.
+            order_by (str): Optional column used to order rows within a key.
+        """
+        self.df = df
+        self.key = key
+        keys = _sort_keys(df[key])
+        if order_by is not None:
+            self.order = np.lexsort((_sort_keys(df[order_by]), keys))
+        else:
+            self.order = np.argsort(keys, kind="stable")
+        self.sorted_keys = keys[self.order]
+
+    def values(self):
+        """
+        Returns the distinct non-empty key values in sorted order.
+        """
+        uniq = np.unique(self.sorted_keys)
+        return [v for v in uniq.tolist() if v != ""]
+
+    def range(self, value):
+        """
+        Returns the (start, end) positions of ``value`` in the sorted index.
+        """
+        start = int(np.searchsorted(self.sorted_keys, value, side="left"))
+        end = int(np.searchsorted(self.sorted_keys, value, side="right"))
+        return start, end
+
+    def count(self, value):
+        start, end = self.range(value)
+        return end - start
+
+    def page(self, value, offset=0, limit=DEFAULT_PAGE_SIZE):
+        """
+        Returns one page of rows whose ``key`` equals ``value``.
+        """
+        start, end = self.range(value)
+        return _page_from_positions(self.df, self.order, start, end, offset, limit)
+
+
+def paginate(df, offset=0, limit=DEFAULT_PAGE_SIZE, order=None):
+    """
+    Returns one page of an unfiltered table, optionally through a precomputed
+    row ``order`` (e.g. ``SortedIndex.order``).
+    """
+    if order is None:
+        order = np.arange(len(df))
+    return _page_from_positions(df, order, 0, len(order), offset, limit)
+
+
+def _page_from_positions(df, order, start, end, offset, limit):
+    total = end - start
+    limit = max(int(limit), 1)
+    offset = min(max(int(offset), 0), max(total - 1, 0))
+    offset -= offset % limit
+    lo = start + offset
+    hi = min(lo + limit, end)
+    return {
+        "rows": df.iloc[order[lo:hi]],
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "page": offset // limit + 1,
+        "pages": max((total + limit - 1) // limit, 1),
+    }
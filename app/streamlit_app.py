@@ -1,8 +1,19 @@
 import streamlit as st
-from PIL import Image
 import os
+import sys
 import base64
 
+# Make the repository root importable (etl/, rag/ ...) for the pages
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import warmup
+
+# Heavy modules (pandas, rag/, etl/) are imported by the page that needs
+# them, never here: this script runs on every rerun of every page.
+LOGO_PATH = os.path.join(ROOT_DIR, "asset", "Algorise Logo.jpg")
+
 # ----------------------------------------------------------
 # MUST be the first Streamlit command
 # ----------------------------------------------------------
@@ -80,14 +91,35 @@ algorise_style = """
 # Inject CSS
 st.markdown(algorise_style, unsafe_allow_html=True)
 
+
 # ----------------------------------------------------------
-# Sidebar Logo
+# Assets (encoded once per process) and background warm-up
 # ----------------------------------------------------------
-logo_path = os.path.join("asset", "Algorise Logo.jpg")
+@st.cache_resource(show_spinner=False)
+def logo_data_uri(path=LOGO_PATH):
+    """
+    Returns the logo as a base64 data URI (None if the file is missing).
+    The file is read and encoded once; reruns reuse the string.
+    """
+    if not os.path.exists(path):
+        return None
+    mime = "image/png" if path.lower().endswith(".png") else "image/jpeg"
+    with open(path, "rb") as f:
+        return f"data:{mime};base64,{base64.b64encode(f.read()).decode()}"
+
+
+@st.cache_resource(show_spinner=False)
+def start_warmup():
+    return warmup.start()
+
 
-if os.path.exists(logo_path):
-    logo = Image.open(logo_path)
-    st.sidebar.image(logo, width=140)
+logo_uri = logo_data_uri()
+
+# ----------------------------------------------------------
+# Sidebar Logo
+# ----------------------------------------------------------
+if logo_uri:
+    st.sidebar.markdown(f'<img src="{logo_uri}" width="140" />', unsafe_allow_html=True)
 else:
     st.sidebar.markdown("### **Algorise Graph App**")
 
@@ -98,7 +130,7 @@ st.sidebar.markdown("---")
 # ----------------------------------------------------------
 page = st.sidebar.radio(
     "Navigation",
-    ["Home", "Fixed Queries", "RAG Chat", "Bloom Guides"]
+    ["Home", "Fixed Queries", "RAG Chat", "Performance", "Bloom Guides"]
 )
 
 # ----------------------------------------------------------
@@ -106,19 +138,12 @@ page = st.sidebar.radio(
 # ----------------------------------------------------------
 if page == "Home":
 
-    # Load Base64 logo
-    logo_path = os.path.join("assets", "logo.png")
-    if os.path.exists(logo_path):
-        logo_base64 = base64.b64encode(open(logo_path, "rb").read()).decode()
-    else:
-        logo_base64 = None
-
     # Title section with logo
-    if logo_base64:
+    if logo_uri:
         st.markdown(
             f"""
             <div style='display:flex; align-items:center; gap:15px; margin-top:10px;'>
-                <img src="data:image/png;base64,{logo_base64}" width="70" />
+                <img src="{logo_uri}" width="70" />
                 <h1 style='margin:0px; font-weight:600;'>Algorise Graph Intelligence</h1>
             </div>
             """,
@@ -141,6 +166,13 @@ elif page == "RAG Chat":
     from pages.rag_chat import rag_chat_page
     rag_chat_page()
 
+elif page == "Performance":
+    from pages.performance import performance_page
+    performance_page()
+
 elif page == "Bloom Guides":
     st.title("🌐 Neo4j Bloom Guide")
     st.write("This section explains how to create Bloom Perspectives.")
+
+# Preload page resources once the current page has been sent
+start_warmup()
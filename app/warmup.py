@@ -0,0 +1,115 @@
+import importlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# -----------------------------
+# Background warm-up
+# -----------------------------
+# The entry script only imports Streamlit; heavy modules (pandas, NumPy, the
+# rag/ and etl/ packages) are imported by the page that needs them. After the
+# first paint a single background thread preloads the expensive resources so
+# the first visit to a page does not pay for them. Pages claim a preloaded
+# resource with take(); if warm-up is disabled or has not reached the task,
+# take() simply runs the loader in the calling thread. Tasks a page already
+# loaded itself are not scheduled again.
+#
+# Set APP_WARMUP=0 to disable (e.g. for import-time measurements).
+
+WARMUP_ENV = "APP_WARMUP"
+
+
+def load_answer_retriever():
+    """
+    Hybrid retriever for RAG Chat: vector index + graph snapshot.
+    """
+    from rag.graph import KnowledgeGraph
+    from rag.hybrid import HybridRetriever
+    from rag.retriever import Retriever, INDEX_DIR
+    return HybridRetriever(Retriever.load_or_build(), KnowledgeGraph.load_or_build(INDEX_DIR))
+
+
+PAGE_MODULES = ["pandas", "etl.cross_domain_queries", "etl.marketing.kpi_cube", "rag.pipeline", "rag.answer_cache"]
+
+
+def import_page_modules():
+    """
+    Imports the modules the pages need, so the first page switch is cheap.
+    """
+    for module in PAGE_MODULES:
+        importlib.import_module(module)
+
+
+# name -> loader, run in this order
+WARMUP_TASKS = {
+    "page_modules": import_page_modules,
+    "answer_retriever": load_answer_retriever,
+}
+
+_lock = threading.Lock()
+_futures = {}
+_taken = set()  # tasks already claimed (or loaded) by a page
+_timings = {}
+
+
+def enabled():
+    return os.environ.get(WARMUP_ENV, "1").lower() not in ("0", "false", "no")
+
+
+def _timed(name, loader):
+    start = time.perf_counter()
+    try:
+        return loader()
+    finally:
+        _timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+
+def start(tasks=None):
+    """
+    Submits the warm-up tasks to a background thread (once per process).
+    Returns the names of the tasks that were scheduled.
+    """
+    if not enabled():
+        return []
+    tasks = WARMUP_TASKS if tasks is None else tasks
+    with _lock:
+        pending = [name for name in tasks if name not in _futures and name not in _taken]
+        if pending:
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="warmup")
+            for name in pending:
+                _futures[name] = executor.submit(_timed, name, tasks[name])
+            executor.shutdown(wait=False)
+    return pending
+
+
+def take(name, loader=None):
+    """
+    Returns the preloaded result of ``name`` (waiting if it is still running)
+    and forgets it, so a later call reloads; start() no longer schedules it.
+    Falls back to ``loader`` (the registered task by default) when nothing
+    was preloaded or the warm-up failed (reported); errors of the fallback
+    propagate to the caller.
+    """
+    with _lock:
+        future = _futures.pop(name, None)
+        _taken.add(name)
+    if future is not None:
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"[WARN] Warm-up task {name} failed, loading it again: {e!r}")
+    return (loader or WARMUP_TASKS[name])()
+
+
+def status():
+    """
+    Returns {task: "pending" | "running" | "done" | "failed"} and per-task ms.
+    """
+    with _lock:
+        states = {
+            name: ("running" if f.running() else "pending" if not f.done()
+                   else "failed" if f.exception() else "done")
+            for name, f in _futures.items()
+        }
+    return {"tasks": states, "timings_ms": dict(_timings)}
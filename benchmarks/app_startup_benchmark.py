@@ -0,0 +1,123 @@
+"""
+app_startup_benchmark.py
+
+Cold-start budget for the Streamlit app. Each scenario runs in a fresh
+interpreter through streamlit.testing (AppTest), so import costs are real:
+
+- import:      `import streamlit` plus the testing harness
+- first paint: first run of app/streamlit_app.py (Home page)
+- rerun:       second run of the Home page (memoized assets)
+- heavy modules still unloaded after the first paint (warm-up disabled)
+- page switches to Fixed Queries / RAG Chat, cold (APP_WARMUP=0) and after
+  the background warm-up has finished
+
+Exits with status 1 when the import or first-paint budget is exceeded or a
+heavy module is imported by the Home page.
+
+Usage (from the repository root):
+    python -m benchmarks.app_startup_benchmark --paint-budget-ms 500
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT_DIR, "app", "streamlit_app.py")
+HEAVY_MODULES = ("pandas", "numpy", "PIL", "spacy", "rag", "etl")
+PAGES = ("Fixed Queries", "RAG Chat")
+
+
+def child(warm, timeout):
+    """
+    Runs one scenario in this (fresh) process and prints a JSON record.
+    """
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    record = {"warm": warm, "import_ms": (time.perf_counter() - start) * 1000}
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    start = time.perf_counter()
+    at.run()
+    record["first_paint_ms"] = (time.perf_counter() - start) * 1000
+    record["heavy_modules"] = [m for m in HEAVY_MODULES if m in sys.modules]
+
+    start = time.perf_counter()
+    at.run()
+    record["rerun_ms"] = (time.perf_counter() - start) * 1000
+
+    if warm:
+        import warmup  # the app directory is on sys.path once the script ran
+        start = time.perf_counter()
+        while any(s in ("pending", "running") for s in warmup.status()["tasks"].values()):
+            time.sleep(0.01)
+        record["warmup_wait_ms"] = (time.perf_counter() - start) * 1000
+        record["warmup"] = warmup.status()
+
+    for page in PAGES:
+        start = time.perf_counter()
+        at.sidebar.radio[0].set_value(page).run()
+        record[f"page_ms:{page}"] = (time.perf_counter() - start) * 1000
+        if at.exception:
+            record[f"error:{page}"] = str(at.exception[0].value)
+    print(json.dumps(record))
+
+
+def run_scenario(warm, timeout):
+    env = dict(os.environ, APP_WARMUP="1" if warm else "0")
+    cmd = [sys.executable, "-m", "benchmarks.app_startup_benchmark", "--child", "warm" if warm else "cold",
+           "--timeout", str(timeout)]
+    out = subprocess.run(cmd, cwd=ROOT_DIR, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3, help="Cold runs; the median is checked")
+    parser.add_argument("--import-budget-ms", type=float, default=800.0)
+    parser.add_argument("--paint-budget-ms", type=float, default=500.0)
+    parser.add_argument("--timeout", type=float, default=120.0, help="AppTest timeout per run (s)")
+    parser.add_argument("--child", choices=["cold", "warm"], default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child == "warm", args.timeout)
+        return
+
+    cold = [run_scenario(False, args.timeout) for _ in range(args.repeat)]
+    warm = run_scenario(True, args.timeout)
+
+    def median(key):
+        values = sorted(r[key] for r in cold)
+        return values[len(values) // 2]
+
+    import_ms, paint_ms = median("import_ms"), median("first_paint_ms")
+    print(f"[INFO] import {import_ms:.0f} ms, first paint {paint_ms:.0f} ms, rerun {median('rerun_ms'):.0f} ms "
+          f"(median of {args.repeat} cold starts)")
+    for page in PAGES:
+        print(f"[INFO] {page}: cold {median(f'page_ms:{page}'):.0f} ms, "
+              f"after warm-up {warm[f'page_ms:{page}']:.0f} ms")
+    print(f"[INFO] warm-up tasks: {warm['warmup']['timings_ms']} (waited {warm['warmup_wait_ms']:.0f} ms)")
+
+    failures = []
+    if import_ms > args.import_budget_ms:
+        failures.append(f"import {import_ms:.0f} ms > budget {args.import_budget_ms:.0f} ms")
+    if paint_ms > args.paint_budget_ms:
+        failures.append(f"first paint {paint_ms:.0f} ms > budget {args.paint_budget_ms:.0f} ms")
+    heavy = sorted({m for r in cold for m in r["heavy_modules"]})
+    if heavy:
+        failures.append(f"Home page imported {', '.join(heavy)}")
+    errors = [f"{k[6:]}: {v}" for r in cold + [warm] for k, v in r.items() if k.startswith("error:")]
+    failures += sorted(set(errors))
+
+    for failure in failures:
+        print(f"[WARN] {failure}")
+    if failures:
+        sys.exit(1)
+    print("[OK] startup within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+datagen.py
+
+Scale-factor copies of the marketing and procurement datasets for the
+end-to-end benchmark suite (benchmarks/suite.py).
+
+SF N holds N replicas of the source tables. Replica 0 is the source data
+unchanged (so SF1 is the real dataset); replica r > 0 suffixes every key with
+"-R{r}" and moves all of its dates by one seeded offset (whole weeks). The
+invariants enforced by scripts/validate_csv.py and the procurement integrity
+checker therefore hold at every scale:
+
+- orders reference campaigns / ad groups of their own replica ("organic"
+  stays as is) and fall inside the shifted campaign window
+- PO lines reference suppliers of their own replica, invoices and risks
+  reference POs / suppliers of their own replica, and invoice dates keep
+  their distance to the PO date
+- orders and PO lines reference product copies of a random replica, so
+  product lookups are spread over the whole key space
+
+Cells are copied as text (padded headers, BOM and "81,557"-style numbers of
+the marketing exports included) and written in blocks of replicas, so memory
+stays bounded by the block size rather than the scale factor.
+
+Usage (from the repository root):
+    python -m benchmarks.datagen --sf 10
+"""
+import argparse
+import csv
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from etl.cross_domain_queries import MARKETING_DIR, PROCUREMENT_DIR, ROOT_DIR
+
+BENCH_DIR = os.path.join(ROOT_DIR, "data", "bench")
+MARKETING_DATE = "%Y-%m-%d"
+PROCUREMENT_DATE = "%Y-%m-%d %H:%M:%S"
+ORGANIC = "organic"
+
+# file -> (source dir key, encoding, {column: rule})
+#   key:     suffixed with the row's replica
+#   product: suffixed with a random replica (product copies)
+#   date:    shifted by the replica's offset
+#   text:    key references inside free text
+TABLES = {
+    "campaigns_v1.csv": ("marketing", "utf-8-sig", {
+        "campaign_id": "key", "ad_group_id": "key", "start_date": "date", "end_date": "date",
+    }),
+    "products_v1.csv": ("marketing", "utf-8-sig", {"product_id": "key", "SKU_id": "key"}),
+    "orders_v1.csv": ("marketing", "utf-8-sig", {
+        "customer_id": "key", "campaign_id": "key", "ad_group_id": "key", "order_id": "key",
+        "SKU_id": "product", "Order_date": "date",
+    }),
+    "suppliers.csv": ("procurement", "utf-8", {"vendorCode": "key"}),
+    "products.csv": ("procurement", "utf-8", {"sku": "key"}),
+    "purchase_orders.csv": ("procurement", "utf-8", {
+        "orderNumber": "key", "supplierVendorCode": "key", "productSku": "product",
+        "dateIssued": "date", "dateChanged": "date", "deliveryDate": "date",
+    }),
+    "invoices.csv": ("procurement", "utf-8", {
+        "invoiceNumber": "key", "poOrderNumber": "key", "invoiceText": "text",
+        "dateCreated": "date", "paymentDueDate": "date", "postingDate": "date",
+    }),
+    "risks.csv": ("procurement", "utf-8", {
+        "riskId": "key", "supplierVendorCode": "key", "riskDescription": "text",
+    }),
+}
+# (text column, key column it mentions)
+TEXT_KEYS = {"invoiceText": "poOrderNumber", "riskDescription": "supplierVendorCode"}
+
+
+def dataset_dir(sf, root=BENCH_DIR):
+    return os.path.join(root, f"sf{sf}")
+
+
+def dataset_dirs(sf, root=BENCH_DIR):
+    """
+    Returns (marketing_dir, procurement_dir) of a generated scale factor.
+    """
+    base = dataset_dir(sf, root)
+    return os.path.join(base, "marketing"), os.path.join(base, "procurement")
+
+
+def replica_offsets(sf, seed=42, max_weeks=52):
+    """
+    Date offset (days) per replica; replica 0 is never shifted.
+    """
+    rng = np.random.default_rng(seed)
+    weeks = rng.integers(-max_weeks, max_weeks + 1, size=sf)
+    weeks[0] = 0
+    return weeks * 7
+
+
+def read_source(path, encoding):
+    """
+    Returns (raw header cells, DataFrame of text cells keyed by stripped names).
+    """
+    with open(path, "r", encoding=encoding, newline="") as f:
+        header = next(csv.reader(f))
+    df = pd.read_csv(path, encoding=encoding, dtype=str, keep_default_na=False, header=None, skiprows=1,
+                     names=range(len(header)))
+    names = [h.strip() or f"_col{i}" for i, h in enumerate(header)]
+    df.columns = names
+    return header, df
+
+
+def replicate_block(df, rules, replicas, offsets, sf, fmt, rng):
+    """
+    Returns the rows of ``replicas`` concatenated, with keys suffixed and dates
+    shifted per replica.
+    """
+    dates = {col: pd.to_datetime(df[col], format=fmt, errors="coerce")
+             for col, rule in rules.items() if rule == "date"}
+    n = len(df)
+    out = []
+    for r in replicas:
+        part = df.copy()
+        suffix = f"-R{r}" if r else ""
+        for col, rule in rules.items():
+            if rule == "key" and r:
+                keep = (part[col] == "") | (part[col] == ORGANIC)
+                part[col] = part[col].where(keep, part[col] + suffix)
+            elif rule == "product" and sf > 1:
+                picks = rng.integers(0, sf, size=n)
+                suffixes = np.where(picks == 0, "", np.char.add("-R", picks.astype(str)))
+                part[col] = part[col] + suffixes
+            elif rule == "date" and offsets[r]:
+                shifted = (dates[col] + pd.Timedelta(days=int(offsets[r]))).dt.strftime(fmt)
+                part[col] = shifted.where(dates[col].notna(), df[col])
+        if r:
+            for col, key in TEXT_KEYS.items():
+                if col in rules and key in df.columns:
+                    part[col] = [t.replace(k, k + suffix) if k else t for t, k in zip(df[col], df[key])]
+        out.append(part)
+    return pd.concat(out, ignore_index=True)
+
+
+def generate(sf, root=BENCH_DIR, seed=42, block=50, marketing_dir=MARKETING_DIR, procurement_dir=PROCUREMENT_DIR):
+    """
+    Writes the SF ``sf`` dataset under ``root``/sf{sf}/{marketing,procurement}
+    and returns {file: rows written}.
+    """
+    sources = {"marketing": marketing_dir, "procurement": procurement_dir}
+    targets = dict(zip(("marketing", "procurement"), dataset_dirs(sf, root)))
+    offsets = replica_offsets(sf, seed)
+    rng = np.random.default_rng(seed + 1)
+    rows = {}
+    for name, (domain, encoding, rules) in TABLES.items():
+        header, df = read_source(os.path.join(sources[domain], name), encoding)
+        fmt = MARKETING_DATE if domain == "marketing" else PROCUREMENT_DATE
+        os.makedirs(targets[domain], exist_ok=True)
+        path = os.path.join(targets[domain], name)
+        # One handle for all blocks, so the BOM is written once
+        with open(path + ".tmp", "w", encoding=encoding, newline="") as f:
+            csv.writer(f, lineterminator="\n").writerow(header)
+            for first in range(0, sf, block):
+                part = replicate_block(df, rules, range(first, min(first + block, sf)), offsets, sf, fmt, rng)
+                part.to_csv(f, header=False, index=False)
+        os.replace(path + ".tmp", path)
+        rows[name] = len(df) * sf
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sf", type=int, nargs="+", default=[1], help="Scale factors, e.g. --sf 1 10 100")
+    parser.add_argument("--out", default=BENCH_DIR)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--block", type=int, default=50, help="Replicas per write block")
+    args = parser.parse_args()
+
+    for sf in args.sf:
+        start = time.perf_counter()
+        rows = generate(sf, args.out, args.seed, args.block)
+        print(f"[OK] SF{sf}: {sum(rows.values()):,} rows in {time.perf_counter() - start:.1f}s -> {dataset_dir(sf, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+hybrid_benchmark.py
+
+Graph-expansion latency of rag/hybrid.py on a hub node: adds a synthetic
+brand with ``--orders`` orders (one product each) to the real graph and
+expands from it with and without fan-out caps.
+
+Usage (from the repository root):
+    python -m benchmarks.hybrid_benchmark --orders 100000
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+from rag.graph import KnowledgeGraph, graph_edges
+from rag.hybrid import HybridRetriever, DEFAULT_FANOUT, DEFAULT_BUDGET
+
+HUB = "brand:HubBrand"
+
+
+class SeedOnly:
+    """
+    Stand-in for the vector retriever: always returns the hub as the seed.
+    """
+    docs = []
+
+    def retrieve(self, question, k=5):
+        return [{"node_id": HUB, "score": 1.0}]
+
+
+def hub_edges(n_orders):
+    orders = pd.Series([f"order:hub_{i}" for i in range(n_orders)])
+    campaign = pd.DataFrame({"src": HUB, "rel": "RUNS", "dst": ["campaign:HUB_001"]})
+    has_order = pd.DataFrame({"src": "campaign:HUB_001", "rel": "HAS_ORDER", "dst": orders})
+    contains = pd.DataFrame({"src": orders, "rel": "CONTAINS", "dst": "product:HUB-" + (orders.index % 500).astype(str)})
+    owns = pd.DataFrame({"src": HUB, "rel": "OWNS", "dst": "product:HUB-" + pd.Series(range(500)).astype(str)})
+    return pd.concat([campaign, has_order, contains, owns], ignore_index=True)
+
+
+def timed(hybrid, runs):
+    latencies = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        scores, _, _ = hybrid.expand(hybrid.retriever.retrieve(""))
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return np.percentile(latencies, 50), np.percentile(latencies, 95), len(scores)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    graph = KnowledgeGraph.from_edges(pd.concat([graph_edges(), hub_edges(args.orders)], ignore_index=True))
+    print(f"[INFO] graph: {len(graph):,} nodes, {graph.edge_count:,} edges in {time.perf_counter() - start:.1f}s")
+
+    configs = [
+        ("capped", DEFAULT_FANOUT, DEFAULT_BUDGET),
+        ("uncapped", (None, None), len(graph)),
+    ]
+    for label, fanout, budget in configs:
+        hybrid = HybridRetriever(SeedOnly(), graph, fanout=fanout, budget=budget)
+        p50, p95, nodes = timed(hybrid, args.runs if label == "capped" else max(1, args.runs // 10))
+        print(f"[INFO] {label:>8}: fanout={fanout}, budget={budget:,} -> {nodes:,} nodes, p50 {p50:.2f} ms, p95 {p95:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+join_index_benchmark.py
+
+Compares the precomputed join indexes of etl/cross_domain_queries.py with the
+equivalent pandas filter + merge pipelines.
+
+Usage (from the repository root):
+    python -m benchmarks.join_index_benchmark --scale 100 --queries 50
+"""
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from etl.cross_domain_queries import CrossDomainQueries, read_table, MARKETING_DIR, PROCUREMENT_DIR
+
+
+def tile(df, scale):
+    """
+    Repeats a child table ``scale`` times so every key owns ``scale`` x more rows.
+    """
+    if scale <= 1:
+        return df
+    return pd.concat([df] * scale, ignore_index=True)
+
+
+def timed(fn, args_list):
+    start = time.perf_counter()
+    for args in args_list:
+        fn(*args)
+    return (time.perf_counter() - start) / max(len(args_list), 1) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=10, help="Tile orders/POs/invoices N times")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    orders = tile(read_table(os.path.join(MARKETING_DIR, "orders_v1.csv"), ["Order_date"]), args.scale)
+    products = read_table(os.path.join(MARKETING_DIR, "products_v1.csv"))
+    pos = tile(read_table(os.path.join(PROCUREMENT_DIR, "purchase_orders.csv"), ["dateIssued"]), args.scale)
+    invoices = tile(read_table(os.path.join(PROCUREMENT_DIR, "invoices.csv"), ["dateCreated"]), args.scale)
+    print(f"[INFO] orders={len(orders):,} purchase_orders={len(pos):,} invoices={len(invoices):,}")
+
+    start = time.perf_counter()
+    queries = CrossDomainQueries(orders, products, pos, invoices)
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"[INFO] Index build: {build_ms:.1f} ms")
+
+    rng = np.random.default_rng(args.seed)
+    campaigns = [(c,) for c in rng.choice(queries.campaign_ids(), size=args.queries)]
+    suppliers = [(s,) for s in rng.choice(queries.supplier_codes(), size=args.queries)]
+
+    orders_rev = orders.assign(revenue=orders["ASP"] * orders["no_of_transactions"])
+    product_cols = products[["SKU_id", "product_id", "category_level_1", "category_level_2"]].drop_duplicates("SKU_id")
+
+    def merge_campaign_sku_revenue(campaign_id):
+        joined = orders_rev[orders_rev["campaign_id"] == campaign_id].merge(product_cols, on="SKU_id", how="left")
+        return joined.groupby("SKU_id").agg(revenue=("revenue", "sum"), orders=("order_id", "nunique"))
+
+    def merge_supplier_late_payments(vendor_code):
+        supplier_pos = pos.loc[pos["supplierVendorCode"] == vendor_code, ["orderNumber"]].drop_duplicates()
+        joined = supplier_pos.merge(invoices, left_on="orderNumber", right_on="poOrderNumber")
+        return joined[joined["late_payment_flag"].astype(bool)]
+
+    results = [
+        ("campaign -> orders -> SKUs", timed(queries.campaign_sku_revenue, campaigns), timed(merge_campaign_sku_revenue, campaigns)),
+        ("supplier -> POs -> late invoices", timed(queries.supplier_late_payments, suppliers), timed(merge_supplier_late_payments, suppliers)),
+    ]
+
+    print(f"\n{'query':<36}{'index ms':>12}{'merge ms':>12}{'speedup':>10}")
+    for name, index_ms, merge_ms in results:
+        print(f"{name:<36}{index_ms:>12.3f}{merge_ms:>12.3f}{merge_ms / index_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
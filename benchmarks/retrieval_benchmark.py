@@ -0,0 +1,67 @@
+"""
+retrieval_benchmark.py
+
+Measures top-k query latency of the in-process FlatIndex at corpus sizes up
+to millions of nodes, using random L2-normalized vectors.
+
+Usage (from the repository root):
+    python -m benchmarks.retrieval_benchmark --rows 1000000 --queries 50
+    python -m benchmarks.retrieval_benchmark --rows 1000000 --quantize
+"""
+import argparse
+import time
+import numpy as np
+
+from rag.embeddings import DEFAULT_DIM
+from rag.vector_index import FlatIndex
+
+TARGET_P95_MS = 20.0
+
+
+def random_unit_vectors(n, dim, rng, chunk=262144):
+    out = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, chunk):
+        block = rng.standard_normal((min(chunk, n - start), dim), dtype=np.float32)
+        out[start:start + len(block)] = block / np.linalg.norm(block, axis=1, keepdims=True)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=32, help="Queries per batched search call")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--quantize", action="store_true")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    index = FlatIndex(args.dim, quantize=args.quantize)
+    index.add(random_unit_vectors(args.rows, args.dim, rng))
+    queries = random_unit_vectors(args.queries, args.dim, rng)
+    print(
+        f"[INFO] {args.rows:,} x {args.dim} {'int8' if args.quantize else 'float32'} "
+        f"({index.vectors.nbytes / 1e6:,.0f} MB) built in {time.perf_counter() - start:.1f}s"
+    )
+
+    index.search(queries[:1], k=args.k)  # warm-up
+    latencies = []
+    for q in queries:
+        t0 = time.perf_counter()
+        index.search(q, k=args.k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    p50, p95 = np.percentile(latencies, [50, 95])
+    status = "OK" if p95 <= TARGET_P95_MS else "WARN"
+    print(f"[{status}] single query: p50 {p50:.1f} ms, p95 {p95:.1f} ms (target p95 <= {TARGET_P95_MS:.0f} ms)")
+
+    t0 = time.perf_counter()
+    for s in range(0, len(queries), args.batch):
+        index.search(queries[s:s + args.batch], k=args.k)
+    elapsed = time.perf_counter() - t0
+    print(f"[INFO] batched ({args.batch}/call): {elapsed * 1000 / len(queries):.2f} ms/query, {len(queries) / elapsed:,.0f} QPS")
+
+
+if __name__ == "__main__":
+    main()
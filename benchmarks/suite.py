@@ -0,0 +1,255 @@
+"""
+suite.py
+
+End-to-end benchmark suite on scale-factor datasets (benchmarks/datagen.py).
+For every scale factor the dataset is generated once under data/bench/sf{N}
+and the scenarios below are timed ``--repeat`` times each:
+
+- aggregate:      load_campaign_rows + summarize_campaigns (pivot + KPIs)
+- validate:       scripts/validate_csv.validate + the procurement integrity
+                  checker (both must pass, otherwise the run fails)
+- risk:           RiskCalculator.score_suppliers over all suppliers
+- graph:          graph_edges + KnowledgeGraph.from_edges
+- fixed_queries:  CrossDomainQueries.from_csv, then per-campaign SKU revenue
+                  and per-supplier late payments (latency p50/p95)
+- retrieval:      corpus + Retriever.build, then single-question retrieval
+                  (latency p50/p95)
+- match:          ThreeWayMatch.run + results (PO / receipt / invoice match)
+
+Each scale factor is recorded as one run ("suite-sf{N}") through
+etl/instrumentation.py: the trace goes to data/processed/perf/ and the run
+summary, tagged with host, scale factor and row counts, is appended to
+data/processed/perf/history.jsonl. Stages that got slower than the median
+of earlier runs of the same scale factor on the same host are reported.
+
+Usage (from the repository root):
+    python -m benchmarks.suite --sf 1 10 --repeat 3
+    python -m benchmarks.suite --sf 100 --scenarios aggregate validate risk
+"""
+import argparse
+import contextlib
+import io
+import os
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from aggregate_campaigns import summarize_campaigns
+from benchmarks.datagen import BENCH_DIR, dataset_dirs, generate
+from etl import instrumentation
+from etl.cross_domain_queries import CrossDomainQueries, ROOT_DIR
+from etl.instrumentation import span
+from etl.marketing.campaign_data import load_campaign_rows
+from etl.procurement.procurement_data_integrity_checker import check_data_integrity
+from etl.procurement.risk_calculator import RiskCalculator
+from etl.procurement.three_way_match import ThreeWayMatch
+from rag.corpus import build_corpus
+from rag.graph import KnowledgeGraph, graph_edges
+from rag.retriever import Retriever
+from scripts.validate_csv import validate
+
+SCENARIOS = ("aggregate", "validate", "risk", "graph", "fixed_queries", "retrieval", "match")
+QUESTIONS = [
+    "Which campaigns had the highest ROAS?",
+    "Adidas running shoes for the Black Friday sale",
+    "suppliers in Germany with low financial health",
+    "critical spare parts for equipment maintenance",
+    "video campaigns on YouTube with high view-through rate",
+    "precious metals raw materials",
+]
+COUNTRY_RISK_LEVELS = {30: "High Risk", 15: "Medium Risk"}
+
+
+def percentiles(samples_ms):
+    if not samples_ms:
+        return {}
+    return {"p50_ms": round(float(np.percentile(samples_ms, 50)), 3),
+            "p95_ms": round(float(np.percentile(samples_ms, 95)), 3)}
+
+
+def country_risk_map(procurement_dir):
+    """
+    Rebuilds the generator's country -> risk level map from the recorded
+    "Country Risk" scores.
+    """
+    suppliers = pd.read_csv(os.path.join(procurement_dir, "suppliers.csv"), usecols=["vendorCode", "country"])
+    risks = pd.read_csv(os.path.join(procurement_dir, "risks.csv"), usecols=["supplierVendorCode", "riskType", "riskScore"])
+    scores = risks[risks["riskType"] == "Country Risk"].set_index("supplierVendorCode")["riskScore"]
+    levels = suppliers.assign(score=suppliers["vendorCode"].map(scores)).dropna().groupby("country")["score"].max()
+    return {c: COUNTRY_RISK_LEVELS.get(int(s), "Low Risk") for c, s in levels.items()}
+
+
+# -----------------------------
+# Scenarios
+# -----------------------------
+def run_aggregate(marketing_dir, procurement_dir, args, stats):
+    df = load_campaign_rows(os.path.join(marketing_dir, "campaigns_v1.csv"))
+    stats["campaigns"] = len(summarize_campaigns(df))
+
+
+def run_validate(marketing_dir, procurement_dir, args, stats):
+    failures = validate(marketing_dir)
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        ok = check_data_integrity(procurement_dir)
+    if not ok:
+        failures += [line for line in out.getvalue().splitlines() if "FAILED" in line]
+    if failures:
+        raise AssertionError("; ".join(failures))
+
+
+def run_risk(marketing_dir, procurement_dir, args, stats):
+    suppliers = pd.read_csv(os.path.join(procurement_dir, "suppliers.csv"))
+    pos = pd.read_csv(os.path.join(procurement_dir, "purchase_orders.csv"),
+                      usecols=["supplierVendorCode", "productSku", "orderTotalValue"])
+    products = pd.read_csv(os.path.join(procurement_dir, "products.csv"), usecols=["sku", "isCritical"])
+    calculator = RiskCalculator(country_risk_map(procurement_dir), pos["orderTotalValue"].sum())
+    with span("risk.score"):
+        stats["suppliers"] = len(calculator.score_suppliers(suppliers, pos, products))
+
+
+def run_graph(marketing_dir, procurement_dir, args, stats):
+    with span("graph.edges"):
+        edges = graph_edges(marketing_dir, procurement_dir)
+    graph = KnowledgeGraph.from_edges(edges)
+    stats["graph_nodes"], stats["graph_edges"] = len(graph), graph.edge_count
+
+
+def run_fixed_queries(marketing_dir, procurement_dir, args, stats):
+    with span("fixed_queries.build"):
+        queries = CrossDomainQueries.from_csv(marketing_dir, procurement_dir)
+    rng = np.random.default_rng(args.seed)
+    campaigns, suppliers = queries.campaign_ids(), queries.supplier_codes()
+    samples = []
+    with span("fixed_queries.query"):
+        for i in range(args.queries):
+            start = time.perf_counter()
+            if i % 2:
+                queries.supplier_late_payments(suppliers[rng.integers(len(suppliers))])
+            else:
+                queries.campaign_sku_revenue(campaigns[rng.integers(len(campaigns))])
+            samples.append((time.perf_counter() - start) * 1000)
+    stats.setdefault("fixed_queries_ms", []).extend(samples)
+
+
+def run_retrieval(marketing_dir, procurement_dir, args, stats):
+    with span("retrieval.build"):
+        docs = build_corpus(marketing_dir, procurement_dir)
+        retriever = Retriever.build(docs)
+    stats["documents"] = len(docs)
+    samples = []
+    with span("retrieval.query"):
+        for i in range(args.queries):
+            start = time.perf_counter()
+            retriever.retrieve(QUESTIONS[i % len(QUESTIONS)], k=args.k)
+            samples.append((time.perf_counter() - start) * 1000)
+    stats.setdefault("retrieval_ms", []).extend(samples)
+
+
+def run_match(marketing_dir, procurement_dir, args, stats):
+    matcher = ThreeWayMatch.run(procurement_dir)
+    matches, duplicates = matcher.results()
+    stats["matched_pos"], stats["duplicate_invoices"] = len(matches), len(duplicates)
+
+
+RUNNERS = {name: globals()[f"run_{name}"] for name in SCENARIOS}
+
+
+# -----------------------------
+# Suite
+# -----------------------------
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_sf(sf, args):
+    """
+    Runs the selected scenarios on one scale factor and records them as one
+    instrumented run. Returns (run record, failures).
+    """
+    marketing_dir, procurement_dir = dataset_dirs(sf, args.out)
+    tracer = instrumentation.enable(run=f"suite-sf{sf}", export_at_exit=False)
+    rows = None
+    if args.regenerate or not os.path.exists(os.path.join(procurement_dir, "risks.csv")):
+        with span("datagen"):
+            rows = generate(sf, args.out, args.seed)
+    if rows is None:
+        rows = {name: sum(1 for _ in open(os.path.join(d, name), "rb")) - 1
+                for d in (marketing_dir, procurement_dir) for name in os.listdir(d) if name.endswith(".csv")}
+
+    stats, failures = {}, []
+    for name in args.scenarios:
+        for _ in range(args.repeat):
+            try:
+                with span(name):
+                    RUNNERS[name](marketing_dir, procurement_dir, args, stats)
+            except Exception as e:
+                failures.append(f"SF{sf} {name}: {type(e).__name__}: {e}")
+                break
+
+    tracer.meta.update({
+        "sf": sf, "host": platform.node(), "python": platform.python_version(), "commit": git_commit(),
+        "repeat": args.repeat, "queries": args.queries, "scenarios": list(args.scenarios), "rows": rows,
+        "latency": {k[:-3]: percentiles(v) for k, v in stats.items() if k.endswith("_ms")},
+        "sizes": {k: v for k, v in stats.items() if not k.endswith("_ms")},
+    })
+    instrumentation.export()
+    instrumentation.disable()
+    return tracer.trace(), failures
+
+
+def comparable(record, meta):
+    """
+    True for history records of the same scale factor, host and settings.
+    """
+    other = record.get("meta") or {}
+    return all(other.get(k) == meta[k] for k in ("sf", "host", "repeat", "queries", "scenarios"))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sf", type=int, nargs="+", default=[1, 10], help="Scale factors, e.g. --sf 1 10 100")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=200, help="Queries per fixed-query / retrieval repeat")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=BENCH_DIR, help="Dataset root")
+    parser.add_argument("--regenerate", action="store_true", help="Rebuild datasets that already exist")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Regression threshold vs. earlier runs")
+    args = parser.parse_args()
+
+    all_failures = []
+    for sf in args.sf:
+        record, failures = run_sf(sf, args)
+        all_failures += failures
+        meta = record["meta"]
+        print(f"[INFO] SF{sf}: {sum(meta['rows'].values()):,} rows, wall {record['wall_ms'] / 1000:.1f}s, "
+              f"peak {record['peak_rss_mb']:.0f} MB")
+        for name in args.scenarios:
+            st = record["summary"].get(name)
+            if st:
+                print(f"       {name:<14} mean {st['mean_ms']:>10.1f} ms   max {st['max_ms']:>10.1f} ms   "
+                      f"peak {st['peak_rss_mb']:.0f} MB")
+        for name, pct in meta["latency"].items():
+            print(f"       {name + ' query':<20} p50 {pct['p50_ms']:.3f} ms   p95 {pct['p95_ms']:.3f} ms")
+
+        history = [r for r in instrumentation.load_history(run=record["run"]) if comparable(r, meta)]
+        for stage, last_ms, base_ms, ratio in instrumentation.regressions(history, args.threshold):
+            print(f"[WARN] SF{sf} {stage}: {last_ms:.1f} ms vs. median {base_ms:.1f} ms of earlier runs ({ratio}x)")
+
+    for failure in all_failures:
+        print(f"[WARN] {failure}")
+    if all_failures:
+        sys.exit(1)
+    print(f"[OK] suite finished; runs appended to {instrumentation.HISTORY_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,36 @@
 import json
 import ollama
-from faker import Faker
 import random
+import numpy as np
 import pandas as pd
 from math import floor
 import os
 import uuid
-import re
+from collections import Counter
 from datetime import datetime, timedelta
 from etl.procurement.risk_calculator import RiskCalculator
+from etl.procurement.append_store import AppendStore
+from etl.procurement.partitioned_store import (
+    append_partitions, layout_is_current, supplier_regions, write_partitions
+)
+from etl.procurement.spend_analytics import refresh_rollup
+from etl.procurement.regions import americas, asia_oceania, domestic, europe, mena_africa, region_map
+from etl.instrumentation import count, traced
+from etl.taxonomy import load_taxonomy
+from etl.procurement.faker_pool import (
+    get_pool, is_available_locale, load_locale_cache, locale_cache_key, save_locale_cache
+)
 
 OLLAMA_MODEL = 'granite4:micro'
 NUM_PRODUCTS = 100
 NUM_PURCHASES = 400
 NUM_SUPPLIERS = 200
 APPEND_MODE = True
+PARTITIONED_LAYOUT = True  # also keep POs / invoices in the month (+ region) partitioned layout
+SPEND_ROLLUP = True  # refresh the materialized category / supplier / month spend rollup
 OVER_REP_PERCENT = 50
 UNDER_REP_PERCENT = 15
+FAKER_SEED = 42  # per-locale Faker instances are seeded from this (None: unseeded)
 
 
 # --- Comprehensive country -> Faker locale mapping ---
@@ -47,31 +61,7 @@ country_locales = {
     'South Africa': 'en_ZA', 'Nigeria': 'en_NG', 'Kenya': 'en_KE', 'Ghana': 'en_GH'
 }
 
-# --- Region groups to build sampled countries with adjustable weights ---
-domestic = ['Germany']
-
-europe = [
-    'France','Italy','United Kingdom','Spain','Netherlands','Belgium','Austria',
-    'Switzerland','Portugal','Ireland','Denmark','Norway','Sweden','Finland','Poland',
-    'Czech Republic','Slovakia','Hungary','Romania','Bulgaria','Croatia','Slovenia',
-    'Estonia','Latvia','Lithuania','Greece','Luxembourg'
-]
-
-americas = [
-    'United States','Canada','Mexico','Brazil','Argentina','Chile','Colombia','Peru',
-    'Venezuela','Uruguay'
-]
-
-asia_oceania = [
-    'China','Japan','South Korea','India','Indonesia','Malaysia','Singapore','Thailand',
-    'Vietnam','Philippines','Pakistan','Bangladesh','Sri Lanka','Australia','New Zealand'
-]
-
-mena_africa = [
-    'Turkey','Israel','United Arab Emirates','Saudi Arabia','Egypt','Morocco','Algeria',
-    'Tunisia','South Africa','Nigeria','Kenya','Ghana'
-]
-
+# --- Sampling weights of the region groups (etl/procurement/regions.py) ---
 region_shares = {
     'domestic': 0.50,
     'europe': 0.30,
@@ -80,14 +70,6 @@ region_shares = {
     'mena_africa': 0.01
 }
 
-region_map = {
-    'domestic': domestic,
-    'europe': europe,
-    'americas': americas,
-    'asia_oceania': asia_oceania,
-    'mena_africa': mena_africa
-}
-
 # --- explicit overrides for known-problem locales ---
 explicit_overrides = {
     # country : preferred-fallback-locale
@@ -102,19 +84,21 @@ explicit_overrides = {
 
 def sanitize_country_locales(mapping, default_locale='en_US'):
     """
-    Sanitize mapping by trying to instantiate Faker for each locale.
-    Returns cleaned mapping and a report.
+    Sanitize mapping by checking each candidate locale against the locales
+    Faker ships. Returns cleaned mapping and a report. The result is cached
+    on disk per Faker version and input, so later runs skip the probing.
     """
+    cache_key = locale_cache_key(mapping, explicit_overrides, default_locale)
+    cached = load_locale_cache(cache_key)
+    if cached:
+        print(f"Locale mapping loaded from cache ({len(cached[0])} countries).")
+        return cached
+
     cleaned = {}
     report = {'unchanged': [], 'changed': [], 'forced_default': []}
 
-    # helper to try a candidate locale
-    def try_locale(candidate):
-        try:
-            Faker(candidate)
-            return True
-        except Exception:
-            return False
+    # helper to try a candidate locale (no Faker instance needed)
+    try_locale = is_available_locale
 
     for country, orig_loc in mapping.items():
         chosen = None
@@ -201,47 +185,24 @@ def sanitize_country_locales(mapping, default_locale='en_US'):
     if report['forced_default']:
         print(f"  forced default for {len(report['forced_default'])} countries: {report['forced_default']}")
 
+    save_locale_cache(cache_key, cleaned, report)
     return cleaned, report
 
+@traced("load.categories")
 def parse_categories(markdown_file):
     """
-    Parses the category taxonomy from the markdown file.
+    Returns the L4 categories of the taxonomy in the markdown file, with
+    their L1-L3 parents (compiled once per file version, see etl/taxonomy.py).
     """
-    with open(markdown_file, 'r') as f:
-        content = f.read()
-
-    categories = []
-    current_l1 = None
-    current_l2 = None
-    current_l3 = None
-
-    for line in content.split('\n'):
-        l1_match = re.match(r'### L1: (.*)', line)
-        l2_match = re.match(r'-   \*\*L2: (.*)\*\*', line)
-        l3_match = re.match(r'    -   \*\*L3: (.*)\*\*', line)
-        l4_match = re.match(r'        -   L4: (.*)', line)
-
-        if l1_match:
-            current_l1 = l1_match.group(1).strip()
-        elif l2_match:
-            current_l2 = l2_match.group(1).strip()
-        elif l3_match:
-            current_l3 = l3_match.group(1).strip()
-        elif l4_match:
-            l4_category = l4_match.group(1).strip()
-            categories.append({
-                'L1CategoryName': current_l1,
-                'L2CategoryName': current_l2,
-                'L3CategoryName': current_l3,
-                'L4CategoryName': l4_category,
-            })
-
-    return categories
+    tree = load_taxonomy(markdown_file)
+    keys = ['L1CategoryName', 'L2CategoryName', 'L3CategoryName', 'L4CategoryName']
+    return [dict(zip(keys, tree.category_path(i))) for i in np.flatnonzero(tree.depth == 4)]
 
 def generate_with_ollama(prompt):
     """
     Sends a prompt to the Ollama API and gets a response.
     """
+    count("llm.calls")
     try:
         response = ollama.generate(model=OLLAMA_MODEL, prompt=prompt, stream=False)
         response_str = response.get('response', '')
@@ -256,9 +217,11 @@ def generate_with_ollama(prompt):
             return None
 
     except Exception as e:
+        count("llm.errors")
         print(f"Error interacting with Ollama: {e}")
         return None
 
+@traced("generate.suppliers")
 def generate_suppliers_with_ollama(num_suppliers):
     """
     Generates a list of synthetic suppliers using Ollama for realistic data.
@@ -285,13 +248,13 @@ def generate_suppliers_with_ollama(num_suppliers):
 
     # ---------- Build country_list using region country lists ----------
     country_list = []
-    for region_key, count in region_counts.items():
-        if count <= 0:
+    for region_key, n in region_counts.items():
+        if n <= 0:
             continue
         choices_from = region_map.get(region_key)
         if not choices_from:
             raise KeyError(f"Unknown region key in region_map: {region_key}")
-        country_list += random.choices(choices_from, k=count)
+        country_list += random.choices(choices_from, k=n)
 
     # Last sanity: ensure length matches
     if len(country_list) != num_suppliers:
@@ -303,15 +266,16 @@ def generate_suppliers_with_ollama(num_suppliers):
 
     random.shuffle(country_list)
 
+    # Pre-generate all addresses in bulk, one pooled Faker per locale
+    pool = get_pool(FAKER_SEED)
+    locales = [country_locales.get(country, 'en_US') for country in country_list]
+    addresses = {loc: iter(pool.addresses(loc, n)) for loc, n in Counter(locales).items()}
+
     suppliers = []
 
     for i in range(num_suppliers):
         country = country_list[i]
-        locale = country_locales.get(country, 'en_US')
-        fake = Faker(locale)
-        raw_address = fake.address()
-        # normalize multi-line addresses to a single-line string
-        address = " ".join(line.strip() for line in raw_address.splitlines() if line.strip())
+        address = next(addresses[locales[i]])  # already a single-line string
         print(f"Generating supplier {i+1}/{num_suppliers} for country: {country}...")
 
         prompt = f"Generate a realistic and unique supplier name and a contact person's full name for a company located at this address in {country}: {address}. Output the result in JSON format with keys: 'name', 'contact_person'."
@@ -336,6 +300,7 @@ def generate_suppliers_with_ollama(num_suppliers):
 
     return suppliers
 
+@traced("generate.products")
 def generate_products_with_ollama(categories, num_products=50):
     """
     Generates a list of synthetic products using Ollama, with specified category distribution.
@@ -383,11 +348,13 @@ def generate_products_with_ollama(categories, num_products=50):
             
     return products
 
+@traced("generate.purchase_orders")
 def generate_purchase_orders(suppliers, products, num_pos=400):
     """
     Generates a list of synthetic purchase orders with multiple line items and cost centers.
     """
-    fake = Faker()
+    pool = get_pool(FAKER_SEED)
+    fake = pool.get()
     purchase_orders = []
     
     direct_products = [p for p in products if p['category_L1'] == 'Direct Materials']
@@ -431,7 +398,7 @@ def generate_purchase_orders(suppliers, products, num_pos=400):
                 'dateChanged': order_date + timedelta(days=random.randint(1, 30)),
                 'orderStatus': status,
                 'orderTotalValue': quantity * unit_price,
-                'approvedBy': fake.name(),
+                'approvedBy': pool.name(),
                 'supplierVendorCode': supplier['vendorCode'],
                 'productSku': product['sku'],
                 'quantity': quantity,
@@ -443,16 +410,17 @@ def generate_purchase_orders(suppliers, products, num_pos=400):
                 'still_to_be_invoiced_value': still_to_be_invoiced_qty * unit_price,
                 'contractReference': f"CTR-{str(uuid.uuid4().hex)[:10]}" if random.random() < 0.3 else None,
                 'paymentTerms': random.choice(['Net 30', 'Net 60', 'Net 90']),
-                'requisitioner': fake.name(),
+                'requisitioner': pool.name(),
                 'costCenter': cost_center,
             })
     return purchase_orders
 
+@traced("generate.invoices")
 def generate_invoices(purchase_orders):
     """
     Generates a list of synthetic invoices with realistic status and amount logic.
     """
-    fake = Faker()
+    fake = get_pool(FAKER_SEED).get()
     invoices = []
     po_groups = pd.DataFrame(purchase_orders).groupby('orderNumber')
 
@@ -509,7 +477,7 @@ def generate_single_po_item(po_number, supplier, order_date, cost_center, produc
     """
     Generates a single purchase order item.
     """
-    fake = Faker()
+    pool = get_pool(FAKER_SEED)
     quantity = random.randint(1, 100)
     unit_price = round(random.uniform(10, 1000), 2)
     delivery_date = order_date + timedelta(days=random.randint(7, 60))
@@ -532,7 +500,7 @@ def generate_single_po_item(po_number, supplier, order_date, cost_center, produc
         'dateChanged': order_date + timedelta(days=random.randint(1, 30)),
         'orderStatus': status,
         'orderTotalValue': quantity * unit_price,
-        'approvedBy': fake.name(),
+        'approvedBy': pool.name(),
         'supplierVendorCode': supplier['vendorCode'],
         'productSku': product['sku'],
         'quantity': quantity,
@@ -544,10 +512,11 @@ def generate_single_po_item(po_number, supplier, order_date, cost_center, produc
         'still_to_be_invoiced_value': still_to_be_invoiced_qty * unit_price,
         'contractReference': f"CTR-{str(uuid.uuid4().hex)[:10]}" if random.random() < 0.3 else None,
         'paymentTerms': random.choice(['Net 30', 'Net 60', 'Net 90']),
-        'requisitioner': fake.name(),
+        'requisitioner': pool.name(),
         'costCenter': cost_center,
     }
 
+@traced("aggregate.balance_spend")
 def balance_spend_distribution(purchase_orders, products, suppliers, max_iterations=10):
     """
     Balances the spend distribution across main categories by adding or removing purchase orders.
@@ -585,8 +554,7 @@ def balance_spend_distribution(purchase_orders, products, suppliers, max_iterati
             while added_spend < spend_needed:
                 product = products_in_cat.sample(1).iloc[0]
                 supplier = random.choice(suppliers)
-                fake = Faker()
-                order_date = fake.date_time_between(start_date='-2y', end_date='now')
+                order_date = get_pool(FAKER_SEED).get().date_time_between(start_date='-2y', end_date='now')
                 po_number = f"PO-ADJ-{str(uuid.uuid4().hex)[:8]}"
                 cost_center = f"CC-{random.randint(100, 180)}"
                 
@@ -630,32 +598,16 @@ if __name__ == '__main__':
     invoice_data = []
     risks_data = []
 
+    store = None
     if APPEND_MODE:
-        print("\n--- APPEND MODE ON: Loading existing data ---\n")
-        try:
-            suppliers_data = pd.read_csv(os.path.join(script_dir, 'suppliers.csv')).to_dict('records')
-            print(f"Loaded {len(suppliers_data)} existing suppliers.")
-        except FileNotFoundError:
-            print("No existing suppliers.csv found.")
-            pass
-        try:
-            products_data = pd.read_csv(os.path.join(script_dir, 'products.csv')).to_dict('records')
-            print(f"Loaded {len(products_data)} existing products.")
-        except FileNotFoundError:
-            print("No existing products.csv found.")
-            pass
-        try:
-            po_data = pd.read_csv(os.path.join(script_dir, 'purchase_orders.csv')).to_dict('records')
-            print(f"Loaded {len(po_data)} existing purchase orders.")
-        except FileNotFoundError:
-            print("No existing purchase_orders.csv found.")
-            pass
-        try:
-            invoice_data = pd.read_csv(os.path.join(script_dir, 'invoices.csv')).to_dict('records')
-            print(f"Loaded {len(invoice_data)} existing invoices.")
-        except FileNotFoundError:
-            print("No existing invoices.csv found.")
-            pass
+        # Only the dimension tables are loaded; POs and invoices are appended
+        # through the key index without reading them back.
+        print("\n--- APPEND MODE ON: Loading existing suppliers and products ---\n")
+        store = AppendStore(script_dir)
+        suppliers_data = store.read('suppliers.csv').to_dict('records')
+        print(f"Loaded {len(suppliers_data)} existing suppliers.")
+        products_data = store.read('products.csv').to_dict('records')
+        print(f"Loaded {len(products_data)} existing products.")
 
     # 1. Parse Categories
     categories = parse_categories(ontology_path)
@@ -673,13 +625,13 @@ if __name__ == '__main__':
     # 4. Generate Purchase Orders
     print("\n--- Generating Purchase Orders ---")
     new_po_data = generate_purchase_orders(suppliers_data, products_data, NUM_PURCHASES)
-    po_data.extend(new_po_data)
 
-    # 5. Balance Spend Distribution
+    # 5. Balance Spend Distribution (of the new batch in append mode)
     print("\n--- Balancing Spend Distribution ---")
-    po_data = balance_spend_distribution(po_data, products_data, suppliers_data)
+    new_po_data = balance_spend_distribution(new_po_data, products_data, suppliers_data)
+    po_data.extend(new_po_data)
 
-    # 6. Generate Invoices
+    # 6. Generate Invoices (for the balanced POs, so removed POs get none)
     print("\n--- Generating Invoices ---")
     new_invoice_data = generate_invoices(new_po_data)
     invoice_data.extend(new_invoice_data)
@@ -718,69 +670,110 @@ if __name__ == '__main__':
         if country not in country_risk_map:
             country_risk_map[country] = 'Medium Risk'
 
-    risk_calculator = RiskCalculator(country_risk_map, company_total_spend=sum(po['orderTotalValue'] for po in po_data))
-
-    # Calculate total spend per critical item
-    po_df = pd.DataFrame(po_data)
-    products_df = pd.DataFrame(products_data)
-    suppliers_df = pd.DataFrame(suppliers_data)
-
-    critical_products = products_df[products_df['isCritical']]
-    merged_df = pd.merge(po_df, critical_products, left_on='productSku', right_on='sku')
-    total_item_spend = merged_df.groupby('productSku')['orderTotalValue'].sum().to_dict()
-
-    for i, supplier in suppliers_df.iterrows():
-        supplier_pos = po_df[po_df['supplierVendorCode'] == supplier['vendorCode']]
-        supplier_critical_items = pd.merge(supplier_pos, critical_products, left_on='productSku', right_on='sku')
+    if store is not None:
+        # A layout that no longer matches its CSV (git pull, a run without the
+        # layout) would only get the new batch; it is rebuilt instead
+        current_layouts = {table: layout_is_current(script_dir, table) for table in ('purchase_orders', 'invoices')}
+        # Keys are checked against the index (collisions reject the batch),
+        # rows are appended, and the risks are rescored from running spend
+        # aggregates instead of a scan of all POs.
+        appended = store.append({
+            'suppliers.csv': new_suppliers_data,
+            'products.csv': new_products_data,
+            'purchase_orders.csv': new_po_data,
+            'invoices.csv': new_invoice_data,
+        })
+        for name, n in appended.items():
+            print(f"Successfully appended {n} rows to {name}.")
+        risks_df = store.refresh_risks(country_risk_map)
+        print(f"Successfully recalculated and saved {len(risks_df)} risks.")
+        if PARTITIONED_LAYOUT:
+            # Only the partitions the new batch falls into get a new part file;
+            # a missing or stale layout is built from the (already appended) CSVs
+            regions = supplier_regions(pd.DataFrame(suppliers_data))
+            for table, rows in (('purchase_orders', new_po_data), ('invoices', new_invoice_data)):
+                if not current_layouts[table]:
+                    df = pd.read_csv(os.path.join(script_dir, f'{table}.csv'))
+                    print(f"Wrote {len(write_partitions(script_dir, table, df, regions))} {table} partitions.")
+                elif rows:
+                    touched = append_partitions(script_dir, table, pd.DataFrame(rows), regions)
+                    print(f"Appended {len(rows)} rows to {len(touched)} {table} partitions.")
+    else:
+        risk_calculator = RiskCalculator(country_risk_map, company_total_spend=sum(po['orderTotalValue'] for po in po_data))
+
+        # Calculate total spend per critical item
+        po_df = pd.DataFrame(po_data)
+        products_df = pd.DataFrame(products_data)
+        suppliers_df = pd.DataFrame(suppliers_data)
+
+        critical_products = products_df[products_df['isCritical']]
+        merged_df = pd.merge(po_df, critical_products, left_on='productSku', right_on='sku')
+        total_item_spend = merged_df.groupby('productSku')['orderTotalValue'].sum().to_dict()
+
+        for i, supplier in suppliers_df.iterrows():
+            supplier_pos = po_df[po_df['supplierVendorCode'] == supplier['vendorCode']]
+            supplier_critical_items = pd.merge(supplier_pos, critical_products, left_on='productSku', right_on='sku')
         
-        critical_items_for_risk_calc = []
-        if not supplier_critical_items.empty:
-            for sku, group in supplier_critical_items.groupby('productSku'):
-                supplier_spend_for_item = group['orderTotalValue'].sum()
-                total_spend_for_item = total_item_spend.get(sku, 0)
-                critical_items_for_risk_calc.append({
-                    'supplier_spend': supplier_spend_for_item,
-                    'total_item_spend': total_spend_for_item
-                })
-
-        supplier_risk_data = {
-            'country': supplier['country'],
-            'financial_health_status': supplier['financialHealth'],
-            'total_spend': supplier_pos['orderTotalValue'].sum(),
-            'critical_items': critical_items_for_risk_calc
-        }
-        risk_scores = risk_calculator.calculate_supplier_risk(supplier_risk_data)
-        suppliers_df.at[i, 'riskScore'] = risk_scores['total_risk']
+            critical_items_for_risk_calc = []
+            if not supplier_critical_items.empty:
+                for sku, group in supplier_critical_items.groupby('productSku'):
+                    supplier_spend_for_item = group['orderTotalValue'].sum()
+                    total_spend_for_item = total_item_spend.get(sku, 0)
+                    critical_items_for_risk_calc.append({
+                        'supplier_spend': supplier_spend_for_item,
+                        'total_item_spend': total_spend_for_item
+                    })
+
+            supplier_risk_data = {
+                'country': supplier['country'],
+                'financial_health_status': supplier['financialHealth'],
+                'total_spend': supplier_pos['orderTotalValue'].sum(),
+                'critical_items': critical_items_for_risk_calc
+            }
+            risk_scores = risk_calculator.calculate_supplier_risk(supplier_risk_data)
+            suppliers_df.at[i, 'riskScore'] = risk_scores['total_risk']
         
-        for risk_type, risk_value in risk_scores.items():
-            if risk_type != 'total_risk':
-                risks_data.append({
-                    'riskId': f"RISK-{str(uuid.uuid4().hex)[:8]}",
-                    'supplierVendorCode': supplier['vendorCode'],
-                    'riskType': risk_type.replace('_', ' ').title(),
-                    'riskScore': risk_value,
-                    'riskDescription': f'{risk_type.replace("_", " ").title()} for supplier {supplier['vendorCode']} is {risk_value}.',
-                    'mitigationPlan': 'N/A',
-                    'riskStatus': 'Active'
-                })
-
-    # 8. Save DataFrames
-    if not suppliers_df.empty:
-        suppliers_df.to_csv(os.path.join(script_dir, 'suppliers.csv'), index=False)
-        print(f"Successfully generated and saved {len(suppliers_df)} suppliers.")
-    if not products_df.empty:
-        products_df.to_csv(os.path.join(script_dir, 'products.csv'), index=False)
-        print(f"Successfully generated and saved {len(products_df)} products.")
-    if not po_df.empty:
-        po_df.to_csv(os.path.join(script_dir, 'purchase_orders.csv'), index=False)
-        print(f"Successfully generated and saved {len(po_df)} purchase orders.")
-    if invoice_data:
-        invoice_df = pd.DataFrame(invoice_data)
-        invoice_df.to_csv(os.path.join(script_dir, 'invoices.csv'), index=False)
-        print(f"Successfully generated and saved {len(invoice_data)} invoices.")
-    if risks_data:
-        risks_df = pd.DataFrame(risks_data)
-        risks_df.to_csv(os.path.join(script_dir, 'risks.csv'), index=False)
-        print(f"Successfully generated and saved {len(risks_df)} risks.")
+            for risk_type, risk_value in risk_scores.items():
+                if risk_type != 'total_risk':
+                    risks_data.append({
+                        'riskId': f"RISK-{str(uuid.uuid4().hex)[:8]}",
+                        'supplierVendorCode': supplier['vendorCode'],
+                        'riskType': risk_type.replace('_', ' ').title(),
+                        'riskScore': risk_value,
+                        'riskDescription': f'{risk_type.replace("_", " ").title()} for supplier {supplier['vendorCode']} is {risk_value}.',
+                        'mitigationPlan': 'N/A',
+                        'riskStatus': 'Active'
+                    })
+
+        # 8. Save DataFrames
+        if not suppliers_df.empty:
+            suppliers_df.to_csv(os.path.join(script_dir, 'suppliers.csv'), index=False)
+            print(f"Successfully generated and saved {len(suppliers_df)} suppliers.")
+        if not products_df.empty:
+            products_df.to_csv(os.path.join(script_dir, 'products.csv'), index=False)
+            print(f"Successfully generated and saved {len(products_df)} products.")
+        if not po_df.empty:
+            po_df.to_csv(os.path.join(script_dir, 'purchase_orders.csv'), index=False)
+            print(f"Successfully generated and saved {len(po_df)} purchase orders.")
+        if invoice_data:
+            invoice_df = pd.DataFrame(invoice_data)
+            invoice_df.to_csv(os.path.join(script_dir, 'invoices.csv'), index=False)
+            print(f"Successfully generated and saved {len(invoice_data)} invoices.")
+        if risks_data:
+            risks_df = pd.DataFrame(risks_data)
+            risks_df.to_csv(os.path.join(script_dir, 'risks.csv'), index=False)
+            print(f"Successfully generated and saved {len(risks_df)} risks.")
+        if PARTITIONED_LAYOUT and not po_df.empty:
+            regions = supplier_regions(suppliers_df)
+            touched = write_partitions(script_dir, 'purchase_orders', po_df, regions)
+            print(f"Wrote {len(touched)} purchase_orders partitions.")
+            if invoice_data:
+                touched = write_partitions(script_dir, 'invoices', invoice_df, regions)
+                print(f"Wrote {len(touched)} invoices partitions.")
+
+    if SPEND_ROLLUP:
+        # Appends only fold in the new POs; a fresh dataset rebuilds the rollup
+        rollup, added = refresh_rollup(script_dir, rebuild=not APPEND_MODE)
+        print(f"Folded {added} PO lines into the spend rollup ({len(rollup)} cells).")
 
 print("\nData generation complete.")
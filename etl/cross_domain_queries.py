@@ -0,0 +1,126 @@
+import os
+import pandas as pd
+
+from etl.instrumentation import traced
+from etl.join_index import JoinIndex
+from etl.procurement.partitioned_store import read_procurement
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARKETING_DIR = os.path.join(ROOT_DIR, "data", "processed", "marketing")
+PROCUREMENT_DIR = os.path.join(ROOT_DIR, "data", "raw")
+
+
+def read_table(path, date_cols=()):
+    """
+    Reads a CSV with stripped column names (the marketing exports carry a BOM
+    and padded headers) and parses the given date columns.
+    """
+    df = pd.read_csv(path, encoding="utf-8-sig")
+    df.columns = df.columns.str.strip()
+    for col in date_cols:
+        df[col] = pd.to_datetime(df[col], errors="coerce")
+    return df
+
+
+class CrossDomainQueries:
+    def __init__(self, orders, products, purchase_orders, invoices):
+        """
+        Holds the join indexes for the cross-domain fixed queries. All indexes
+        are built once here, so the queries below only slice precomputed row
+        ranges and never call ``merge`` at query time.
+
+        Marketing:   campaign_id -> orders (by Order_date), SKU_id -> product,
+                     campaign_id -> per-SKU revenue rollup (by revenue, desc)
+        Procurement: supplierVendorCode -> PO lines (by dateIssued),
+                     orderNumber -> invoices (by dateCreated)
+        """
+        orders = orders.copy()
+        orders["revenue"] = orders["ASP"] * orders["no_of_transactions"]
+
+        self.orders_by_campaign = JoinIndex(orders, "campaign_id", sort_by="Order_date")
+        self.product_by_sku = JoinIndex(products, "SKU_id")
+        self.sku_revenue_by_campaign = JoinIndex(
+            self._sku_revenue(orders).assign(_rank=lambda d: -d["revenue"]), "campaign_id", sort_by="_rank"
+        )
+        self.pos_by_supplier = JoinIndex(purchase_orders, "supplierVendorCode", sort_by="dateIssued")
+        self.invoices_by_po = JoinIndex(invoices, "poOrderNumber", sort_by="dateCreated")
+
+    @classmethod
+    @traced("load.cross_domain")
+    def from_csv(cls, marketing_dir=MARKETING_DIR, procurement_dir=PROCUREMENT_DIR, date_from=None, date_to=None):
+        """
+        Loads the tables; the procurement ones come from the partitioned layout
+        when present. With date bounds only POs issued in [date_from, date_to]
+        and invoices created from date_from on are loaded (an invoice is never
+        created before its PO), so only those partitions are read.
+        """
+        return cls(
+            orders=read_table(os.path.join(marketing_dir, "orders_v1.csv"), ["Order_date"]),
+            products=read_table(os.path.join(marketing_dir, "products_v1.csv")),
+            purchase_orders=read_procurement(procurement_dir, "purchase_orders", date_from=date_from,
+                                             date_to=date_to, date_cols=["dateIssued"]),
+            invoices=read_procurement(procurement_dir, "invoices", date_from=date_from, date_cols=["dateCreated"]),
+        )
+
+    # -----------------------------
+    # Marketing: campaign -> orders -> SKUs
+    # -----------------------------
+    def campaign_ids(self):
+        return [k for k in self.orders_by_campaign.keys.tolist() if k]
+
+    def campaign_orders(self, campaign_id, date_from=None, date_to=None):
+        """
+        Returns the orders of a campaign sorted by Order_date, optionally
+        restricted to [date_from, date_to].
+        """
+        return self.orders_by_campaign.lookup(campaign_id, lower=date_from, upper=date_to)
+
+    def campaign_sku_revenue(self, campaign_id, date_from=None, date_to=None):
+        """
+        Returns revenue, transactions and order count per SKU for one campaign,
+        enriched with product attributes from the SKU index. Without date bounds
+        this is a slice of the rollup precomputed at load time.
+        """
+        if date_from is None and date_to is None:
+            return self.sku_revenue_by_campaign.lookup(campaign_id).drop(columns="_rank").reset_index(drop=True)
+        per_sku = self._sku_revenue(self.campaign_orders(campaign_id, date_from, date_to))
+        return per_sku.sort_values("revenue", ascending=False, ignore_index=True)
+
+    def _sku_revenue(self, orders):
+        per_sku = (
+            orders.groupby(["campaign_id", "SKU_id"], sort=False)
+            .agg(
+                sku_name=("sku_name", "first"),
+                orders=("order_id", "nunique"),
+                transactions=("no_of_transactions", "sum"),
+                revenue=("revenue", "sum"),
+            )
+            .reset_index()
+        )
+        products = self.product_by_sku.lookup_many(per_sku["SKU_id"].unique())
+        products = products.drop_duplicates("SKU_id").set_index("SKU_id")
+        for col in ["product_id", "category_level_1", "category_level_2"]:
+            if col in products.columns:
+                per_sku[col] = per_sku["SKU_id"].map(products[col])
+        return per_sku
+
+    # -----------------------------
+    # Procurement: supplier -> POs -> invoices
+    # -----------------------------
+    def supplier_codes(self):
+        return [k for k in self.pos_by_supplier.keys.tolist() if k]
+
+    def supplier_pos(self, vendor_code, date_from=None, date_to=None):
+        return self.pos_by_supplier.lookup(vendor_code, lower=date_from, upper=date_to)
+
+    def supplier_invoices(self, vendor_code, date_from=None, date_to=None):
+        """
+        Returns all invoices booked against the supplier's POs (POs filtered by
+        dateIssued when bounds are given).
+        """
+        po_numbers = self.supplier_pos(vendor_code, date_from, date_to)["orderNumber"].unique()
+        return self.invoices_by_po.lookup_many(po_numbers)
+
+    def supplier_late_payments(self, vendor_code, date_from=None, date_to=None):
+        invoices = self.supplier_invoices(vendor_code, date_from, date_to)
+        return invoices[invoices["late_payment_flag"].astype(bool)]
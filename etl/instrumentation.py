@@ -0,0 +1,407 @@
+"""
+instrumentation.py
+
+Spans, counters and peak-memory sampling for the ETL scripts, validators
+and the app.
+
+    from etl.instrumentation import span, traced, count
+
+    with span("load", path=path):
+        df = pd.read_csv(path)
+
+    @traced("score")
+    def evaluate(...): ...
+
+    count("rows", len(df))
+
+Instrumentation is off by default. span() then returns a shared no-op
+context manager and count() / traced functions return after a single
+check, so instrumented hot paths cost well under a microsecond.
+
+Enable it with the PERF_TRACE environment variable:
+    PERF_TRACE=1            trace to data/processed/perf/<run>-<timestamp>.json
+    PERF_TRACE=<path.json>  trace to <path.json>
+or call enable() in code. When enabled, a background thread samples the
+process RSS every PERF_SAMPLE_MS (default 50) ms, and every span records its
+duration, nesting and the peak RSS seen while it was open.
+
+At exit (or on export()) the run is written as one JSON file. The file is
+valid Chrome trace format ("traceEvents"; open it in chrome://tracing or
+ui.perfetto.dev) and also carries a per-stage "summary", the counters and
+the memory samples. A one-line summary of each run is appended to
+data/processed/perf/history.jsonl, which the app's Performance page uses to
+flag stages that got slower than in earlier runs.
+
+Usage (from the repository root):
+    PERF_TRACE=1 python aggregate_campaigns.py
+    python -m etl.instrumentation                 # print the last runs
+"""
+import argparse
+import atexit
+import bisect
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PERF_DIR = os.path.join(ROOT_DIR, "data", "processed", "perf")
+HISTORY_PATH = os.path.join(PERF_DIR, "history.jsonl")
+TRACE_ENV = "PERF_TRACE"
+SAMPLE_ENV = "PERF_SAMPLE_MS"
+DEFAULT_SAMPLE_MS = 50
+MAX_EVENTS = 200_000  # spans / samples kept per run (long app sessions)
+
+_PAGE_MB = os.sysconf("SC_PAGE_SIZE") / 2**20 if hasattr(os, "sysconf") else 0.0
+_statm = {"pid": None, "fd": None}
+
+
+def rss_mb():
+    """
+    Current resident set size in MB (peak RSS where /proc is unavailable).
+    /proc/self/statm stays open; it is reopened after a fork.
+    """
+    try:
+        pid = os.getpid()
+        if _statm["pid"] != pid:
+            _statm["fd"], _statm["pid"] = os.open("/proc/self/statm", os.O_RDONLY), pid
+        return int(os.pread(_statm["fd"], 128, 0).split()[1]) * _PAGE_MB
+    except (OSError, AttributeError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "attrs", "start", "end", "depth", "rss_start", "rss_end", "thread")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        stack = self.tracer.stack()
+        self.depth = len(stack)
+        stack.append(self)
+        self.thread = threading.get_ident()
+        self.rss_start = rss_mb()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        self.rss_end = rss_mb()
+        stack = self.tracer.stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        if len(self.tracer.spans) < MAX_EVENTS:
+            self.tracer.spans.append(self)
+        else:
+            self.tracer.dropped += 1
+        return False
+
+    def set(self, **attrs):
+        """
+        Adds attributes (row counts, paths, ...) to an open span.
+        """
+        self.attrs.update(attrs)
+
+    @property
+    def ms(self):
+        return (self.end - self.start) * 1000
+
+
+class Tracer:
+    def __init__(self, run=None, path=None, sample_ms=DEFAULT_SAMPLE_MS):
+        """
+        Collects spans, counters and RSS samples for one run.
+
+        Args:
+            run (str): Run name (default: the script name).
+            path (str): Trace file written by export() (default: under PERF_DIR).
+            sample_ms (float): RSS sampling interval; 0 disables the sampler.
+        """
+        self.run = run or os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+        self.started = datetime.now()
+        self.path = path or os.path.join(PERF_DIR, f"{self.run}-{self.started:%Y%m%d-%H%M%S}.json")
+        self.origin = time.perf_counter()
+        self.spans = []
+        self.dropped = 0
+        self.exported = None  # (spans, counters) at the last export
+        self.counters = {}
+        self.meta = {}  # free-form run attributes (host, dataset, ...) kept in the history
+        self.samples = []  # (perf_counter, rss_mb), in time order
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self._sampler = None
+        if sample_ms and sample_ms > 0:
+            self._sampler = threading.Thread(target=self._sample, args=(sample_ms / 1000,),
+                                             name="perf-sampler", daemon=True)
+            self._sampler.start()
+
+    def stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _sample(self, interval):
+        while not self._stop.is_set() and len(self.samples) < MAX_EVENTS:
+            self.samples.append((time.perf_counter(), rss_mb()))
+            self._stop.wait(interval)
+
+    def stop(self):
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join(timeout=1.0)
+
+    # -----------------------------
+    # Reporting
+    # -----------------------------
+    def span_peak(self, s, samples=None):
+        samples = self.samples if samples is None else samples
+        lo = bisect.bisect_left(samples, (s.start,))
+        hi = bisect.bisect_right(samples, (s.end, float("inf")))
+        return max([s.rss_start, s.rss_end] + [rss for _, rss in samples[lo:hi]])
+
+    def summary(self):
+        """
+        Returns {span name: {calls, total_ms, mean_ms, max_ms, peak_rss_mb}}.
+        """
+        samples = list(self.samples)
+        stages = {}
+        for s in list(self.spans):
+            st = stages.setdefault(s.name, {"calls": 0, "total_ms": 0.0, "max_ms": 0.0, "peak_rss_mb": 0.0})
+            st["calls"] += 1
+            st["total_ms"] += s.ms
+            st["max_ms"] = max(st["max_ms"], s.ms)
+            st["peak_rss_mb"] = max(st["peak_rss_mb"], self.span_peak(s, samples))
+        for st in stages.values():
+            st["mean_ms"] = st["total_ms"] / st["calls"]
+            for key in ("total_ms", "max_ms", "mean_ms", "peak_rss_mb"):
+                st[key] = round(st[key], 2)
+        return stages
+
+    def trace(self):
+        """
+        Returns the run as a Chrome-trace compatible dict.
+        """
+        pid = os.getpid()
+        samples = list(self.samples)
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": self.run}}]
+        for s in list(self.spans):
+            events.append({
+                "name": s.name, "ph": "X", "pid": pid, "tid": s.thread,
+                "ts": round((s.start - self.origin) * 1e6, 1), "dur": round((s.end - s.start) * 1e6, 1),
+                "args": dict(s.attrs, depth=s.depth, peak_rss_mb=round(self.span_peak(s, samples), 1)),
+            })
+        for t, rss in samples:
+            events.append({"name": "rss_mb", "ph": "C", "pid": pid,
+                           "ts": round((t - self.origin) * 1e6, 1), "args": {"rss_mb": round(rss, 1)}})
+        counters = dict(self.counters)
+        if self.dropped:
+            counters["spans.dropped"] = self.dropped
+        return {
+            "run": self.run,
+            "started": self.started.isoformat(timespec="seconds"),
+            "wall_ms": round((time.perf_counter() - self.origin) * 1000, 1),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "summary": self.summary(),
+            "counters": counters,
+            "meta": dict(self.meta),
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+        }
+
+    def export(self, path=None, history=HISTORY_PATH):
+        """
+        Writes the trace file and appends the run summary to ``history``.
+        Returns the trace path.
+        """
+        path = path or self.path
+        self.exported = (len(self.spans), dict(self.counters))
+        data = self.trace()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        if history:
+            os.makedirs(os.path.dirname(os.path.abspath(history)), exist_ok=True)
+            record = {k: data[k] for k in ("run", "started", "wall_ms", "peak_rss_mb", "summary", "counters", "meta")}
+            record["trace"] = os.path.abspath(path)
+            with open(history, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        return path
+
+
+# -----------------------------
+# Module-level API
+# -----------------------------
+_tracer = None
+
+
+def enabled():
+    return _tracer is not None
+
+
+def tracer():
+    return _tracer
+
+
+def enable(run=None, path=None, sample_ms=None, export_at_exit=True):
+    """
+    Starts collecting (idempotent) and returns the active Tracer.
+    """
+    global _tracer
+    if _tracer is None:
+        if sample_ms is None:
+            sample_ms = float(os.environ.get(SAMPLE_ENV, DEFAULT_SAMPLE_MS))
+        _tracer = Tracer(run=run, path=path, sample_ms=sample_ms)
+        if export_at_exit:
+            atexit.register(_export_at_exit, _tracer)
+    return _tracer
+
+
+def disable():
+    """
+    Stops collecting and returns the Tracer that was active (or None).
+    """
+    global _tracer
+    active, _tracer = _tracer, None
+    if active is not None:
+        active.stop()
+    return active
+
+
+def _export_at_exit(active):
+    active.stop()
+    if (active.spans or active.counters) and active.exported != (len(active.spans), active.counters):
+        path = active.export()
+        print(f"[INFO] Trace written to {path}", file=sys.stderr)
+
+
+def span(name, **attrs):
+    if _tracer is None:
+        return _NULL_SPAN
+    return Span(_tracer, name, attrs)
+
+
+def traced(name=None):
+    """
+    Decorator: runs the function inside span(name or its qualified name).
+    """
+    def decorator(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return fn(*args, **kwargs)
+            with Span(_tracer, label, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, value=1):
+    if _tracer is None:
+        return
+    counters = _tracer.counters
+    counters[name] = counters.get(name, 0) + value
+
+
+def export(path=None):
+    """
+    Writes the active trace now (the app calls this; scripts export at exit).
+    """
+    return _tracer.export(path) if _tracer is not None else None
+
+
+def load_history(path=HISTORY_PATH, run=None):
+    """
+    Returns the recorded run summaries (optionally of one run name), oldest first.
+    """
+    if not os.path.exists(path):
+        return []
+    runs = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                if run is None or record.get("run") == run:
+                    runs.append(record)
+    return runs
+
+
+def regressions(runs, threshold=0.2, baseline_runs=5, min_delta_ms=5.0):
+    """
+    Compares the last run's stages with the median of up to ``baseline_runs``
+    earlier runs; returns [(stage, last_ms, baseline_ms, ratio)] for stages
+    that are more than ``threshold`` and ``min_delta_ms`` slower.
+    """
+    if len(runs) < 2:
+        return []
+    last, previous = runs[-1], runs[-1 - baseline_runs:-1]
+    flagged = []
+    for stage, st in last["summary"].items():
+        history = sorted(r["summary"][stage]["total_ms"] for r in previous if stage in r.get("summary", {}))
+        if not history:
+            continue
+        baseline = history[len(history) // 2]
+        if st["total_ms"] > baseline * (1 + threshold) and st["total_ms"] - baseline >= min_delta_ms:
+            flagged.append((stage, st["total_ms"], baseline, round(st["total_ms"] / max(baseline, 1e-9), 2)))
+    return flagged
+
+
+_env = os.environ.get(TRACE_ENV, "").strip()
+if _env and _env.lower() not in ("0", "false", "no"):
+    enable(path=None if _env.lower() in ("1", "true", "yes") else _env)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--run", default=None, help="Only runs with this name")
+    parser.add_argument("--last", type=int, default=10)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    runs = load_history(run=args.run)
+    if not runs:
+        print(f"[INFO] No runs recorded in {HISTORY_PATH}; run a script with {TRACE_ENV}=1")
+        return
+    for r in runs[-args.last:]:
+        stages = ", ".join(f"{k} {v['total_ms']:.0f}ms" for k, v in r["summary"].items())
+        print(f"{r['started']}  {r['run']:<24} {r['wall_ms']:>9.0f}ms  peak {r['peak_rss_mb']:.0f}MB  {stages}")
+    names = [args.run] if args.run else sorted({r["run"] for r in runs})
+    for name in names:
+        for stage, last_ms, base_ms, ratio in regressions(load_history(run=name), args.threshold):
+            print(f"[WARN] {name}: {stage} took {last_ms:.1f}ms vs. median {base_ms:.1f}ms ({ratio}x)")
+
+
+if __name__ == "__main__":
+    main()
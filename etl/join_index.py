@@ -0,0 +1,87 @@
+import numpy as np
+
+
+def _key_array(series):
+    """
+    Returns join keys as a NumPy string array (missing keys become "").
+    """
+    return series.fillna("").astype(str).to_numpy()
+
+
+class JoinIndex:
+    def __init__(self, child_df, key, sort_by=None):
+        """
+        Precomputes a one-to-many join index from ``key`` to the rows of ``child_df``.
+
+        The child table is physically re-ordered by (key, sort_by) once, so every
+        key owns a contiguous row range [start, end) and a lookup is a slice
+        instead of a merge. Rows inside a range stay ordered by ``sort_by``,
+        which lets time-bounded lookups use a binary search.
+
+        Args:
+            child_df (pd.DataFrame): The "many" side of the relationship.
+            key (str): Foreign-key column in ``child_df``.
+            sort_by (str): Optional column to order rows within each key.
+        """
+        self.key = key
+        self.sort_by = sort_by
+
+        keys = _key_array(child_df[key])
+        if sort_by is not None:
+            order = np.lexsort((child_df[sort_by].to_numpy(), keys))
+        else:
+            order = np.argsort(keys, kind="stable")
+
+        self.rows = child_df.iloc[order].reset_index(drop=True)
+        sorted_keys = keys[order]
+        self.keys, self.starts = np.unique(sorted_keys, return_index=True)
+        self.ends = np.append(self.starts[1:], len(sorted_keys))
+        self._slot = {k: i for i, k in enumerate(self.keys.tolist())}
+        self._sort_values = self.rows[sort_by].to_numpy() if sort_by is not None else None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def range(self, key):
+        """
+        Returns the (start, end) row range of ``key``; (0, 0) if the key is unknown.
+        """
+        slot = self._slot.get(key)
+        if slot is None:
+            return 0, 0
+        return int(self.starts[slot]), int(self.ends[slot])
+
+    def count(self, key):
+        start, end = self.range(key)
+        return end - start
+
+    def lookup(self, key, lower=None, upper=None):
+        """
+        Returns the child rows of ``key``, optionally bounded to
+        lower <= sort_by <= upper (requires ``sort_by``).
+        """
+        start, end = self.range(key)
+        if lower is not None or upper is not None:
+            if self._sort_values is None:
+                raise ValueError("Bounded lookups need a JoinIndex built with sort_by.")
+            values = self._sort_values[start:end]
+            lo, hi = start, end
+            if lower is not None:
+                lo = start + int(np.searchsorted(values, np.asarray(lower, dtype=values.dtype), side="left"))
+            if upper is not None:
+                hi = start + int(np.searchsorted(values, np.asarray(upper, dtype=values.dtype), side="right"))
+            start, end = lo, hi
+        return self.rows.iloc[start:end]
+
+    def positions(self, keys):
+        """
+        Returns the concatenated row positions of several keys (in ``keys`` order).
+        """
+        ranges = [self.range(k) for k in keys]
+        ranges = [r for r in ranges if r[1] > r[0]]
+        if not ranges:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(s, e) for s, e in ranges])
+
+    def lookup_many(self, keys):
+        return self.rows.iloc[self.positions(keys)]
@@ -0,0 +1,41 @@
+import os
+import pandas as pd
+
+from etl.instrumentation import traced
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CAMPAIGNS_PATH = os.path.join(ROOT_DIR, "data", "processed", "marketing", "campaigns_v1.csv")
+KPI_DEFINITIONS_PATH = os.path.join(ROOT_DIR, "data", "dictionaries", "marketing", "kpi_definitions_v0.9.json")
+
+# Numeric columns of the ad-group level export (stored as "81,557" / " - ")
+NUMERIC_COLS = [
+    "billing_unit_cost", "budget", "actual_spend", "impressions", "clicks", "ctr",
+    "views", "vtr", "opens", "sessions", "conversions", "conversion_rate", "revenue", "roas",
+]
+
+
+def clean_campaign_rows(df):
+    """
+    Normalizes a raw ad-group export: strips header padding and parses the
+    formatted numeric columns ("81,557" -> 81557.0, " - " / "" -> NaN).
+    """
+    df = df.copy()
+    df.columns = df.columns.str.strip()
+    for col in NUMERIC_COLS:
+        if col not in df.columns:
+            continue
+        if df[col].dtype.kind not in "if":
+            values = df[col].astype(str).str.replace(",", "", regex=False).str.strip()
+            df[col] = pd.to_numeric(values, errors="coerce")
+    for col in ("start_date", "end_date"):
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    return df
+
+
+@traced("load.campaign_rows")
+def load_campaign_rows(path=CAMPAIGNS_PATH):
+    """
+    Loads campaigns_v1.csv (one row per ad group) with clean numeric columns.
+    """
+    return clean_campaign_rows(pd.read_csv(path, encoding="utf-8-sig"))
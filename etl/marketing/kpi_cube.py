@@ -0,0 +1,269 @@
+"""
+kpi_cube.py
+
+Materialized KPI cube over the ad-group rows of campaigns_v1.csv.
+
+Only additive base measures are stored per cell (brand x channel x
+media_platform x country x month). Ratio KPIs such as ROAS, CTR or CVR are
+derived at query time from the summed measures by the compiled formulas of
+kpi_definitions_v0.9.json (see kpi_engine.py), so every slice returns correctly weighted ratios
+instead of averages of per-row ratios.
+
+Usage (from the repository root):
+    python -m etl.marketing.kpi_cube --group-by channel month
+"""
+import argparse
+import json
+import os
+import numpy as np
+import pandas as pd
+
+from etl.instrumentation import count, traced
+from etl.marketing.campaign_data import load_campaign_rows, ROOT_DIR
+from etl.marketing.kpi_engine import KPIEngine
+
+CUBE_PATH = os.path.join(ROOT_DIR, "data", "processed", "marketing", "kpi_cube.npz")
+
+DIMENSIONS = ["brand_name", "channel", "media_platform", "country", "month"]
+
+# cube measure (canonical measure of kpi_engine.py) -> source column of campaigns_v1.csv
+MEASURES = {
+    "spend": "actual_spend",
+    "impressions": "impressions",
+    "clicks": "clicks",
+    "conversions": "conversions",
+    "revenue": "revenue",
+    "sessions": "sessions",
+    "views": "views",
+}
+
+def _explode_months(df):
+    """
+    Splits every ad-group row over the calendar months of its flight and
+    returns (row positions, month labels, weights), where the weight is the
+    share of flight days falling into that month. Rows need a start date; a
+    missing end date or one before the start counts as a one-day flight.
+    """
+    start = df["start_date"].to_numpy("datetime64[D]")
+    end = df["end_date"].to_numpy("datetime64[D]")
+    end = np.where(np.isnat(end) | (end < start), start, end)
+    first_month = start.astype("datetime64[M]")
+    n_months = (end.astype("datetime64[M]") - first_month).astype(np.int64) + 1
+
+    rows = np.repeat(np.arange(len(df)), n_months)
+    offsets = np.arange(len(rows)) - np.repeat(np.cumsum(n_months) - n_months, n_months)
+    month = first_month[rows] + offsets
+    slice_start = np.maximum(start[rows], month.astype("datetime64[D]"))
+    slice_end = np.minimum(end[rows], (month + 1).astype("datetime64[D]") - 1)
+    days = (slice_end - slice_start).astype(np.int64) + 1
+    total_days = (end - start).astype(np.int64)[rows] + 1
+    return rows, month.astype(str), days / total_days
+
+
+class KPICube:
+    def __init__(self, engine=None):
+        """
+        Creates an empty cube. ``engine`` is the KPIEngine used to derive ratio
+        KPIs at query time (a fresh one by default).
+        """
+        self.engine = engine if engine is not None else KPIEngine()
+        self.measure_names = list(MEASURES)
+        self.dim_values = {d: [] for d in DIMENSIONS}
+        self._dim_codes = {d: {} for d in DIMENSIONS}
+        self._cell_slot = {}
+        self.cell_codes = np.empty((0, len(DIMENSIONS)), dtype=np.int32)
+        self.measures = np.empty((0, len(self.measure_names)), dtype=np.float64)
+        self.ingested_keys = set()
+
+    def __len__(self):
+        return len(self.cell_codes)
+
+    # -----------------------------
+    # Build / incremental refresh
+    # -----------------------------
+    def _encode(self, dim, values):
+        codes = self._dim_codes[dim]
+        out = np.empty(len(values), dtype=np.int32)
+        for i, v in enumerate(values):
+            code = codes.get(v)
+            if code is None:
+                code = codes[v] = len(self.dim_values[dim])
+                self.dim_values[dim].append(v)
+            out[i] = code
+        return out
+
+    @traced("aggregate.kpi_cube")
+    def add_rows(self, df, key="ad_group_id"):
+        """
+        Folds new ad-group rows (clean_campaign_rows() format) into the cube.
+        Rows whose ``key`` was already ingested are skipped, so re-running a
+        refresh over a growing export only adds the rows that landed since.
+        Rows without a start date are skipped (and not marked ingested);
+        keys are only recorded once the batch has been folded in.
+
+        Returns:
+            int: The number of rows added.
+        """
+        new_keys = []
+        if key in df.columns:
+            keys = df[key].astype(str)
+            fresh = ~keys.isin(self.ingested_keys) & ~keys.duplicated()
+            df = df[fresh.to_numpy()]
+        undated = df["start_date"].isna().to_numpy()
+        if undated.any():
+            count("kpi_cube.rows_without_start_date", int(undated.sum()))
+            df = df[~undated]
+        if key in df.columns:
+            new_keys = df[key].astype(str).tolist()
+        if df.empty:
+            return 0
+
+        rows, months, weights = _explode_months(df)
+        labels = {
+            "brand_name": df["brand_name"].fillna("").astype(str).to_numpy()[rows],
+            "channel": df["channel"].fillna("").astype(str).str.upper().to_numpy()[rows],
+            "media_platform": df["media_platform"].fillna("").astype(str).to_numpy()[rows],
+            "country": df["country"].fillna("").astype(str).to_numpy()[rows],
+            "month": months,
+        }
+        codes = np.empty((len(rows), len(DIMENSIONS)), dtype=np.int32)
+        for i, dim in enumerate(DIMENSIONS):
+            uniq, inverse = np.unique(labels[dim], return_inverse=True)
+            codes[:, i] = self._encode(dim, uniq.tolist())[inverse]
+        values = np.column_stack(
+            [df[MEASURES[m]].to_numpy(dtype=np.float64, na_value=0.0)[rows] * weights for m in self.measure_names]
+        )
+
+        # Pre-aggregate the batch, then merge its cells into the cube
+        batch_cells, inverse = np.unique(codes, axis=0, return_inverse=True)
+        batch_sums = np.zeros((len(batch_cells), values.shape[1]))
+        np.add.at(batch_sums, inverse.ravel(), values)
+
+        slots = np.empty(len(batch_cells), dtype=np.int64)
+        new_cells = []
+        for i, cell in enumerate(map(tuple, batch_cells.tolist())):
+            slot = self._cell_slot.get(cell)
+            if slot is None:
+                slot = self._cell_slot[cell] = len(self.cell_codes) + len(new_cells)
+                new_cells.append(cell)
+            slots[i] = slot
+        if new_cells:
+            self.cell_codes = np.vstack([self.cell_codes, np.asarray(new_cells, dtype=np.int32)])
+            self.measures = np.vstack([self.measures, np.zeros((len(new_cells), len(self.measure_names)))])
+        np.add.at(self.measures, slots, batch_sums)
+        self.ingested_keys.update(new_keys)
+        return len(df)
+
+    @classmethod
+    def build(cls, df=None, engine=None):
+        cube = cls(engine)
+        cube.add_rows(load_campaign_rows() if df is None else df)
+        return cube
+
+    # -----------------------------
+    # Slice / dice
+    # -----------------------------
+    def _mask(self, filters):
+        mask = np.ones(len(self.cell_codes), dtype=bool)
+        for dim, wanted in filters.items():
+            if dim not in self._dim_codes:
+                raise KeyError(f"Unknown cube dimension: {dim}")
+            if isinstance(wanted, str):
+                wanted = [wanted]
+            codes = [self._dim_codes[dim][v] for v in wanted if v in self._dim_codes[dim]]
+            mask &= np.isin(self.cell_codes[:, DIMENSIONS.index(dim)], codes)
+        return mask
+
+    def kpi_codes(self):
+        """
+        Returns the KPIs derivable from the cube's measures.
+        """
+        return self.engine.supported(self.measure_names)
+
+    def _kpis(self, sums, kpis):
+        supported = set(self.kpi_codes())
+        kpis = [k for k in kpis if k in supported]
+        return self.engine.evaluate({m: sums[..., i] for i, m in enumerate(self.measure_names)}, kpis)
+
+    def totals(self, kpis=("roas", "ctr", "cvr"), **filters):
+        """
+        Returns the summed measures and derived KPIs of one slice as a dict,
+        e.g. cube.totals(channel="SEM", month="2024-06").
+        """
+        sums = self.measures[self._mask(filters)].sum(axis=0)
+        result = dict(zip(self.measure_names, sums.tolist()))
+        result.update({k: float(v) for k, v in self._kpis(sums, kpis).items()})
+        return result
+
+    def query(self, group_by, kpis=("roas", "ctr", "cvr"), **filters):
+        """
+        Rolls the cube up to ``group_by`` dimensions (after filtering) and
+        returns one row per group with base measures and derived KPIs.
+        """
+        group_by = [group_by] if isinstance(group_by, str) else list(group_by)
+        mask = self._mask(filters)
+        cells = self.cell_codes[mask]
+
+        # Pack the group-by codes into one integer key per cell
+        key = np.zeros(len(cells), dtype=np.int64)
+        for d in group_by:
+            key = key * max(len(self.dim_values[d]), 1) + cells[:, DIMENSIONS.index(d)]
+        groups, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+        measures = self.measures[mask]
+        sums = np.column_stack(
+            [np.bincount(inverse, weights=measures[:, i], minlength=len(groups)) for i in range(len(self.measure_names))]
+        ).reshape(len(groups), len(self.measure_names))
+
+        columns = {d: np.asarray(self.dim_values[d], dtype=object)[cells[first, DIMENSIONS.index(d)]] for d in group_by}
+        columns.update({m: sums[:, i] for i, m in enumerate(self.measure_names)})
+        columns.update(self._kpis(sums, kpis))
+        return pd.DataFrame(columns)
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def save(self, path=CUBE_PATH):
+        np.savez_compressed(
+            path,
+            cell_codes=self.cell_codes,
+            measures=self.measures,
+            meta=np.array(json.dumps({
+                "dimensions": DIMENSIONS,
+                "measures": self.measure_names,
+                "dim_values": self.dim_values,
+                "ingested_keys": sorted(self.ingested_keys),
+            })),
+        )
+
+    @classmethod
+    def load(cls, path=CUBE_PATH, engine=None):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            cube = cls(engine)
+            cube.cell_codes = data["cell_codes"]
+            cube.measures = data["measures"]
+        cube.measure_names = meta["measures"]
+        cube.dim_values = meta["dim_values"]
+        cube._dim_codes = {d: {v: i for i, v in enumerate(vals)} for d, vals in cube.dim_values.items()}
+        cube._cell_slot = {tuple(c): i for i, c in enumerate(cube.cell_codes.tolist())}
+        cube.ingested_keys = set(meta["ingested_keys"])
+        return cube
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", default=None, help="campaigns_v1.csv path (default: repo data)")
+    parser.add_argument("--output", default=CUBE_PATH)
+    parser.add_argument("--group-by", nargs="+", default=["channel"])
+    args = parser.parse_args()
+
+    df = load_campaign_rows(args.input) if args.input else load_campaign_rows()
+    cube = KPICube.build(df)
+    cube.save(args.output)
+    print(f"[OK] Built KPI cube with {len(cube)} cells from {len(df)} ad groups -> {args.output}")
+    print(f"[INFO] Derived KPIs: {', '.join(sorted(cube.kpi_codes()))}")
+    print(cube.query(args.group_by).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+kpi_engine.py
+
+Executes the human-readable formulas of kpi_definitions_v0.9.json.
+
+Every formula ("ACoS = Total Ad Spend / Sales Generated from Advertising") is
+parsed once into an expression over canonical measures and compiled into a
+NumPy closure, so a whole table is evaluated with a handful of vectorized
+operations. Division by zero yields NaN instead of inf or an exception.
+
+Usage (from the repository root):
+    python -m etl.marketing.kpi_engine            # list compiled KPIs
+    python -m etl.marketing.kpi_engine --check    # flag drifting stored KPIs
+"""
+import argparse
+import json
+import re
+import numpy as np
+import pandas as pd
+
+from etl.instrumentation import traced
+from etl.marketing.campaign_data import load_campaign_rows, KPI_DEFINITIONS_PATH
+
+# canonical measure -> column of campaigns_v1.csv
+CANONICAL_COLUMNS = {
+    "spend": "actual_spend",
+    "impressions": "impressions",
+    "clicks": "clicks",
+    "conversions": "conversions",
+    "revenue": "revenue",
+    "sessions": "sessions",
+    "views": "views",
+    "opens": "opens",
+}
+
+# formula wording in kpi_definitions_v0.9.json -> canonical measure
+FORMULA_TERMS = {
+    "total ad spend": "spend",
+    "ad spend": "spend",
+    "advertising spend": "spend",
+    "total advertising costs": "spend",
+    "actual spend": "spend",
+    "cost": "spend",
+    "sales generated from advertising": "revenue",
+    "sales revenue from ads": "revenue",
+    "total revenue": "revenue",
+    "revenue": "revenue",
+    "impressions": "impressions",
+    "clicks": "clicks",
+    "number of clicks": "clicks",
+    "conversions": "conversions",
+    "number of orders": "conversions",
+    "sessions": "sessions",
+    "number of sessions": "sessions",
+    "total sessions": "sessions",
+    "views": "views",
+    "opens": "opens",
+}
+
+# CTR in the definitions file is the e-mail variant (Clicks / Opens); the
+# campaign export stores display CTR, which is defined on the "clicks" entry.
+FORMULA_SOURCE = {"ctr": "clicks"}
+
+# KPI code -> (stored column, factor, rounding) with stored == recomputed * factor.
+# The export stores rates as fractions while the formulas multiply by 100, and
+# rounds values, so half a rounding unit is always tolerated.
+STORED_KPIS = {
+    "ctr": ("ctr", 0.01, 0.0005),
+    "conversion_rate": ("conversion_rate", 0.01, 0.0005),
+    "vtr": ("vtr", 0.01, 0.0005),
+    "roas": ("roas", 1.0, 0.05),
+}
+
+_TOKEN_RE = re.compile(r"\s*(?:(\d+(?:\.\d+)?)|([()+\-*/])|([A-Za-z][A-Za-z' ]*[A-Za-z]|[A-Za-z])|(%))")
+_OPERATORS = str.maketrans({"×": "*", "÷": "/", "−": "-", "–": "-"})
+
+
+def _tokenize(expression):
+    expression = expression.translate(_OPERATORS).strip()
+    tokens, pos = [], 0
+    while pos < len(expression):
+        match = _TOKEN_RE.match(expression, pos)
+        if not match or match.end() == pos:
+            raise ValueError(f"unexpected character {expression[pos:pos + 1]!r}")
+        number, op, term, _percent = match.groups()
+        if number:
+            tokens.append(("num", float(number)))
+        elif op:
+            tokens.append(("op", op))
+        elif term:
+            text = " ".join(term.lower().split())
+            if text not in FORMULA_TERMS:
+                raise ValueError(f"unknown term {term.strip()!r}")
+            tokens.append(("col", FORMULA_TERMS[text]))
+        pos = match.end()
+    return tokens
+
+
+def parse_formula(expression):
+    """
+    Parses the right-hand side of a formula into a nested tuple AST:
+    ("num", v) | ("col", measure) | (op, left, right).
+    """
+    tokens = _tokenize(expression)
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else (None, None)
+
+    def take():
+        nonlocal pos
+        pos += 1
+        return tokens[pos - 1]
+
+    def expr():
+        node = term()
+        while peek() in (("op", "+"), ("op", "-")):
+            node = (take()[1], node, term())
+        return node
+
+    def term():
+        node = atom()
+        while peek() in (("op", "*"), ("op", "/")):
+            node = (take()[1], node, atom())
+        return node
+
+    def atom():
+        kind, value = take() if pos < len(tokens) else (None, None)
+        if kind in ("num", "col"):
+            return (kind, value)
+        if (kind, value) == ("op", "("):
+            node = expr()
+            if take() != ("op", ")"):
+                raise ValueError("unbalanced parentheses")
+            return node
+        raise ValueError("incomplete expression")
+
+    node = expr()
+    if pos != len(tokens):
+        raise ValueError("trailing tokens")
+    return node
+
+
+def _measures(node):
+    if node[0] == "col":
+        return {node[1]}
+    if node[0] == "num":
+        return set()
+    return _measures(node[1]) | _measures(node[2])
+
+
+def _compile(node):
+    """
+    Turns an AST into fn(env, memo) -> np.ndarray. Identical sub-expressions
+    (e.g. Clicks / Impressions shared by several KPIs) are computed once per
+    evaluation through ``memo``.
+    """
+    key = repr(node)
+    if node[0] == "num":
+        value = node[1]
+        return lambda env, memo: value
+    if node[0] == "col":
+        name = node[1]
+        return lambda env, memo: env[name]
+
+    op, left, right = node[0], _compile(node[1]), _compile(node[2])
+
+    def fn(env, memo):
+        if key in memo:
+            return memo[key]
+        a, b = left(env, memo), right(env, memo)
+        if op == "+":
+            out = np.add(a, b)
+        elif op == "-":
+            out = np.subtract(a, b)
+        elif op == "*":
+            out = np.multiply(a, b)
+        else:
+            a, b = np.broadcast_arrays(np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64))
+            out = np.divide(a, b, out=np.full(a.shape, np.nan), where=b != 0)
+        memo[key] = out
+        return out
+
+    return fn
+
+
+class KPIEngine:
+    def __init__(self, definitions_path=KPI_DEFINITIONS_PATH, columns=CANONICAL_COLUMNS):
+        """
+        Compiles every formula of the definitions file that can be expressed
+        over canonical measures.
+
+        Args:
+            definitions_path (str): Path to kpi_definitions_v0.9.json.
+            columns (dict): Canonical measure -> DataFrame column used by evaluate().
+        """
+        self.columns = dict(columns)
+        with open(definitions_path, "r", encoding="utf-8") as f:
+            definitions = {d["code"]: d for d in json.load(f)["data"]}
+
+        self.formulas = {}
+        self.measures = {}
+        self.compiled = {}
+        self.unsupported = {}
+        for code in definitions:
+            formula = definitions[FORMULA_SOURCE.get(code, code)].get("formula")
+            if not formula or code in CANONICAL_COLUMNS:
+                continue
+            expression = formula.split("=", 1)[-1].strip()
+            try:
+                node = parse_formula(expression)
+            except ValueError as e:
+                self.unsupported[code] = str(e)
+                continue
+            self.formulas[code] = expression
+            self.measures[code] = _measures(node)
+            self.compiled[code] = _compile(node)
+
+    def supported(self, available=None):
+        """
+        Returns the KPI codes that can be computed from ``available`` measures
+        (all canonical measures by default).
+        """
+        available = set(self.columns if available is None else available)
+        return [code for code in self.compiled if self.measures[code] <= available]
+
+    def _env(self, data, kpis):
+        needed = set().union(*(self.measures[k] for k in kpis)) if kpis else set()
+        if isinstance(data, pd.DataFrame):
+            return {m: data[self.columns[m]].to_numpy(dtype=np.float64, na_value=np.nan) for m in needed}
+        return {m: np.asarray(data[m], dtype=np.float64) for m in needed}
+
+    def evaluate(self, data, kpis=None):
+        """
+        Evaluates KPIs in one pass over ``data``.
+
+        Args:
+            data: A DataFrame with the columns of ``self.columns``, or a dict
+                of canonical measure -> array (e.g. cube sums).
+            kpis (list): KPI codes to compute; defaults to every supported KPI.
+
+        Returns:
+            dict: KPI code -> np.ndarray.
+        """
+        if kpis is None:
+            available = data.columns if isinstance(data, pd.DataFrame) else data.keys()
+            reverse = {v: k for k, v in self.columns.items()} if isinstance(data, pd.DataFrame) else {}
+            kpis = self.supported([reverse.get(c, c) for c in available])
+        env, memo = self._env(data, kpis), {}
+        return {code: self.compiled[code](env, memo) for code in kpis}
+
+    @traced("score.kpis")
+    def evaluate_frame(self, df, kpis=None):
+        return pd.DataFrame(self.evaluate(df, kpis), index=df.index)
+
+    def check_stored(self, df, rtol=0.05, key="ad_group_id"):
+        """
+        Recomputes the KPIs the export stores precomputed (see STORED_KPIS)
+        and returns one row per stored value that disagrees by more than
+        ``rtol`` (relative) plus the column's rounding unit. Rows with a missing
+        stored or recomputed value are not compared.
+        """
+        kpis = [k for k, spec in STORED_KPIS.items() if spec[0] in df.columns and k in self.compiled]
+        recomputed = self.evaluate(df, kpis)
+        drift = []
+        for code in kpis:
+            col, factor, rounding = STORED_KPIS[code]
+            stored = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            expected = recomputed[code] * factor
+            comparable = np.isfinite(stored) & np.isfinite(expected)
+            diff = np.abs(stored - expected)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rel = diff / np.maximum(np.abs(expected), 1e-12)
+            bad = comparable & (diff > rounding + rtol * np.abs(expected))
+            drift.append(pd.DataFrame({
+                key: df[key].to_numpy()[bad] if key in df.columns else df.index.to_numpy()[bad],
+                "kpi": code,
+                "stored": stored[bad],
+                "recomputed": expected[bad],
+                "rel_diff": rel[bad],
+            }))
+        if not drift:
+            return pd.DataFrame(columns=[key, "kpi", "stored", "recomputed", "rel_diff"])
+        return pd.concat(drift, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--check", action="store_true", help="Compare stored KPI columns with recomputed ones")
+    parser.add_argument("--rtol", type=float, default=0.05)
+    args = parser.parse_args()
+
+    engine = KPIEngine()
+    if not args.check:
+        for code, expression in sorted(engine.formulas.items()):
+            print(f"[OK] {code:<16} = {expression}")
+        print(f"\n[INFO] {len(engine.compiled)} KPIs compiled, {len(engine.unsupported)} not expressible:")
+        for code, reason in sorted(engine.unsupported.items()):
+            print(f"  - {code}: {reason}")
+        return
+
+    drift = engine.check_stored(load_campaign_rows(), rtol=args.rtol)
+    if drift.empty:
+        print("[OK] Stored KPI columns agree with the recomputed values.")
+    else:
+        print(f"[WARN] {len(drift)} stored KPI values drift by more than {args.rtol:.0%}:")
+        print(drift.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
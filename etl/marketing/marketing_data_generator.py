@@ -0,0 +1,481 @@
+"""
+Synthetic marketing data at configurable scale, in the layout of the
+hand-made exports (campaigns_v1.csv, products_v1.csv, orders_v1.csv), so the
+loaders, validate_csv, the graph and the app read the output unchanged.
+
+Driven by the marketing dictionaries:
+- campaigns_dictionary.json:        campaign templates (the first N campaigns
+                                    are the dictionary itself; further ones
+                                    re-brand a template with a brands.json
+                                    brand of the same category and move it
+                                    by whole weeks)
+- brands.json:                      brands and their categories
+- channel_taxonomy_v0.9.json:       the generated (measurable) channels are
+                                    the Paid Media concepts; owned / earned
+                                    media and the non-digital channels it
+                                    leaves out (TV, radio, print, out of
+                                    home) are not generated. SEM keyword
+                                    types are the children of SEM.
+- channels.json:                    media platforms per channel
+- objectives_dictionary_v0.9.json:  objectives and their funnel rates
+
+Ad-group KPIs are drawn as one funnel per ad group, so they are consistent
+by construction: clicks <= impressions, sessions <= clicks, conversions <=
+sessions, roas = revenue / actual_spend, and the unit cost matches the
+billing type. Orders fall inside their campaign's window ("organic" orders
+anywhere in the overall range) and reference SKUs of the campaign's brand.
+
+Orders are generated in fixed-size chunks, each with its own seed, so the
+output is identical for any number of workers; chunks are produced in a
+process pool and written in order.
+
+Usage (from the repository root):
+    python -m etl.marketing.marketing_data_generator --campaigns 300 --orders 10000000 --workers 4
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from etl.instrumentation import count, span, traced
+from etl.marketing.campaign_data import ROOT_DIR
+from etl.taxonomy import channel_taxonomy
+
+DICT_DIR = os.path.join(ROOT_DIR, "data", "dictionaries", "marketing")
+CATALOG_PATH = os.path.join(ROOT_DIR, "data", "processed", "marketing", "products_v1.csv")
+OUT_DIR = os.path.join(ROOT_DIR, "data", "generated", "marketing")
+
+# Headers as in the hand-made exports (padding included)
+CAMPAIGN_HEADER = [
+    "category", "country", "status", "objective", "campaign_id", "campaign_name", "brand_name", "primary_KPI",
+    "currency", "ad_group_id", "start_date", "end_date", "media_platform", "channel", "ad_placement", "ad_format",
+    "sem_keyword_type", "age_groups", "genders", "retargeting", "interest", "audience_type", "billing_type",
+    "billing_unit_cost", " budget ", " actual_spend ", " impressions ", " clicks ", " ctr ", " views ", " vtr ",
+    " opens ", " sessions ", " conversions ", " conversion_rate ", " revenue ", " roas ",
+]
+PRODUCT_HEADER = [
+    "category_level_1_id", "category_level_1", "category_level_2_id", "category_level_2", "brand", "product_id",
+    "product_name", "SKU_id", "SKU_name", "size", "color", "other features", "RRP",
+]
+ORDER_HEADER = [
+    "customer_id", "Brand", "campaign_id", "ad_group_id", "campaign_name", "order_id", "SKU_id", "sku_name",
+    "Order_date", " RRP ", "ASP", "no_of_transactions",
+]
+ORGANIC = "organic"
+
+PAID_MEDIA = "PAID"  # channel taxonomy concept whose children are generated
+SEM = "SEM"
+
+# Per-channel funnel defaults: (placement, format, billing) options, CPM,
+# CTR, sessions per click, view-through and open rates. Paid channels of the
+# taxonomy without a profile use DEFAULT_PROFILE.
+CHANNEL_PROFILES = {
+    "SEM": {"code": "SEM", "ads": [("Search", "text", "cpc")], "cpm": 34.0, "ctr": 0.045, "session": 0.74},
+    "SOCIAL": {"code": "META", "ads": [("IG/FB Feed+Stories", "video", "cpc"), ("IG/FB Feed+Stories", "image", "cpc"),
+                                       ("Feed+Reels", "video", "cpc")],
+               "cpm": 7.0, "ctr": 0.017, "session": 0.65, "vtr": 0.25},
+    "DISPLAY": {"code": "DISPLAY", "ads": [("Responsive Display", "image", "cpc"), ("Dynamic Retargeting", "image", "cpc"),
+                                           ("In-Stream", "video", "cpv")],
+                "cpm": 7.0, "ctr": 0.02, "session": 0.65, "vtr": 0.25},
+    "AFFILIATE": {"code": "AFF", "ads": [("Review+Deal", "image", "cpa"), ("Publisher Mixed", "native", "cpa")],
+                  "cpm": 16.0, "ctr": 0.012, "session": 0.8},
+    "EMAIL": {"code": "EMAIL", "ads": [("Inbox", "html", "flat")], "cpm": 10.0, "ctr": 0.03, "session": 0.7, "open": 0.25},
+    "PARTNERSHIP": {"code": "CREATOR", "ads": [("Creator Collab", "video", "flat")], "cpm": 80.0, "ctr": 0.01,
+                    "session": 0.6, "vtr": 0.36},
+}
+DEFAULT_PROFILE = {"ads": [("Mixed", "image", "cpc")], "cpm": 10.0, "ctr": 0.01, "session": 0.65}
+# objective -> (channel weights, CTR multiplier, conversion rate); channels
+# without a profile get weight 1
+OBJECTIVE_PROFILES = {
+    "awareness": ({"SOCIAL": 3, "DISPLAY": 3, "PARTNERSHIP": 1, "SEM": 1}, 0.7, 0.018),
+    "consideration": ({"SOCIAL": 3, "DISPLAY": 2, "SEM": 2, "EMAIL": 1, "PARTNERSHIP": 1}, 0.8, 0.0275),
+    "conversion": ({"SEM": 3, "SOCIAL": 2, "DISPLAY": 2, "AFFILIATE": 2, "EMAIL": 2}, 1.0, 0.057),
+    "retention": ({"EMAIL": 3, "SOCIAL": 1, "DISPLAY": 1, "AFFILIATE": 1}, 1.0, 0.05),
+}
+AGE_GROUPS = ["25-49", "25-54", "20-35", "25-64", "25-45", "18-34", "18-24,25-34,35-44"]
+SIZES = ["S", "M", "L", "XL", "200ml", "375g", "140x200cm", "90x200cm", "N/A"]
+COLORS = ["Black", "White", "Green", "Blue/Copper", "Grey", "Red", "N/A"]
+FEATURES = ["Laptop sleeve", "Boost midsole", "7-zone support", "Instant coffee", "Ortholite insole", "N/A"]
+
+
+def load_json(name):
+    with open(os.path.join(DICT_DIR, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def measurable_channels(tree=None):
+    """
+    Channel codes under Paid Media in the channel taxonomy: the channels
+    with identifiable spend, impressions and clicks.
+    """
+    tree = tree or channel_taxonomy()
+    return [tree.codes[c] for c in tree.children(tree.id(PAID_MEDIA))]
+
+
+def sem_keyword_types(tree=None):
+    """
+    SEM keyword types ("brand", "generic", ...) from the children of SEM.
+    """
+    tree = tree or channel_taxonomy()
+    return [tree.codes[c].split("_", 1)[1].lower() for c in tree.children(tree.id(SEM))]
+
+
+def channel_profile(channel):
+    return CHANNEL_PROFILES.get(channel) or dict(DEFAULT_PROFILE, code=channel)
+
+
+def fmt_int(values):
+    return [f"{int(v):,}" for v in values]
+
+
+def csv_field(value):
+    value = str(value)
+    return '"' + value.replace('"', '""') + '"' if any(ch in value for ch in ',"\n') else value
+
+
+def fmt_opt(values, pattern, missing=""):
+    return [missing if v != v else pattern.format(v) for v in values]
+
+
+# -----------------------------
+# Campaigns and ad groups
+# -----------------------------
+@traced("generate.campaigns")
+def generate_campaigns(n_campaigns, rng):
+    """
+    Returns one row per campaign: the dictionary campaigns first, then
+    re-branded, date-shifted copies of them.
+    """
+    templates = load_json("campaigns_dictionary.json")
+    brands = load_json("brands.json")
+    by_category = {}
+    for b in brands:
+        by_category.setdefault(b["category"], []).append(b)
+    objectives = {m["name"] for m in load_json("objectives_dictionary_v0.9.json")["mapping"]}
+
+    rows = []
+    for i in range(n_campaigns):
+        t = dict(templates[i % len(templates)])
+        if i >= len(templates):
+            brand = by_category.get(t["category"], [{"id": t["campaign_id"], "name": t["brand_name"]}])
+            brand = brand[rng.integers(len(brand))]
+            shift = pd.Timedelta(weeks=int(rng.integers(-52, 53)))
+            name = t["campaign_name"].replace(t["brand_name"], brand["name"])
+            t.update(
+                campaign_id=f"{brand['id']}_C{i:06d}",
+                campaign_name=name if brand["name"] in name else f"{brand['name']} {name}",
+                brand_name=brand["name"],
+                start_date=(pd.Timestamp(t["start_date"]) + shift).strftime("%Y-%m-%d"),
+                end_date=(pd.Timestamp(t["end_date"]) + shift).strftime("%Y-%m-%d"),
+                total_budget=round(t["total_budget"] * float(rng.lognormal(0, 0.5)), -2),
+            )
+        if t["objective"] not in objectives or t["objective"] not in OBJECTIVE_PROFILES:
+            t["objective"] = "conversion"
+        rows.append(t)
+    return pd.DataFrame(rows)
+
+
+@traced("generate.ad_groups")
+def generate_ad_groups(campaigns, brand_aov, rng, min_groups=3, max_groups=9):
+    """
+    Returns the campaigns_v1 rows (one per ad group) with funnel-consistent KPIs.
+    """
+    tree = channel_taxonomy()
+    measurable = measurable_channels(tree)
+    platforms = {c["name"]: c["subcategories"] for c in load_json("channels.json")
+                 if c["name"] in measurable and c["subcategories"]}
+    profiles = {c: channel_profile(c) for c in platforms}
+    keyword_types = np.array(sem_keyword_types(tree), dtype=object)
+    n_groups = rng.integers(min_groups, max_groups + 1, size=len(campaigns))
+    camp = campaigns.iloc[np.repeat(np.arange(len(campaigns)), n_groups)].reset_index(drop=True)
+    n = len(camp)
+
+    # Channel, platform and ad setup per ad group
+    channel = np.empty(n, dtype=object)
+    for objective, idx in camp.groupby("objective").indices.items():
+        weights = OBJECTIVE_PROFILES[objective][0]
+        weights = {c: weights.get(c, 0 if c in CHANNEL_PROFILES else 1) for c in platforms}
+        names = [c for c in weights if weights[c] > 0]
+        p = np.array([weights[k] for k in names], dtype=float)
+        channel[idx] = np.array(names, dtype=object)[rng.choice(len(names), size=len(idx), p=p / p.sum())]
+    ads = [profiles[c]["ads"][rng.integers(len(profiles[c]["ads"]))] for c in channel]
+    retargeting = rng.random(n) < 0.4
+    keyword = np.where(channel == SEM, keyword_types[rng.integers(len(keyword_types), size=n)], "")
+    ordinal = pd.Series(channel).groupby([camp["campaign_id"], channel]).cumcount() + 1
+
+    # Funnel: spend -> impressions -> clicks -> sessions -> conversions -> revenue
+    share = rng.dirichlet(np.ones(max_groups), size=len(campaigns))
+    share = np.concatenate([s[:k] / s[:k].sum() for s, k in zip(share, n_groups)])
+    budget = np.maximum(np.round(camp["total_budget"].to_numpy() * share), 100)
+    spend = np.round(budget * np.where(camp["status"] == "active", rng.uniform(0.3, 0.9, n), rng.uniform(0.95, 1.0, n)))
+    prof = [profiles[c] for c in channel]
+    cpm = np.array([p["cpm"] for p in prof]) * rng.lognormal(0, 0.3, n)
+    impressions = np.maximum(np.round(spend / cpm * 1000), 1).astype(np.int64)
+    ctr_mult = camp["objective"].map(lambda o: OBJECTIVE_PROFILES[o][1]).to_numpy()
+    ctr = np.clip(np.array([p["ctr"] for p in prof]) * ctr_mult * rng.lognormal(0, 0.25, n), 1e-4, 0.5)
+    clicks = rng.binomial(impressions, ctr)
+    sessions = rng.binomial(clicks, np.array([p["session"] for p in prof]))
+    cvr = np.clip(camp["objective"].map(lambda o: OBJECTIVE_PROFILES[o][2]).to_numpy() * rng.lognormal(0, 0.3, n), 1e-4, 0.5)
+    conversions = rng.binomial(sessions, cvr)
+    aov = camp["brand_name"].map(brand_aov).fillna(100.0).to_numpy() * rng.lognormal(0, 0.2, n)
+    revenue = np.round(conversions * aov)
+
+    video = np.array([a[1] == "video" for a in ads])
+    vtr_rate = np.array([p.get("vtr", 0.25) for p in prof]) * rng.lognormal(0, 0.2, n)
+    views = np.where(video, rng.binomial(impressions, np.clip(vtr_rate, 0, 0.9)), -1)
+    has_open = np.array(["open" in p for p in prof])
+    opens = np.where(has_open, rng.binomial(impressions, np.array([p.get("open", 0.0) for p in prof])), -1)
+
+    billing = np.array([a[2] for a in ads])
+    units = np.select([billing == "cpc", billing == "cpv", billing == "cpa"],
+                      [clicks, np.maximum(views, 0), conversions], default=1)
+    unit_cost = spend / np.maximum(units, 1)
+
+    views_f = np.where(views >= 0, views, np.nan)
+    opens_f = np.where(opens >= 0, opens, np.nan)
+    out = pd.DataFrame({
+        "category": camp["category"], "country": camp["country"], "status": camp["status"],
+        "objective": camp["objective"], "campaign_id": camp["campaign_id"], "campaign_name": camp["campaign_name"],
+        "brand_name": camp["brand_name"], "primary_KPI": camp["primary_KPI"], "currency": camp["currency"],
+        "ad_group_id": camp["campaign_id"] + "_" + [profiles[c]["code"] for c in channel]
+                       + np.where(retargeting, "_RT_", "_PR_") + ordinal.astype(str).to_numpy(),
+        "start_date": camp["start_date"], "end_date": camp["end_date"],
+        "media_platform": [platforms[c][rng.integers(len(platforms[c]))] for c in channel],
+        "channel": channel, "ad_placement": [a[0] for a in ads], "ad_format": [a[1] for a in ads],
+        "sem_keyword_type": keyword,
+        "age_groups": np.array(AGE_GROUPS)[rng.integers(len(AGE_GROUPS), size=n)],
+        "genders": np.where(camp["category"].eq("Beauty").to_numpy() | (rng.random(n) < 0.3), "female", "all"),
+        "retargeting": np.where(retargeting, "TRUE", "FALSE"),
+        "interest": camp["category"].str.lower().str.replace(r"\W+", "_", regex=True),
+        "audience_type": np.where(retargeting, "retargeting", "prospecting"),
+        "billing_type": billing,
+        "billing_unit_cost": np.round(unit_cost, 2),
+        " budget ": fmt_int(budget), " actual_spend ": fmt_int(spend),
+        " impressions ": fmt_int(impressions), " clicks ": fmt_int(clicks),
+        " ctr ": np.round(clicks / impressions, 4),
+        " views ": fmt_opt(views_f, "{:,.0f}"), " vtr ": fmt_opt(views_f / impressions, "{:.4f}", missing="-"),
+        " opens ": fmt_opt(opens_f, "{:,.0f}"),
+        " sessions ": fmt_int(sessions), " conversions ": fmt_int(conversions),
+        " conversion_rate ": np.round(conversions / np.maximum(sessions, 1), 3),
+        " revenue ": fmt_int(revenue), " roas ": np.round(revenue / np.maximum(spend, 1), 1),
+    })
+    # Order sampling weight per ad group (conversions, at least 1)
+    return out[CAMPAIGN_HEADER], np.maximum(conversions, 1)
+
+
+# -----------------------------
+# Products
+# -----------------------------
+def vocab(templates, col, default):
+    values = templates[col].dropna().unique().tolist() if col in templates.columns else []
+    return values or default
+
+
+@traced("generate.products")
+def generate_products(brand_names, skus_per_brand, rng, catalog_path=CATALOG_PATH):
+    """
+    Returns products_v1 rows for every brand. Brands that are in the
+    hand-made catalog reuse its categories, product names and price levels;
+    others get generic products in their brands.json category.
+    """
+    catalog = pd.read_csv(catalog_path, encoding="utf-8-sig", usecols=range(len(PRODUCT_HEADER))) \
+        if os.path.exists(catalog_path) else pd.DataFrame(columns=PRODUCT_HEADER)
+    categories = {b["name"]: (b["id"], b["category"]) for b in load_json("brands.json")}
+    frames = []
+    for brand in brand_names:
+        templates = catalog[catalog["brand"] == brand]
+        if templates.empty:
+            brand_id, category = categories.get(brand, (brand.upper()[:3], "General"))
+            templates = pd.DataFrame([{
+                "category_level_1_id": brand_id, "category_level_1": category,
+                "category_level_2_id": f"{brand_id}-GEN", "category_level_2": category,
+                "brand": brand, "product_id": f"{brand_id}-P-", "product_name": f"{brand} {category} Item {j + 1}",
+                "SKU_id": f"{brand_id}-S-", "RRP": float(rng.uniform(10, 300)),
+            } for j in range(max(skus_per_brand // 4, 1))])
+        prefix = templates["SKU_id"].iloc[0].split("-S-")[0]
+        t = templates.iloc[rng.integers(len(templates), size=skus_per_brand)].reset_index(drop=True)
+        n = np.arange(1, skus_per_brand + 1)
+        size, color, feature = (
+            np.array(vocab(templates, col, default))[rng.integers(len(vocab(templates, col, default)), size=skus_per_brand)]
+            for col, default in (("size", SIZES), ("color", COLORS), ("other features", FEATURES))
+        )
+        product_no = t.groupby("product_name", sort=False).ngroup() + 1
+        frames.append(t.assign(
+            product_id=[f"{prefix}-P-{k:05d}" for k in product_no],
+            SKU_id=[f"{prefix}-S-{k:05d}" for k in n],
+            SKU_name=t["product_name"] + " - " + size + " - " + color + " - " + feature,
+            size=size, color=color, **{"other features": feature},
+            RRP=np.round(t["RRP"].astype(float).to_numpy() * rng.lognormal(0, 0.15, skus_per_brand), 2),
+        )[PRODUCT_HEADER])
+    return pd.concat(frames, ignore_index=True)
+
+
+# -----------------------------
+# Orders (chunked, parallel)
+# -----------------------------
+_context = None
+
+
+def build_order_context(campaigns, ad_groups, group_weights, products, seed, organic_share, customers):
+    """
+    Flattens everything an order chunk needs into arrays and pre-rendered
+    CSV fields (one pickle per worker instead of one per chunk).
+    """
+    brands = sorted(products["brand"].unique())
+    brand_index = {b: i for i, b in enumerate(brands)}
+    products = products.assign(_b=products["brand"].map(brand_index)).sort_values("_b", kind="stable")
+    brand_counts = np.bincount(products["_b"], minlength=len(brands))
+
+    camp_index = {c: i for i, c in enumerate(campaigns["campaign_id"])}
+    ag_camp = ad_groups["campaign_id"].map(camp_index).to_numpy()
+    order = np.argsort(ag_camp, kind="stable")
+    ag_weights = np.asarray(group_weights, dtype=float)[order]
+    cum = np.cumsum(ag_weights)
+    ag_counts = np.bincount(ag_camp, minlength=len(campaigns))
+    ag_start = np.concatenate([[0], np.cumsum(ag_counts)[:-1]])
+    camp_weight = np.bincount(ag_camp, weights=np.asarray(group_weights, dtype=float), minlength=len(campaigns))
+
+    start = pd.to_datetime(campaigns["start_date"]).to_numpy().astype("datetime64[D]").astype(np.int64)
+    end = pd.to_datetime(campaigns["end_date"]).to_numpy().astype("datetime64[D]").astype(np.int64)
+    day_lo, day_n = int(start.min()), int(end.max() - start.min() + 1)
+    return {
+        "seed": seed, "organic_share": organic_share, "customers": customers,
+        "camp_brand": campaigns["brand_name"].map(brand_index).fillna(0).to_numpy(dtype=np.int64),
+        "camp_p": camp_weight / camp_weight.sum(), "camp_start": start, "camp_days": end - start + 1,
+        "ag_cum": cum, "ag_lo": np.concatenate([[0.0], cum])[ag_start], "ag_tot": camp_weight,
+        "brand_lo": np.concatenate([[0], np.cumsum(brand_counts)[:-1]]), "brand_n": brand_counts,
+        "sku_rrp": products["RRP"].to_numpy(dtype=float), "day_lo": day_lo, "day_n": day_n,
+        # Pre-rendered CSV fields; the last campaign / ad group entry is "organic" / none
+        "brand_csv": [csv_field(b) for b in brands],
+        "brand_prefix": [b.lower().replace(" ", "")[:3] for b in brands],
+        "camp_csv": [(csv_field(i), csv_field(n)) for i, n in zip(campaigns["campaign_id"], campaigns["campaign_name"])]
+                    + [(ORGANIC, ORGANIC)],
+        "ag_csv": [csv_field(a) for a in ad_groups["ad_group_id"].to_numpy()[order]] + [""],
+        "sku_csv": [f"{csv_field(i)},{csv_field(n)}" for i, n in zip(products["SKU_id"], products["SKU_name"])],
+        "day_csv": np.datetime_as_string(np.arange(day_lo, day_lo + day_n).astype("datetime64[D]")).tolist(),
+    }
+
+
+def init_worker(context):
+    global _context
+    _context = context
+
+
+def generate_order_chunk(index, first, lines, group_share=0.4):
+    """
+    Returns rows [first, first + lines) of the order table as CSV text. The
+    chunk's random stream depends only on (seed, index).
+    """
+    c = _context
+    rng = np.random.default_rng([c["seed"], index])
+
+    # Orders (1 or more lines each) until the chunk is full
+    per_order = rng.geometric(0.4, size=lines // 2 + 16)
+    while per_order.sum() < lines:
+        per_order = np.concatenate([per_order, rng.geometric(0.4, size=16)])
+    n_orders = int(np.searchsorted(np.cumsum(per_order), lines)) + 1
+    per_order = per_order[:n_orders]
+    per_order[-1] -= per_order.sum() - lines
+
+    organic = rng.random(n_orders) < c["organic_share"]
+    camp = rng.choice(len(c["camp_p"]), size=n_orders, p=c["camp_p"])
+    brand = np.where(organic, rng.integers(len(c["brand_csv"]), size=n_orders), c["camp_brand"][camp])
+    day = np.where(organic, c["day_lo"] + rng.integers(0, c["day_n"], size=n_orders),
+                   c["camp_start"][camp] + (rng.random(n_orders) * c["camp_days"][camp]).astype(np.int64))
+    customer = rng.integers(1, c["customers"] + 1, size=n_orders)
+    order_no = first + np.arange(n_orders)
+
+    # Expand to lines; ad group (by conversions) and SKU (of the brand) per line
+    rep = lambda a: np.repeat(a, per_order)
+    organic, camp, brand = rep(organic), rep(camp), rep(brand)
+    with_group = ~organic & (rng.random(lines) < group_share)
+    pos = c["ag_lo"][camp] + rng.random(lines) * c["ag_tot"][camp]
+    group = np.minimum(np.searchsorted(c["ag_cum"], pos, side="right"), len(c["ag_csv"]) - 2)
+    sku = c["brand_lo"][brand] + (rng.random(lines) * c["brand_n"][brand]).astype(np.int64)
+    rrp = np.round(c["sku_rrp"][sku]).astype(np.int64)
+    asp = np.round(c["sku_rrp"][sku] * rng.uniform(0.8, 1.0, lines)).astype(np.int64)
+
+    # Rows are joined from the pre-rendered CSV fields (much faster than to_csv)
+    camp_i = np.where(organic, len(c["camp_csv"]) - 1, camp)
+    group_i = np.where(with_group, group, len(c["ag_csv"]) - 1)
+    day_i = rep(day) - c["day_lo"]
+    bc, cc, ac, pc, sc, dc = c["brand_csv"], c["camp_csv"], c["ag_csv"], c["brand_prefix"], c["sku_csv"], c["day_csv"]
+    return "".join(
+        f"cs_{cu},{bc[b]},{cc[ci][0]},{ac[g]},{cc[ci][1]},{pc[b]}_{no},{sc[k]},{dc[d]},{r},{a},1\n"
+        for cu, b, ci, g, no, k, d, r, a in zip(
+            rep(customer).tolist(), brand.tolist(), camp_i.tolist(), group_i.tolist(), rep(order_no).tolist(),
+            sku.tolist(), day_i.tolist(), rrp.tolist(), np.minimum(asp, rrp).tolist())
+    )
+
+
+@traced("generate.orders")
+def write_orders(path, context, n_lines, chunk_size=1_000_000, workers=1):
+    """
+    Writes ``n_lines`` order rows in chunks; with ``workers`` > 1 the chunks
+    are generated in a process pool (at most 2 per worker in flight) and
+    written in order.
+    """
+    chunks = [(i, first, min(chunk_size, n_lines - first)) for i, first in enumerate(range(0, n_lines, chunk_size))]
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        csv.writer(f, lineterminator="\n").writerow(ORDER_HEADER)
+        if workers <= 1:
+            init_worker(context)
+            for chunk in chunks:
+                f.write(generate_order_chunk(*chunk))
+            return
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(context,)) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(generate_order_chunk, *chunk))
+                if len(pending) >= 2 * workers:
+                    f.write(pending.popleft().result())
+            while pending:
+                f.write(pending.popleft().result())
+
+
+def generate(out_dir=OUT_DIR, n_campaigns=None, n_orders=1233, skus_per_brand=40, organic_share=0.2,
+             seed=42, workers=1, chunk_size=1_000_000):
+    """
+    Writes campaigns_v1.csv, products_v1.csv and orders_v1.csv to ``out_dir``
+    and returns {file: rows}.
+    """
+    rng = np.random.default_rng(seed)
+    campaigns = generate_campaigns(n_campaigns or len(load_json("campaigns_dictionary.json")), rng)
+    products = generate_products(sorted(campaigns["brand_name"].unique()), skus_per_brand, rng)
+    brand_aov = products.groupby("brand")["RRP"].mean()
+    ad_groups, weights = generate_ad_groups(campaigns, brand_aov, rng)
+
+    os.makedirs(out_dir, exist_ok=True)
+    with span("generate.write"):
+        ad_groups.to_csv(os.path.join(out_dir, "campaigns_v1.csv"), index=False, encoding="utf-8-sig")
+        products.to_csv(os.path.join(out_dir, "products_v1.csv"), index=False, encoding="utf-8-sig")
+    context = build_order_context(campaigns, ad_groups, weights, products, seed, organic_share,
+                                  customers=max(n_orders // 5, 100))
+    write_orders(os.path.join(out_dir, "orders_v1.csv"), context, n_orders, chunk_size, workers)
+    count("rows.orders", n_orders)
+    return {"campaigns_v1.csv": len(ad_groups), "products_v1.csv": len(products), "orders_v1.csv": n_orders}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", default=OUT_DIR)
+    parser.add_argument("--campaigns", type=int, default=None, help="Default: the campaigns dictionary")
+    parser.add_argument("--orders", type=int, default=1233, help="Order rows (lines)")
+    parser.add_argument("--skus-per-brand", type=int, default=40)
+    parser.add_argument("--organic-share", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=1_000_000, help="Order rows per chunk")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = generate(args.out, args.campaigns, args.orders, args.skus_per_brand, args.organic_share,
+                    args.seed, args.workers, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    print(f"[OK] {rows['campaigns_v1.csv']:,} ad groups, {rows['products_v1.csv']:,} SKUs, "
+          f"{rows['orders_v1.csv']:,} orders in {elapsed:.1f}s ({rows['orders_v1.csv'] / elapsed:,.0f} rows/s) -> {args.out}")
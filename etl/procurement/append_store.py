@@ -0,0 +1,435 @@
+"""
+Append-only storage for the procurement CSVs (suppliers, products, purchase
+orders, invoices) with primary-key indexes and incrementally maintained
+spend aggregates / risk scores.
+
+An append validates the whole batch first and rejects it (nothing is
+written) when a key already exists, a key repeats inside the batch, a
+row references a supplier / product / PO that is neither stored nor part
+of the batch, or a table has columns its stored header lacks. Valid rows are appended to the CSVs without rewriting them.
+
+Everything derived lives under <data_dir>/_index/:
+
+- <table>/seg-*.npy: sorted uint64 hashes of the table's keys, one segment
+  per append, memory-mapped for lookups
+- spend/seg-*.pkl: PO spend per (supplier, product), one segment per append
+- risk_scores.pkl: the last risk components per supplier
+- manifest.json: CSV sizes, company total spend, and the suppliers /
+  products touched since the last risk refresh
+
+Segments are merged size-tiered (the newest one into its predecessor while
+that is less than MERGE_RATIO times larger), so their count stays
+logarithmic and an append of k rows costs O(k log n) plus amortized
+merging, however long the history is. refresh_risks() rescores only the
+suppliers whose inputs may have changed and rewrites the two
+supplier-sized files (suppliers.csv, risks.csv); the PO history is never
+read again.
+
+When a CSV was changed outside the store (e.g. a full regeneration), its
+size no longer matches the manifest and the affected indexes / aggregates
+are rebuilt once from its key columns.
+"""
+import csv
+import hashlib
+import json
+import os
+import uuid
+import numpy as np
+import pandas as pd
+
+from etl.instrumentation import count, span, traced
+from etl.procurement.risk_calculator import RiskCalculator
+
+# file -> primary key, optional line column (several rows per key), {fk column: referenced file}
+SCHEMA = {
+    "suppliers.csv": {"key": "vendorCode", "refs": {}},
+    "products.csv": {"key": "sku", "refs": {}},
+    "purchase_orders.csv": {"key": "orderNumber", "line": "item",
+                            "refs": {"supplierVendorCode": "suppliers.csv", "productSku": "products.csv"}},
+    "invoices.csv": {"key": "invoiceNumber", "refs": {"poOrderNumber": "purchase_orders.csv"}},
+}
+INDEX_DIR = "_index"
+MERGE_RATIO = 4
+PAIR = ["supplierVendorCode", "productSku"]
+CONCENTRATION_TIER = 0.10  # lowest spend share with a spend concentration risk (RiskCalculator)
+
+
+class KeyCollisionError(ValueError):
+    pass
+
+
+def hash_keys(keys):
+    """
+    Stable 64-bit hashes of string keys (pandas' SipHash with its fixed key).
+    """
+    return pd.util.hash_array(np.asarray(keys, dtype=object).astype(str).astype(object))
+
+
+# -----------------------------
+# Segment logs
+# -----------------------------
+class SegmentLog:
+    suffix = ".npy"
+
+    def __init__(self, directory):
+        """
+        Size-tiered segments (seg-<n><suffix>) in ``directory``.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.segments = sorted(f for f in os.listdir(directory) if f.startswith("seg-") and f.endswith(self.suffix))
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def add(self, segment):
+        if not len(segment):
+            return
+        n = int(self.segments[-1][4:-len(self.suffix)]) + 1 if self.segments else 1
+        name = f"seg-{n:08d}{self.suffix}"
+        self._write(name, segment)
+        self.segments.append(name)
+        while len(self.segments) > 1:
+            last, prev = self._read(self.segments[-1]), self._read(self.segments[-2])
+            if len(prev) >= MERGE_RATIO * len(last):
+                break
+            merged = self._merge(prev, last)
+            os.remove(self._path(self.segments.pop()))
+            self._write(self.segments[-1], merged)
+
+    def _write(self, name, segment):
+        with open(self._path(name) + ".tmp", "wb") as f:
+            self._dump(segment, f)
+        os.replace(self._path(name) + ".tmp", self._path(name))
+
+    def clear(self):
+        for name in self.segments:
+            os.remove(self._path(name))
+        self.segments = []
+
+
+class KeyIndex(SegmentLog):
+    """
+    Sorted uint64 key hashes.
+    """
+    def _read(self, name):
+        return np.load(self._path(name), mmap_mode="r")
+
+    def _dump(self, hashes, f):
+        np.save(f, hashes)
+
+    def _merge(self, a, b):
+        return np.union1d(a, b)
+
+    def add(self, hashes):
+        super().add(np.unique(np.asarray(hashes, dtype=np.uint64)))
+
+    def contains(self, hashes):
+        """
+        Boolean mask of the hashes that are already indexed.
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        found = np.zeros(len(hashes), dtype=bool)
+        for name in self.segments:
+            seg = self._read(name)
+            if len(seg):
+                pos = np.minimum(np.searchsorted(seg, hashes), len(seg) - 1)
+                found |= seg[pos] == hashes
+        return found
+
+
+class SpendLog(SegmentLog):
+    """
+    orderTotalValue summed per (supplierVendorCode, productSku).
+    """
+    suffix = ".pkl"
+
+    def _read(self, name):
+        return pd.read_pickle(self._path(name))
+
+    def _dump(self, spend, f):
+        spend.to_pickle(f)
+
+    def _merge(self, a, b):
+        return pd.concat([a, b]).groupby(level=[0, 1]).sum()
+
+    def add(self, pos):
+        values = pd.to_numeric(pos["orderTotalValue"], errors="coerce").fillna(0.0).astype(float)
+        super().add(values.groupby([pos[c].astype(str) for c in PAIR]).sum())
+
+    def load(self):
+        parts = [self._read(name) for name in self.segments]
+        if not parts:
+            return pd.Series(dtype=float, index=pd.MultiIndex.from_tuples([], names=PAIR))
+        return parts[0] if len(parts) == 1 else self._merge(parts[0], pd.concat(parts[1:]))
+
+
+# -----------------------------
+# Store
+# -----------------------------
+class AppendStore:
+    def __init__(self, data_dir):
+        """
+        Opens (and, when the CSVs changed outside the store, re-indexes) the
+        procurement tables in ``data_dir``.
+        """
+        self.data_dir = data_dir
+        self.index_dir = os.path.join(data_dir, INDEX_DIR)
+        os.makedirs(self.index_dir, exist_ok=True)
+        self.indexes = {name: KeyIndex(os.path.join(self.index_dir, name[:-4])) for name in SCHEMA}
+        self.spend = SpendLog(os.path.join(self.index_dir, "spend"))
+        self.scores_path = os.path.join(self.index_dir, "risk_scores.pkl")
+        self.manifest = self._read_manifest()
+        self._sync()
+
+    def path(self, name):
+        return os.path.join(self.data_dir, name)
+
+    def _size(self, name):
+        return os.path.getsize(self.path(name)) if os.path.exists(self.path(name)) else 0
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.index_dir, "manifest.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"files": {}, "company_total_spend": 0.0, "dirty_vendors": [], "dirty_skus": []}
+
+    def _save(self):
+        self.manifest["files"] = {name: self._size(name) for name in SCHEMA}
+        path = os.path.join(self.index_dir, "manifest.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        os.replace(path + ".tmp", path)
+
+    def _sync(self):
+        """
+        Rebuilds the index of every CSV whose size differs from the manifest;
+        any external change also invalidates the cached risk scores.
+        """
+        stale = [name for name in SCHEMA if self.manifest["files"].get(name) != self._size(name)]
+        if not stale:
+            return
+        for name in stale:
+            self._reindex(name)
+        if "purchase_orders.csv" in stale:
+            self._rebuild_spend()
+        if os.path.exists(self.scores_path):
+            os.remove(self.scores_path)
+        self._save()
+
+    @traced("append_store.reindex")
+    def _reindex(self, name):
+        index = self.indexes[name]
+        index.clear()
+        if os.path.exists(self.path(name)):
+            key = SCHEMA[name]["key"]
+            keys = pd.read_csv(self.path(name), usecols=[key], dtype=str)[key]
+            index.add(hash_keys(keys.dropna().unique()))
+
+    @traced("append_store.rebuild_spend")
+    def _rebuild_spend(self):
+        self.spend.clear()
+        self.manifest.update({"company_total_spend": 0.0, "dirty_vendors": [], "dirty_skus": []})
+        if os.path.exists(self.path("purchase_orders.csv")):
+            pos = pd.read_csv(self.path("purchase_orders.csv"), usecols=PAIR + ["orderTotalValue"],
+                              dtype={c: str for c in PAIR})
+            self._add_spend(pos)
+
+    def _add_spend(self, pos):
+        self.spend.add(pos)
+        self.manifest["company_total_spend"] += float(pd.to_numeric(pos["orderTotalValue"], errors="coerce").sum())
+        self._touch("dirty_vendors", pos["supplierVendorCode"])
+        self._touch("dirty_skus", pos["productSku"])
+
+    def _touch(self, key, values):
+        self.manifest[key] = sorted(set(self.manifest[key]).union(values.astype(str)))
+
+    def read(self, name, **kwargs):
+        """
+        Reads a whole table (meant for the supplier / product tables).
+        """
+        return pd.read_csv(self.path(name), **kwargs) if os.path.exists(self.path(name)) else pd.DataFrame()
+
+    # -----------------------------
+    # Append
+    # -----------------------------
+    def header(self, name):
+        """
+        Column names of the stored file (None when it is missing or empty).
+        """
+        path = self.path(name)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return None
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return next(csv.reader(f))
+
+    def validate(self, batch):
+        """
+        Returns (problems, key hashes per file) for ``batch`` ({file: DataFrame}).
+        """
+        problems = []
+        hashes = {}
+        for name, df in batch.items():
+            spec = SCHEMA[name]
+            header = self.header(name)
+            extra = [c for c in df.columns if header is not None and c not in header]
+            if extra:
+                problems.append(f"{name}: columns not in the stored header: {extra}")
+            keys = df[spec["key"]].astype(str).unique()
+            hashes[name] = hash_keys(keys)
+            existing = self.indexes[name].contains(hashes[name])
+            if existing.any():
+                problems.append(f"{name}: {int(existing.sum())} {spec['key']} values already stored "
+                                f"(e.g. {keys[existing][0]})")
+            line = [spec["key"], spec["line"]] if "line" in spec else [spec["key"]]
+            dupes = df.duplicated(line)
+            if dupes.any():
+                problems.append(f"{name}: {int(dupes.sum())} duplicate {'/'.join(line)} rows in the batch")
+        for name, df in batch.items():
+            for col, target in SCHEMA[name]["refs"].items():
+                refs = df[col].astype(str).unique()
+                ok = self.indexes[target].contains(hash_keys(refs))
+                if target in batch:
+                    ok |= np.isin(refs, batch[target][SCHEMA[target]["key"]].astype(str).unique())
+                if not ok.all():
+                    problems.append(f"{name}: {int((~ok).sum())} {col} values not found in {target} "
+                                    f"(e.g. {refs[~ok][0]})")
+        return problems, hashes
+
+    @traced("append_store.append")
+    def append(self, batch):
+        """
+        Appends ``batch`` ({file: DataFrame or list of records}) after
+        validating all of it; raises KeyCollisionError without writing
+        anything when a problem is found. Returns {file: rows appended}.
+        """
+        batch = {name: pd.DataFrame(rows) for name, rows in batch.items() if len(rows)}
+        unknown = set(batch) - set(SCHEMA)
+        if unknown:
+            raise ValueError(f"Not an append-only table: {sorted(unknown)}")
+        problems, hashes = self.validate(batch)
+        if problems:
+            raise KeyCollisionError("; ".join(problems))
+
+        appended = {}
+        for name in SCHEMA:  # referenced tables first
+            if name not in batch:
+                continue
+            with span("append_store.write", table=name):
+                self._append_rows(name, batch[name])
+            self.indexes[name].add(hashes[name])
+            appended[name] = len(batch[name])
+            count(f"rows.appended.{name[:-4]}", len(batch[name]))
+        if "purchase_orders.csv" in batch:
+            self._add_spend(batch["purchase_orders.csv"])
+        if "suppliers.csv" in batch:
+            self._touch("dirty_vendors", batch["suppliers.csv"]["vendorCode"])
+        self._save()
+        return appended
+
+    def _append_rows(self, name, df):
+        path = self.path(name)
+        header = self.header(name)
+        if header is None:
+            df.to_csv(path, index=False)
+            return
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+        with open(path, "a", encoding="utf-8", newline="") as f:
+            if needs_newline:
+                f.write("\n")
+            df.reindex(columns=header).to_csv(f, header=False, index=False)
+
+    # -----------------------------
+    # Risk scores
+    # -----------------------------
+    def affected_suppliers(self, spend, critical, total_spend):
+        """
+        Suppliers whose cached risk may be outdated: touched since the last
+        refresh, holding a critical product whose total spend changed, or
+        large enough for the grown company total to move their spend
+        concentration tier.
+        """
+        affected = set(self.manifest["dirty_vendors"])
+        dirty_critical = list(critical.intersection(self.manifest["dirty_skus"]))
+        if dirty_critical:
+            holders = spend.index.get_level_values(1).isin(dirty_critical)
+            affected.update(spend.index.get_level_values(0)[holders])
+        floor = CONCENTRATION_TIER * self.manifest.get("scored_total_spend", 0.0)
+        affected.update(total_spend.index[total_spend >= floor])
+        return affected
+
+    @traced("append_store.refresh_risks")
+    def refresh_risks(self, country_risk_map):
+        """
+        Rescores the affected suppliers from the spend aggregates, then
+        rewrites risks.csv (their rows replaced) and the suppliers'
+        riskScore. Returns the risk rows.
+        """
+        suppliers = self.read("suppliers.csv")
+        products = self.read("products.csv", usecols=["sku", "isCritical"])
+        critical = set(products.loc[products["isCritical"].astype(str) == "True", "sku"].astype(str))
+        spend = self.spend.load()
+        total_spend = spend.groupby(level=0).sum()
+        critical_spend = spend[spend.index.get_level_values(1).isin(list(critical))]
+        vendors = suppliers["vendorCode"].astype(str)
+
+        # Cached scores are only valid for the same country risk map
+        map_key = hashlib.sha1(json.dumps(country_risk_map, sort_keys=True).encode("utf-8")).hexdigest()
+        cached = None
+        if self.manifest.get("risk_map") == map_key and os.path.exists(self.scores_path):
+            cached = pd.read_pickle(self.scores_path)
+        if cached is None:
+            changed = vendors
+        else:
+            affected = self.affected_suppliers(spend, critical, total_spend)
+            changed = vendors[vendors.isin(affected) | ~vendors.isin(cached.index)]
+
+        calculator = RiskCalculator(country_risk_map, self.manifest["company_total_spend"])
+        pair_spend = critical_spend[critical_spend.index.get_level_values(0).isin(changed)]
+        fresh = calculator.score_from_spend(suppliers.loc[changed.index], total_spend, pair_spend,
+                                            critical_spend.groupby(level=1).sum())
+        fresh.index = changed.values
+        scores = fresh if cached is None else pd.concat([cached.drop(fresh.index, errors="ignore"), fresh])
+        count("risk.rescored", len(fresh))
+
+        suppliers["riskScore"] = vendors.map(scores["total_risk"]).values
+        suppliers.to_csv(self.path("suppliers.csv"), index=False)
+        risks = risk_rows(fresh)
+        if cached is not None and os.path.exists(self.path("risks.csv")):
+            old = self.read("risks.csv")
+            risks = pd.concat([old[~old["supplierVendorCode"].astype(str).isin(fresh.index)], risks])
+            # Keep the supplier order of the generator's output
+            position = pd.Series(np.arange(len(vendors)), index=vendors.values)
+            risks = risks.iloc[np.argsort(risks["supplierVendorCode"].astype(str).map(position).values,
+                                          kind="stable")]
+        risks.to_csv(self.path("risks.csv"), index=False)
+
+        scores.to_pickle(self.scores_path)
+        self.manifest.update({"risk_map": map_key, "dirty_vendors": [], "dirty_skus": [],
+                              "scored_total_spend": self.manifest["company_total_spend"]})
+        self._save()
+        return risks
+
+
+def risk_rows(scores):
+    """
+    risks.csv rows (one per supplier and risk component, as written by the
+    procurement generator) for ``scores`` indexed by vendorCode.
+    """
+    components = [c for c in scores.columns if c != "total_risk"]
+    long = scores[components].stack()
+    vendors = pd.Index(long.index.get_level_values(0).astype(str))
+    titles = pd.Index(long.index.get_level_values(1)).str.replace("_", " ").str.title()
+    values = pd.Index([f"{v:g}" for v in long.values])
+    return pd.DataFrame({
+        "riskId": [f"RISK-{uuid.uuid4().hex[:8]}" for _ in range(len(long))],
+        "supplierVendorCode": vendors,
+        "riskType": titles,
+        "riskScore": long.values,
+        "riskDescription": titles + " for supplier " + vendors + " is " + values + ".",
+        "mitigationPlan": "N/A",
+        "riskStatus": "Active",
+    })
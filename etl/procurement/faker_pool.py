@@ -0,0 +1,145 @@
+"""
+Faker helpers for the procurement generator:
+
+- locale validity is checked against faker.config.AVAILABLE_LOCALES instead
+  of instantiating Faker per candidate, and the resolved country -> locale
+  map is persisted (keyed by the Faker version and a hash of the inputs), so
+  later runs skip resolution entirely
+- FakerPool keeps one seeded Faker per locale for the whole process and
+  hands out addresses / names from buffers filled in bulk, so the per-row
+  cost no longer includes constructing Faker (or loading its providers)
+
+Each worker process should use its own stream (get_pool(seed, stream=i));
+the instances are seeded from (seed, stream, locale), so a run is
+reproducible for a fixed seed and worker count.
+"""
+import hashlib
+import json
+import locale as pylocale
+import os
+import zlib
+from collections import deque
+
+from faker import Faker, VERSION as FAKER_VERSION
+from faker.config import AVAILABLE_LOCALES
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+LOCALE_CACHE_PATH = os.path.join(ROOT_DIR, "data", "processed", "faker_locales.json")
+DEFAULT_LOCALE = "en_US"
+
+
+# -----------------------------
+# Locale resolution cache
+# -----------------------------
+def is_available_locale(locale):
+    """
+    True when Faker(locale) would succeed; uses the same normalization as
+    faker.Factory.create ("-" -> "_", then locale.normalize), without
+    building the providers.
+    """
+    if not locale:
+        return False
+    return pylocale.normalize(locale.replace("-", "_")).split(".")[0] in AVAILABLE_LOCALES
+
+
+def locale_cache_key(*inputs):
+    """
+    Key of a resolution result: Faker version plus a hash of the inputs
+    (mapping, overrides, default locale).
+    """
+    digest = hashlib.sha1(json.dumps(inputs, sort_keys=True).encode("utf-8")).hexdigest()
+    return f"{FAKER_VERSION}:{digest}"
+
+
+def load_locale_cache(key, path=LOCALE_CACHE_PATH):
+    """
+    Returns (mapping, report) stored under ``key``, or None.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get("key") != key:
+        return None
+    return cached["mapping"], cached["report"]
+
+
+def save_locale_cache(key, mapping, report, path=LOCALE_CACHE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"key": key, "faker_version": FAKER_VERSION, "mapping": mapping, "report": report}, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+# -----------------------------
+# Per-locale pool
+# -----------------------------
+class FakerPool:
+    def __init__(self, seed=None, stream=0, batch=256, default_locale=DEFAULT_LOCALE):
+        """
+        Lazily creates one Faker per locale and buffers bulk-generated values.
+
+        Args:
+            seed (int): Base seed; None leaves the instances unseeded.
+            stream (int): Worker index, so parallel workers draw different values.
+            batch (int): Values generated per buffer refill.
+        """
+        self.seed = seed
+        self.stream = stream
+        self.batch = batch
+        self.default_locale = default_locale
+        self._fakers = {}
+        self._buffers = {}
+
+    def get(self, locale=None):
+        locale = locale or self.default_locale
+        fake = self._fakers.get(locale)
+        if fake is None:
+            fake = Faker(locale)
+            if self.seed is not None:
+                fake.seed_instance(zlib.crc32(f"{self.seed}:{self.stream}:{locale}".encode("utf-8")))
+            self._fakers[locale] = fake
+        return fake
+
+    def _take(self, kind, locale, make, n):
+        buf = self._buffers.setdefault((kind, locale), deque())
+        if len(buf) < n:
+            fake = self.get(locale)
+            buf.extend(make(fake) for _ in range(max(n - len(buf), self.batch)))
+        return [buf.popleft() for _ in range(n)]
+
+    def addresses(self, locale, n):
+        """
+        ``n`` single-line addresses for ``locale``, generated in bulk.
+        """
+        return self._take("address", locale, lambda f: " ".join(
+            line.strip() for line in f.address().splitlines() if line.strip()), n)
+
+    def address(self, locale=None):
+        return self.addresses(locale or self.default_locale, 1)[0]
+
+    def names(self, n, locale=None):
+        return self._take("name", locale or self.default_locale, lambda f: f.name(), n)
+
+    def name(self, locale=None):
+        return self.names(1, locale)[0]
+
+
+_pools = {}
+
+
+def get_pool(seed=None, stream=0):
+    """
+    Returns this process's FakerPool for (seed, stream). Forked children
+    inherit the parent's registry, so pools are keyed by pid as well: a
+    child never reuses the parent's pool (and its random state), and its
+    first lookup evicts the pools of other pids.
+    """
+    key = (os.getpid(), seed, stream)
+    pool = _pools.get(key)
+    if pool is None:
+        for k in [k for k in _pools if k[0] != key[0]]:
+            del _pools[k]
+        pool = _pools[key] = FakerPool(seed=seed, stream=stream)
+    return pool
@@ -0,0 +1,328 @@
+"""
+Partitioned, gzip-compressed layout of the procurement fact tables, so
+time-bounded reads and incremental jobs only open the partitions they need:
+
+    <root>/purchase_orders/month=2025-05/region=europe/part-00000.csv.gz
+    <root>/invoices/month=2025-05/part-00000.csv.gz
+    <root>/<table>/_stats.json
+
+POs are partitioned by dateIssued month and supplier region
+(etl/procurement/regions.py), invoices by dateCreated month. _stats.json
+holds per partition its files, row count, compressed size, the min / max
+of the date and numeric columns, and the version (a counter bumped by every
+write) that last touched it; appends add part files, so each file keeps the
+version it was written in. It also records the size and mtime of the flat
+<table>.csv next to the layout as of the last write: the flat CSVs are the
+source of truth (the layout is gitignored), so a layout whose CSV has
+changed since (git pull, a run without the layout) is stale.
+
+Readers prune partitions by region and the recorded min / max of the date
+column, read only the requested columns, and with ``changed_since`` only
+the files written after that version (incremental jobs). read_procurement()
+reads a table from this layout when a current one exists under a
+procurement directory and falls back to the flat CSV; iter_procurement()
+streams it in chunks.
+
+Usage (from the repository root), to build the layout from the flat CSVs:
+    python -m etl.procurement.partitioned_store --src data/raw
+"""
+import argparse
+import json
+import os
+import shutil
+import pandas as pd
+
+from etl.instrumentation import count, traced
+from etl.procurement.regions import UNKNOWN_REGION, country_region
+
+LAYOUT = {
+    "purchase_orders": {"date": "dateIssued", "region": "supplierVendorCode"},
+    "invoices": {"date": "dateCreated"},
+}
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+NO_MONTH = "none"
+STATS_FILE = "_stats.json"
+
+
+def table_dir(root, table):
+    return os.path.join(root, table)
+
+
+def has_layout(root, table):
+    return os.path.exists(os.path.join(table_dir(root, table), STATS_FILE))
+
+
+def source_stamp(root, table):
+    """
+    {"size", "mtime_ns"} of the flat <table>.csv under ``root`` (None if missing).
+    """
+    try:
+        st = os.stat(os.path.join(root, f"{table}.csv"))
+    except OSError:
+        return None
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def layout_is_current(root, table):
+    """
+    True if the table has a layout and the flat CSV next to it (if any) is
+    unchanged since the layout was last written.
+    """
+    if not has_layout(root, table):
+        return False
+    stamp = source_stamp(root, table)
+    if stamp is not None and load_stats(root, table).get("source") != stamp:
+        count(f"partitions.stale.{table}")
+        return False
+    return True
+
+
+def month_bounds(month):
+    """
+    Returns the (first, last) timestamp of a "YYYY-MM" month, inclusive.
+    """
+    start = pd.Timestamp(month + "-01")
+    return start, start + pd.offsets.MonthBegin(1) - pd.Timedelta(seconds=1)
+
+
+def supplier_regions(suppliers):
+    """
+    vendorCode -> region Series from a suppliers DataFrame (vendorCode, country).
+    """
+    return pd.Series(suppliers["country"].map(country_region).values, index=suppliers["vendorCode"].values)
+
+
+# -----------------------------
+# Stats
+# -----------------------------
+def load_stats(root, table):
+    try:
+        with open(os.path.join(table_dir(root, table), STATS_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"version": 0, "columns": [], "partitions": {}}
+
+
+def save_stats(root, table, stats):
+    path = os.path.join(table_dir(root, table), STATS_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(stats, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def column_ranges(part, date_col, dates):
+    """
+    (min, max) dicts of the date column (as text) and the numeric columns.
+    """
+    lo, hi = {}, {}
+    valid = dates.dropna()
+    if len(valid):
+        lo[date_col], hi[date_col] = valid.min().strftime(DATE_FORMAT), valid.max().strftime(DATE_FORMAT)
+    for col in part.select_dtypes("number").columns:
+        if part[col].notna().any():
+            lo[col], hi[col] = float(part[col].min()), float(part[col].max())
+    return lo, hi
+
+
+def merge_ranges(entry, lo, hi):
+    for col, value in lo.items():
+        entry["min"][col] = min(entry["min"].get(col, value), value)
+    for col, value in hi.items():
+        entry["max"][col] = max(entry["max"].get(col, value), value)
+
+
+# -----------------------------
+# Write
+# -----------------------------
+def partition_paths(df, table, regions=None):
+    """
+    Returns (partition path per row, parsed dates) for ``df``; ``regions``
+    maps vendorCode -> region (rows of unknown suppliers go to "other").
+    """
+    spec = LAYOUT[table]
+    dates = pd.to_datetime(df[spec["date"]], format=DATE_FORMAT, errors="coerce")
+    paths = "month=" + dates.dt.strftime("%Y-%m").fillna(NO_MONTH)
+    if "region" in spec:
+        region = df[spec["region"]].map(regions) if regions is not None else pd.Series(index=df.index, dtype=object)
+        paths = paths + "/region=" + region.fillna(UNKNOWN_REGION).astype(str)
+    return paths, dates
+
+
+@traced("partitions.append")
+def append_partitions(root, table, df, regions=None):
+    """
+    Writes ``df`` as one new part file in every partition it touches and
+    updates the stats; other partitions are not opened. The flat CSV is
+    expected to hold the rows already (it is stamped as the layout's
+    source). Returns the touched partition paths.
+    """
+    spec = LAYOUT[table]
+    stats = load_stats(root, table)
+    if stats["columns"]:
+        if set(df.columns) != set(stats["columns"]):
+            raise ValueError(f"{table}: columns differ from the stored layout: {sorted(set(df.columns) ^ set(stats['columns']))}")
+        df = df[stats["columns"]]
+    stats["columns"] = list(df.columns)
+    stats["version"] += 1
+    paths, dates = partition_paths(df, table, regions)
+    touched = []
+    for path, part in df.groupby(paths.values, sort=True):
+        directory = os.path.join(table_dir(root, table), path)
+        os.makedirs(directory, exist_ok=True)
+        entry = stats["partitions"].setdefault(path, {"files": [], "rows": 0, "bytes": 0, "min": {}, "max": {}})
+        name = f"part-{len(entry['files']):05d}.csv.gz"
+        part.to_csv(os.path.join(directory, name), index=False, compression="gzip")
+        entry["files"].append({"name": name, "rows": len(part), "version": stats["version"]})
+        entry["rows"] += len(part)
+        entry["bytes"] += os.path.getsize(os.path.join(directory, name))
+        entry["version"] = stats["version"]
+        merge_ranges(entry, *column_ranges(part, spec["date"], dates.loc[part.index]))
+        touched.append(path)
+    stats["source"] = source_stamp(root, table)
+    save_stats(root, table, stats)
+    count(f"partitions.written.{table}", len(touched))
+    return touched
+
+
+def write_partitions(root, table, df, regions=None):
+    """
+    Replaces the table's layout with ``df``.
+    """
+    shutil.rmtree(table_dir(root, table), ignore_errors=True)
+    os.makedirs(table_dir(root, table))
+    return append_partitions(root, table, df, regions)
+
+
+# -----------------------------
+# Read
+# -----------------------------
+def select_partitions(root, table, date_from=None, date_to=None, regions=None, changed_since=None):
+    """
+    Returns [(path, stats entry)] of the partitions that can hold rows with
+    date_from <= date <= date_to (inclusive, either may be None), a supplier
+    region in ``regions``, and were written after version ``changed_since``.
+    """
+    date_col = LAYOUT[table]["date"]
+    lo = pd.Timestamp(date_from).strftime(DATE_FORMAT) if date_from is not None else None
+    hi = pd.Timestamp(date_to).strftime(DATE_FORMAT) if date_to is not None else None
+    selected = []
+    for path, entry in sorted(load_stats(root, table)["partitions"].items()):
+        if changed_since is not None and entry["version"] <= changed_since:
+            continue
+        if regions is not None and "region" in LAYOUT[table]:
+            if path.split("/region=")[1] not in regions:
+                continue
+        if lo is not None or hi is not None:
+            # Partitions without valid dates cannot match a date bound
+            if date_col not in entry["min"]:
+                continue
+            if (lo is not None and entry["max"][date_col] < lo) or (hi is not None and entry["min"][date_col] > hi):
+                continue
+        selected.append((path, entry))
+    return selected
+
+
+@traced("partitions.read")
+def read_partitions(root, table, columns=None, date_from=None, date_to=None, regions=None, changed_since=None):
+    """
+    Reads the selected partitions (only ``columns``; with ``changed_since``
+    only files written after that version) and drops the rows outside the
+    date bounds.
+    """
+    stats = load_stats(root, table)
+    date_col = LAYOUT[table]["date"]
+    selected = select_partitions(root, table, date_from, date_to, regions, changed_since)
+    count(f"partitions.read.{table}", len(selected))
+    count(f"partitions.pruned.{table}", len(stats["partitions"]) - len(selected))
+
+    bounded = date_from is not None or date_to is not None
+    usecols = None if columns is None else list(dict.fromkeys(list(columns) + ([date_col] if bounded else [])))
+    frames = [
+        pd.read_csv(os.path.join(table_dir(root, table), path, f["name"]), usecols=usecols, compression="gzip")
+        for path, entry in selected for f in entry["files"]
+        if changed_since is None or f["version"] > changed_since
+    ]
+    if not frames:
+        return pd.DataFrame(columns=usecols or stats["columns"])
+    df = filter_dates(pd.concat(frames, ignore_index=True), table, date_from, date_to)
+    return df if columns is None else df[list(columns)]
+
+
+def filter_dates(df, table, date_from=None, date_to=None):
+    """
+    Keeps the rows with date_from <= date <= date_to (the table's partition date).
+    """
+    if date_from is None and date_to is None:
+        return df
+    dates = pd.to_datetime(df[LAYOUT[table]["date"]], format=DATE_FORMAT, errors="coerce")
+    keep = dates.notna()
+    if date_from is not None:
+        keep &= dates >= pd.Timestamp(date_from)
+    if date_to is not None:
+        keep &= dates <= pd.Timestamp(date_to)
+    return df[keep].reset_index(drop=True)
+
+
+def read_procurement(procurement_dir, table, columns=None, date_from=None, date_to=None, date_cols=()):
+    """
+    Reads a procurement table ("purchase_orders", "invoices", ...) from the
+    partitioned layout when ``procurement_dir`` has a current one, else from
+    <table>.csv, and parses ``date_cols``.
+    """
+    if table in LAYOUT and layout_is_current(procurement_dir, table):
+        df = read_partitions(procurement_dir, table, columns, date_from, date_to)
+    else:
+        bounded = date_from is not None or date_to is not None
+        usecols = None if columns is None else list(dict.fromkeys(
+            list(columns) + ([LAYOUT[table]["date"]] if bounded else [])))
+        df = pd.read_csv(os.path.join(procurement_dir, f"{table}.csv"), usecols=usecols)
+        if bounded:
+            df = filter_dates(df, table, date_from, date_to)
+        if columns is not None:
+            df = df[list(columns)]
+    for col in date_cols:
+        df[col] = pd.to_datetime(df[col], errors="coerce")
+    return df
+
+
+def iter_procurement(procurement_dir, table, columns=None, chunksize=1_000_000, dtype=None):
+    """
+    Yields a procurement table in DataFrames of at most ``chunksize`` rows
+    (part file by part file for the partitioned layout), so tables larger
+    than memory can be streamed. ``dtype`` is passed to read_csv.
+    """
+    if table in LAYOUT and layout_is_current(procurement_dir, table):
+        for path, entry in select_partitions(procurement_dir, table):
+            for f in entry["files"]:
+                yield from pd.read_csv(os.path.join(table_dir(procurement_dir, table), path, f["name"]),
+                                       usecols=columns, compression="gzip", chunksize=chunksize, dtype=dtype)
+    else:
+        yield from pd.read_csv(os.path.join(procurement_dir, f"{table}.csv"), usecols=columns, chunksize=chunksize,
+                               dtype=dtype)
+
+
+# -----------------------------
+# Conversion
+# -----------------------------
+def convert(src, out=None):
+    """
+    (Re)builds the layout of every partitioned table from the flat CSVs in
+    ``src`` under ``out`` (default: ``src``). Returns {table: partitions}.
+    """
+    out = out or src
+    regions = supplier_regions(pd.read_csv(os.path.join(src, "suppliers.csv"), usecols=["vendorCode", "country"]))
+    return {table: len(write_partitions(out, table, pd.read_csv(os.path.join(src, f"{table}.csv")), regions))
+            for table in LAYOUT}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--src", required=True, help="Directory with the flat procurement CSVs")
+    parser.add_argument("--out", default=None, help="Layout root (default: --src)")
+    args = parser.parse_args()
+    for table, n in convert(args.src, args.out).items():
+        print(f"[OK] {table}: {n} partitions -> {table_dir(args.out or args.src, table)}")
+
+
+if __name__ == "__main__":
+    main()
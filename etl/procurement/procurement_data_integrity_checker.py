@@ -1,21 +1,27 @@
+import argparse
 import pandas as pd
 import os
+import sys
 
-def check_data_integrity():
+from etl.procurement.partitioned_store import read_procurement
+
+def check_data_integrity(data_dir=None):
     """
     Validates the integrity of foreign key linkages in the generated dataset.
+    Returns True when every check passed.
     """
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_dir = os.path.join(script_dir, '../../data/raw')
+    if data_dir is None:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        data_dir = os.path.join(script_dir, '../../data/raw')
 
     try:
-        suppliers_df = pd.read_csv(os.path.join(data_dir, 'suppliers.csv'))
-        products_df = pd.read_csv(os.path.join(data_dir, 'products.csv'))
-        po_df = pd.read_csv(os.path.join(data_dir, 'purchase_orders.csv'))
-        invoices_df = pd.read_csv(os.path.join(data_dir, 'invoices.csv'))
+        suppliers_df = pd.read_csv(os.path.join(data_dir, 'suppliers.csv'), usecols=['vendorCode'])
+        products_df = pd.read_csv(os.path.join(data_dir, 'products.csv'), usecols=['sku'])
+        po_df = read_procurement(data_dir, 'purchase_orders', ['orderNumber', 'supplierVendorCode', 'productSku'])
+        invoices_df = read_procurement(data_dir, 'invoices', ['poOrderNumber'])
     except FileNotFoundError as e:
         print(f"Error loading data files: {e}")
-        return
+        return False
 
     print("--- Starting Data Integrity Checks ---")
 
@@ -53,6 +59,10 @@ def check_data_integrity():
         print("Missing poOrderNumbers:", missing_pos)
 
     print("\n--- Data Integrity Checks Complete ---")
+    return not (missing_suppliers or missing_products or missing_pos)
 
 if __name__ == '__main__':
-    check_data_integrity()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--data-dir', default=None, help='Directory with the procurement CSVs (default: data/raw)')
+    args = parser.parse_args()
+    sys.exit(0 if check_data_integrity(args.data_dir) else 1)
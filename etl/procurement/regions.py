@@ -0,0 +1,43 @@
+"""
+Supplier region groups, shared by the procurement generator (sampling of
+supplier countries) and the partitioned layout (region partitions).
+"""
+
+domestic = ['Germany']
+
+europe = [
+    'France','Italy','United Kingdom','Spain','Netherlands','Belgium','Austria',
+    'Switzerland','Portugal','Ireland','Denmark','Norway','Sweden','Finland','Poland',
+    'Czech Republic','Slovakia','Hungary','Romania','Bulgaria','Croatia','Slovenia',
+    'Estonia','Latvia','Lithuania','Greece','Luxembourg'
+]
+
+americas = [
+    'United States','Canada','Mexico','Brazil','Argentina','Chile','Colombia','Peru',
+    'Venezuela','Uruguay'
+]
+
+asia_oceania = [
+    'China','Japan','South Korea','India','Indonesia','Malaysia','Singapore','Thailand',
+    'Vietnam','Philippines','Pakistan','Bangladesh','Sri Lanka','Australia','New Zealand'
+]
+
+mena_africa = [
+    'Turkey','Israel','United Arab Emirates','Saudi Arabia','Egypt','Morocco','Algeria',
+    'Tunisia','South Africa','Nigeria','Kenya','Ghana'
+]
+
+region_map = {
+    'domestic': domestic,
+    'europe': europe,
+    'americas': americas,
+    'asia_oceania': asia_oceania,
+    'mena_africa': mena_africa
+}
+
+UNKNOWN_REGION = 'other'
+COUNTRY_REGIONS = {country: region for region, countries in region_map.items() for country in countries}
+
+
+def country_region(country):
+    return COUNTRY_REGIONS.get(country, UNKNOWN_REGION)
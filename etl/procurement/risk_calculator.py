@@ -1,3 +1,6 @@
+import pandas as pd
+
+
 class RiskCalculator:
     def __init__(self, country_risk_map, company_total_spend):
         """
@@ -106,3 +109,56 @@ class RiskCalculator:
             "spend_concentration_risk": spend_concentration_risk,
             "total_risk": min(total_risk, 100)
         }
+
+    def score_suppliers(self, suppliers_df, po_df, products_df):
+        """
+        Scores every supplier with calculate_supplier_risk, aggregating the PO
+        lines once with groupby instead of filtering them per supplier.
+
+        Args:
+            suppliers_df (pd.DataFrame): vendorCode, country, financialHealth.
+            po_df (pd.DataFrame): supplierVendorCode, productSku, orderTotalValue.
+            products_df (pd.DataFrame): sku, isCritical.
+
+        Returns:
+            pd.DataFrame: One row per supplier (same index) with the risk components and total_risk.
+        """
+        critical = set(products_df.loc[products_df["isCritical"].astype(str) == "True", "sku"])
+        total_spend = po_df.groupby("supplierVendorCode")["orderTotalValue"].sum()
+        critical_pos = po_df[po_df["productSku"].isin(critical)]
+        pair_spend = critical_pos.groupby(["supplierVendorCode", "productSku"])["orderTotalValue"].sum()
+        return self.score_from_spend(suppliers_df, total_spend, pair_spend)
+
+    def score_from_spend(self, suppliers_df, total_spend, pair_spend, item_spend=None):
+        """
+        Scores every supplier from pre-aggregated spend (e.g. the running
+        aggregates of the append store) instead of PO lines.
+
+        Args:
+            suppliers_df (pd.DataFrame): vendorCode, country, financialHealth.
+            total_spend (pd.Series): Spend per supplierVendorCode.
+            pair_spend (pd.Series): Spend per (supplierVendorCode, productSku), critical items only.
+            item_spend (pd.Series): Spend per productSku over all suppliers; defaults to
+                pair_spend summed per product (pass it when pair_spend covers only some suppliers).
+
+        Returns:
+            pd.DataFrame: One row per supplier (same index) with the risk components and total_risk.
+        """
+        pairs = pair_spend.rename("orderTotalValue").reset_index()
+        if item_spend is None:
+            item_spend = pair_spend.groupby(level=1).sum()
+        pairs["total_item_spend"] = pairs["productSku"].map(item_spend)
+        critical_items = {}
+        for vendor, s, t in zip(pairs["supplierVendorCode"], pairs["orderTotalValue"], pairs["total_item_spend"]):
+            critical_items.setdefault(vendor, []).append({"supplier_spend": s, "total_item_spend": t})
+
+        rows = [
+            self.calculate_supplier_risk({
+                "country": r.country,
+                "financial_health_status": r.financialHealth,
+                "total_spend": total_spend.get(r.vendorCode, 0.0),
+                "critical_items": critical_items.get(r.vendorCode, []),
+            })
+            for r in suppliers_df[["vendorCode", "country", "financialHealth"]].itertuples(index=False)
+        ]
+        return pd.DataFrame(rows, index=suppliers_df.index)
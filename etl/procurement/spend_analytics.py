@@ -0,0 +1,415 @@
+"""
+spend_analytics.py
+
+Materialized spend rollups over the procurement category tree
+(ontologies/procurement_v0.9.md, compiled by etl/taxonomy.py).
+
+Every PO line is mapped to the deepest category node of its product and
+expanded once to all of that node's ancestors (root, L1 .. L4), so one
+aggregation pass fills every level. Cells are (node x supplier x month)
+with the additive measures
+
+    spend       orderTotalValue
+    open_value  still_to_be_invoiced_value
+    lines       PO lines
+    pos         distinct purchase orders with a line under the node
+
+A PO has a single supplier and issue month, so PO counts stay additive when
+cells are summed over suppliers or months; supplier counts are the number of
+distinct suppliers among a node's cells. Order numbers are unique across
+generator appends, so new POs are folded in without rebuilding: refresh()
+reads only the partitions written since the last refresh (or skips already
+ingested order numbers of the flat CSV). The rollup records the size, mtime
+and a hash of the last bytes of purchase_orders.csv; when the file shrank or
+was rewritten (git pull, a regeneration) instead of appended to, refresh()
+starts over.
+
+Usage (from the repository root):
+    python -m etl.procurement.spend_analytics --data-dir data/raw
+"""
+import argparse
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+
+from etl.instrumentation import traced
+from etl.procurement.append_store import hash_keys
+from etl.procurement.partitioned_store import layout_is_current, load_stats, read_partitions
+from etl.taxonomy import CATEGORY_LEVELS, procurement_categories
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PROCUREMENT_DIR = os.path.join(ROOT_DIR, "data", "raw")
+ROLLUP_PATH = os.path.join(ROOT_DIR, "data", "processed", "procurement", "spend_rollup.npz")
+
+PO_COLUMNS = ["orderNumber", "dateIssued", "supplierVendorCode", "productSku",
+              "orderTotalValue", "still_to_be_invoiced_value"]
+MEASURES = ["spend", "open_value", "lines", "pos"]
+DIMENSIONS = ["node", "supplier", "month"]
+NO_MONTH = "none"
+TAIL_BYTES = 1 << 16  # hashed end of purchase_orders.csv; appends leave it intact
+
+# Cells are kept sorted by one int64 key: node << 40 | supplier << 16 | month
+NODE_SHIFT, SUPPLIER_SHIFT = 40, 16
+SUPPLIER_MASK, MONTH_MASK = (1 << 24) - 1, (1 << 16) - 1
+
+
+def cell_keys(node, supplier, month):
+    return (node.astype(np.int64) << NODE_SHIFT) | (supplier.astype(np.int64) << SUPPLIER_SHIFT) | month
+
+
+def tail_hash(path, size):
+    """
+    SHA-1 of the TAIL_BYTES of ``path`` that end at offset ``size``.
+    """
+    with open(path, "rb") as f:
+        f.seek(max(size - TAIL_BYTES, 0))
+        return hashlib.sha1(f.read(min(size, TAIL_BYTES))).hexdigest()
+
+
+def source_stamp(procurement_dir):
+    """
+    {"size", "mtime_ns", "tail"} of purchase_orders.csv (None if missing).
+    """
+    path = os.path.join(procurement_dir, "purchase_orders.csv")
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "tail": tail_hash(path, st.st_size)}
+
+
+class SpendRollup:
+    def __init__(self, tree=None):
+        """
+        Creates an empty rollup over ``tree`` (the procurement categories by default).
+        """
+        self.tree = tree if tree is not None else procurement_categories()
+        # Ancestor ids per node, root first (-1 padded): row i is the path of node i
+        depth = int(self.tree.depth.max()) if len(self.tree) else 0
+        ids = np.arange(len(self.tree), dtype=np.int32)
+        self._ancestors = np.column_stack(
+            [np.where(self.tree.depth >= d, self.tree.ancestor_at(ids, d), -1) for d in range(depth + 1)]
+        ).astype(np.int32)
+        self.clear()
+
+    def clear(self):
+        self.suppliers = []
+        self.months = []
+        self._codes = {"supplier": {}, "month": {}}
+        self._set_cells(np.empty(0, dtype=np.int64), np.empty((0, len(MEASURES)), dtype=np.float64))
+        self.ingested = np.empty(0, dtype=np.uint64)  # sorted hashes of ingested order numbers
+        self.layout_version = 0
+        self.source = None  # source_stamp() at the last refresh
+
+    def __len__(self):
+        return len(self.cell_keys)
+
+    def _set_cells(self, keys, measures):
+        self.cell_keys = keys
+        self.measures = measures
+        self.cell_codes = np.column_stack(
+            [keys >> NODE_SHIFT, (keys >> SUPPLIER_SHIFT) & SUPPLIER_MASK, keys & MONTH_MASK]).astype(np.int32)
+
+    # -----------------------------
+    # Build / incremental refresh
+    # -----------------------------
+    def _encode(self, dim, values):
+        codes = self._codes[dim]
+        labels = self.suppliers if dim == "supplier" else self.months
+        out = np.empty(len(values), dtype=np.int32)
+        for i, v in enumerate(values):
+            code = codes.get(v)
+            if code is None:
+                code = codes[v] = len(labels)
+                labels.append(v)
+            out[i] = code
+        return out
+
+    def leaf_nodes(self, products):
+        """
+        productSku -> deepest category node id (root for unknown categories).
+        """
+        nodes = self.tree.encode_paths(products, CATEGORY_LEVELS)
+        return pd.Series(np.where(nodes >= 0, nodes, 0), index=products["sku"].to_numpy())
+
+    @traced("aggregate.spend_rollup")
+    def add_pos(self, po_df, products):
+        """
+        Folds PO lines (PO_COLUMNS) into the rollup; lines of already
+        ingested order numbers are skipped. ``products`` has sku and
+        category_L1..L4.
+
+        Returns:
+            int: The number of PO lines added.
+        """
+        hashes = hash_keys(po_df["orderNumber"].to_numpy())
+        pos = np.searchsorted(self.ingested, hashes)
+        seen = (pos < len(self.ingested)) & (self.ingested[np.minimum(pos, len(self.ingested) - 1)] == hashes) \
+            if len(self.ingested) else np.zeros(len(hashes), dtype=bool)
+        po_df, hashes = po_df[~seen], hashes[~seen]
+        if po_df.empty:
+            return 0
+        self.ingested = np.union1d(self.ingested, hashes)
+
+        leaf = po_df["productSku"].map(self.leaf_nodes(products)).fillna(0).to_numpy(dtype=np.int32)
+        supplier_inv, supplier_uniq = pd.factorize(po_df["supplierVendorCode"].astype(str))
+        months = po_df["dateIssued"].astype(str).str.slice(0, 7).where(po_df["dateIssued"].notna(), NO_MONTH)
+        month_inv, month_uniq = pd.factorize(months)
+        supplier = self._encode("supplier", supplier_uniq.tolist())[supplier_inv]
+        month = self._encode("month", month_uniq.tolist())[month_inv]
+        po, _ = pd.factorize(hashes)
+
+        # Expand every line to its ancestors (one row per line and level)
+        paths = self._ancestors[leaf]
+        rows, level = np.nonzero(paths >= 0)
+        keys = cell_keys(paths[rows, level], supplier[rows], month[rows])
+
+        batch_keys, inverse = np.unique(keys, return_inverse=True)
+        n = len(batch_keys)
+        spend = po_df["orderTotalValue"].to_numpy(dtype=np.float64, na_value=0.0)
+        open_value = po_df["still_to_be_invoiced_value"].to_numpy(dtype=np.float64, na_value=0.0)
+        # Distinct POs per cell: count unique (cell, po) pairs
+        stride = np.int64(po.max() + 1)
+        po_cells = np.unique(inverse.astype(np.int64) * stride + po[rows]) // stride
+        batch_sums = np.column_stack([
+            np.bincount(inverse, weights=spend[rows], minlength=n),
+            np.bincount(inverse, weights=open_value[rows], minlength=n),
+            np.bincount(inverse, minlength=n).astype(np.float64),
+            np.bincount(po_cells, minlength=n).astype(np.float64),
+        ])
+
+        # Merge into the (sorted) cells
+        slot = np.searchsorted(self.cell_keys, batch_keys)
+        known = slot < len(self.cell_keys)
+        known[known] = self.cell_keys[slot[known]] == batch_keys[known]
+        self.measures[slot[known]] += batch_sums[known]
+        if not known.all():
+            keys = np.concatenate([self.cell_keys, batch_keys[~known]])
+            order = np.argsort(keys, kind="stable")
+            self._set_cells(keys[order], np.vstack([self.measures, batch_sums[~known]])[order])
+        return len(po_df)
+
+    def refresh(self, procurement_dir=PROCUREMENT_DIR):
+        """
+        Adds the POs that landed since the last refresh: with a current
+        partitioned layout only the files written after the recorded
+        version are read, otherwise (no layout, or the flat CSV changed
+        since it was written) the flat CSV is scanned and already ingested
+        order numbers are skipped. If purchase_orders.csv was replaced
+        rather than appended to since, the rollup is cleared and rebuilt
+        from it.
+
+        Returns:
+            int: The number of PO lines added.
+        """
+        stamp = source_stamp(procurement_dir)
+        if self.replaced(procurement_dir, stamp):
+            print("[WARN] purchase_orders.csv was replaced since the last refresh; rebuilding the spend rollup")
+            self.clear()
+        products = pd.read_csv(os.path.join(procurement_dir, "products.csv"), usecols=["sku"] + CATEGORY_LEVELS)
+        if layout_is_current(procurement_dir, "purchase_orders"):
+            version = load_stats(procurement_dir, "purchase_orders")["version"]
+            # A rewritten layout restarts its versions; read it all (ingested POs are skipped)
+            since = self.layout_version if version >= self.layout_version else None
+            po_df = read_partitions(procurement_dir, "purchase_orders", PO_COLUMNS, changed_since=since)
+            self.layout_version = version
+        else:
+            po_df = pd.read_csv(os.path.join(procurement_dir, "purchase_orders.csv"), usecols=PO_COLUMNS)
+        added = self.add_pos(po_df, products)
+        self.source = stamp
+        return added
+
+    def replaced(self, procurement_dir, stamp=None):
+        """
+        True if the rollup holds data and purchase_orders.csv shrank or was
+        rewritten since the last refresh (or that refresh did not record it).
+        A file that only grew by appends still ends with the hashed bytes.
+        """
+        stamp = stamp or source_stamp(procurement_dir)
+        if stamp is None or not len(self.ingested) or stamp == self.source:
+            return False
+        if self.source is None or stamp["size"] < self.source["size"]:
+            return True
+        path = os.path.join(procurement_dir, "purchase_orders.csv")
+        return tail_hash(path, self.source["size"]) != self.source["tail"]
+
+    @classmethod
+    def build(cls, procurement_dir=PROCUREMENT_DIR, tree=None):
+        rollup = cls(tree)
+        rollup.refresh(procurement_dir)
+        return rollup
+
+    # -----------------------------
+    # Drill-down
+    # -----------------------------
+    def node_id(self, node):
+        """
+        Node id of an id, code, label or " > "-joined category path (root for None).
+        """
+        if node is None:
+            return 0
+        return int(node) if isinstance(node, (int, np.integer)) else self.tree.id(node)
+
+    def _cells(self, first, last, supplier=None, month=None):
+        """
+        Positions of the cells of nodes first..last (a contiguous key
+        range, e.g. a subtree [tin, tout]) that match the supplier / month filters.
+        """
+        lo, hi = np.searchsorted(self.cell_keys, [np.int64(first) << NODE_SHIFT, np.int64(last + 1) << NODE_SHIFT])
+        cells = np.arange(lo, hi)
+        for dim, wanted in (("supplier", supplier), ("month", month)):
+            if wanted is None:
+                continue
+            wanted = [wanted] if isinstance(wanted, str) else wanted
+            codes = [self._codes[dim][v] for v in wanted if v in self._codes[dim]]
+            cells = cells[np.isin(self.cell_codes[cells, DIMENSIONS.index(dim)], codes)]
+        return cells
+
+    def _rollup(self, cells, column, labels):
+        """
+        Sums the cells per code of ``column`` (a DIMENSIONS index) and adds
+        the distinct supplier count; ``labels`` maps the group codes to columns.
+        """
+        groups, inverse = np.unique(self.cell_codes[cells, column], return_inverse=True)
+        measures = self.measures[cells]
+        columns = labels(groups)
+        for i, m in enumerate(MEASURES):
+            columns[m] = np.bincount(inverse, weights=measures[:, i], minlength=len(groups))
+        stride = max(len(self.suppliers), 1)
+        pairs = np.unique(inverse.astype(np.int64) * stride + self.cell_codes[cells, 1])
+        columns["suppliers"] = np.bincount(pairs // stride, minlength=len(groups))
+        df = pd.DataFrame(columns)
+        df["lines"] = df["lines"].astype(np.int64)
+        df["pos"] = df["pos"].astype(np.int64)
+        return df
+
+    def totals(self, node=None, supplier=None, month=None):
+        """
+        Measures of one node (whole subtree), optionally for some suppliers / months.
+        """
+        node = self.node_id(node)
+        df = self._rollup(self._cells(node, node, supplier, month), 0, lambda g: {})
+        if df.empty:
+            return {**{m: 0 for m in MEASURES}, "suppliers": 0}
+        row = df.iloc[0]
+        return {k: int(row[k]) if k in ("lines", "pos", "suppliers") else float(row[k]) for k in df.columns}
+
+    def children(self, node=None, supplier=None, month=None):
+        """
+        One row per child category of ``node`` (default: the L1 categories)
+        with its measures and share of the parent's spend.
+        """
+        node = self.node_id(node)
+        cells = self._cells(node + 1, self.tree.tout[node], supplier, month)
+        cells = cells[self.tree.parent[self.cell_codes[cells, 0]] == node]
+        df = self._rollup(cells, 0, lambda g: {
+            "node": g, "category": [self.tree.labels[i] for i in g], "level": self.tree.depth[g]})
+        total = df["spend"].sum()
+        df["spend_share"] = df["spend"] / total if total else 0.0
+        return df.sort_values("spend", ascending=False, ignore_index=True)
+
+    def breakdown(self, node=None, by="supplier", supplier=None, month=None):
+        """
+        Measures of ``node`` per supplier or per month.
+        """
+        if by not in ("supplier", "month"):
+            raise ValueError(f"Unknown breakdown dimension: {by}")
+        node = self.node_id(node)
+        values = np.asarray(self.suppliers if by == "supplier" else self.months, dtype=object)
+        df = self._rollup(self._cells(node, node, supplier, month), DIMENSIONS.index(by), lambda g: {by: values[g]})
+        if by == "month":
+            return df.sort_values("month", ignore_index=True)
+        return df.drop(columns="suppliers").sort_values("spend", ascending=False, ignore_index=True)
+
+    def level(self, depth, supplier=None, month=None):
+        """
+        One row per category at ``depth`` (1 = L1 .. 4 = L4) with its path.
+        """
+        cells = self._cells(0, len(self.tree) - 1, supplier, month)
+        cells = cells[self.tree.depth[self.cell_codes[cells, 0]] == depth]
+        df = self._rollup(cells, 0, lambda g: {
+            "node": g, "path": [" > ".join(self.tree.category_path(i)) for i in g]})
+        return df.sort_values("spend", ascending=False, ignore_index=True)
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def save(self, path=ROLLUP_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Uncompressed: refreshes rewrite the file, and zlib dominated their cost
+        with open(path + ".tmp", "wb") as f:
+            np.savez(
+                f,
+                cell_keys=self.cell_keys,
+                measures=self.measures,
+                ingested=self.ingested,
+                meta=np.array(json.dumps({
+                    "measures": MEASURES,
+                    "nodes": self.tree.codes,
+                    "suppliers": self.suppliers,
+                    "months": self.months,
+                    "layout_version": self.layout_version,
+                    "source": self.source,
+                })),
+            )
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path=ROLLUP_PATH, tree=None):
+        """
+        Loads a saved rollup; raises ValueError when it was built over a
+        different category tree.
+        """
+        rollup = cls(tree)
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta["nodes"] != rollup.tree.codes or meta["measures"] != MEASURES:
+                raise ValueError(f"{path} was built over a different category tree; rebuild it")
+            rollup._set_cells(data["cell_keys"], data["measures"])
+            rollup.ingested = data["ingested"]
+        rollup.suppliers = meta["suppliers"]
+        rollup.months = meta["months"]
+        rollup.layout_version = meta["layout_version"]
+        rollup.source = meta.get("source")
+        rollup._codes = {"supplier": {v: i for i, v in enumerate(rollup.suppliers)},
+                         "month": {v: i for i, v in enumerate(rollup.months)}}
+        return rollup
+
+
+def refresh_rollup(procurement_dir=PROCUREMENT_DIR, path=ROLLUP_PATH, rebuild=False):
+    """
+    Loads the saved rollup (building it when missing, stale or ``rebuild``),
+    folds in the POs added since, and saves it. Returns (rollup, lines added).
+    """
+    rollup = None
+    if not rebuild and os.path.exists(path):
+        try:
+            rollup = SpendRollup.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[WARN] Rebuilding spend rollup: {e}")
+    if rollup is None:
+        rollup = SpendRollup()
+    source = rollup.source
+    added = rollup.refresh(procurement_dir)
+    if added or rollup.source != source or not os.path.exists(path):
+        rollup.save(path)
+    return rollup, added
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data-dir", default=PROCUREMENT_DIR, help="Procurement directory (products.csv, purchase_orders)")
+    parser.add_argument("--output", default=ROLLUP_PATH)
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild instead of refreshing the saved rollup")
+    parser.add_argument("--node", default=None, help="Category to drill into (label or path; default: L1)")
+    args = parser.parse_args()
+
+    rollup, added = refresh_rollup(args.data_dir, args.output, args.rebuild)
+    print(f"[OK] Spend rollup: {added} new PO lines, {len(rollup)} cells -> {args.output}")
+    print(rollup.children(args.node).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+three_way_match.py
+
+Three-way match of purchase orders, goods receipts and invoices:
+
+    ordered    sum of orderTotalValue over the PO lines
+    received   ordered - still_to_be_delivered_value (value of received goods)
+    po billed  ordered - still_to_be_invoiced_value (what the PO records as invoiced)
+    invoiced   sum of totalPaymentDue over the PO's invoices (Rejected ones excluded)
+
+Both tables are streamed in chunks. Keys are turned into 64-bit hashes of
+their bytes, each chunk is sorted and reduced per key (np.add.reduceat), and
+the invoice groups are merged into the sorted PO keys with searchsorted; the
+key bytes of every merged pair are compared, so hash collisions cannot
+produce a wrong match. A PO's tolerance is max(abs_tol, pct_tol * ordered),
+and the status is the first that applies:
+
+    not_invoiced     no invoices, and the PO records nothing as invoiced
+    missing_invoice  no invoices, but the PO records invoiced value
+    over_billed      invoiced > ordered
+    not_received     invoiced > received (billed ahead of the goods receipt)
+    variance         invoiced differs from the PO's invoiced value
+    matched          otherwise
+    no_po            invoices whose poOrderNumber is not a known PO
+
+Invoices that repeat an earlier one (same invoiceNumber, or same PO and
+supplierReference, or same PO and amount) are flagged as duplicates.
+
+Usage (from the repository root):
+    python -m etl.procurement.three_way_match --data-dir data/raw --output data/processed/procurement
+"""
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+from etl.instrumentation import count, traced
+from etl.procurement.partitioned_store import iter_procurement
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PROCUREMENT_DIR = os.path.join(ROOT_DIR, "data", "raw")
+
+PO_COLUMNS = ["orderNumber", "orderTotalValue", "still_to_be_delivered_value", "still_to_be_invoiced_value"]
+INVOICE_COLUMNS = ["invoiceNumber", "supplierReference", "totalPaymentDue", "paymentStatus", "poOrderNumber"]
+KEY_DTYPES = {"orderNumber": str, "invoiceNumber": str, "supplierReference": str, "poOrderNumber": str}
+ABS_TOLERANCE = 1.0    # currency units
+PCT_TOLERANCE = 0.01   # share of the ordered value
+EXCLUDED_STATUSES = ("Rejected",)
+CHUNK_ROWS = 1_000_000
+STATUSES = ["not_invoiced", "missing_invoice", "over_billed", "not_received", "variance", "matched", "no_po"]
+DUPLICATE_REASONS = ["same_number", "same_reference", "same_amount"]  # by priority
+
+_M1, _M2 = np.uint64(0xFF51AFD7ED558CCD), np.uint64(0xC4CEB9FE1A85EC53)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+# -----------------------------
+# Key hashing
+# -----------------------------
+def key_bytes(values):
+    """
+    Fixed-width bytes of string keys (missing -> b"").
+    """
+    values = pd.Series(values).fillna("").astype(str)
+    try:
+        return values.to_numpy(dtype="S")
+    except UnicodeEncodeError:
+        return values.str.encode("utf-8").to_numpy().astype("S")
+
+
+def mix(h):
+    """
+    64-bit finalizer (splitmix64): spreads every input bit over the output.
+    """
+    h = h ^ (h >> np.uint64(33))
+    h = h * _M1
+    h = h ^ (h >> np.uint64(33))
+    h = h * _M2
+    return h ^ (h >> np.uint64(33))
+
+
+def hash_bytes(keys):
+    """
+    64-bit hashes of a fixed-width bytes array, 8 bytes at a time (0 for b"").
+    Zero padding is skipped, so a key hashes the same at any array width.
+    """
+    width = -(-max(keys.dtype.itemsize, 1) // 8) * 8
+    words = keys.astype(f"S{width}").view("<u8").reshape(len(keys), width // 8)
+    h = np.full(len(keys), _GOLDEN, dtype=np.uint64)
+    for i in range(words.shape[1]):
+        h = np.where(words[:, i] != 0, mix(h ^ words[:, i]) * _GOLDEN, h)
+    return np.where(keys == b"", np.uint64(0), mix(h))
+
+
+def combine(h, other):
+    return mix(h ^ (other.astype(np.uint64) * _GOLDEN))
+
+
+def reduce_sorted(hashes, values, keys=None):
+    """
+    Sorts by hash and sums the rows of ``values`` per distinct hash. Returns
+    (hashes, sums, keys of the groups); when ``keys`` are given, a group
+    holding different keys raises ValueError (64-bit hash collision).
+    """
+    order = np.argsort(hashes)
+    hashes = hashes[order]
+    starts = np.flatnonzero(np.r_[True, hashes[1:] != hashes[:-1]])
+    sums = np.add.reduceat(values[order], starts, axis=0) if len(order) else values[:0]
+    if keys is None:
+        return hashes[starts], sums, None
+    same = np.flatnonzero(np.r_[False, hashes[1:] == hashes[:-1]])
+    if (keys[order[same]] != keys[order[same - 1]]).any():
+        raise ValueError("Hash collision between different keys; rerun with another key encoding")
+    return hashes[starts], sums, keys[order[starts]]
+
+
+def repeats(hashes):
+    """
+    Returns (mask of rows whose hash occurred in an earlier row, position of that first row).
+    """
+    order = np.argsort(hashes)
+    ordered = hashes[order]
+    new = np.r_[True, ordered[1:] != ordered[:-1]]
+    starts = np.flatnonzero(new)
+    # The sort is not stable: the first row of a run is its smallest position
+    first = np.repeat(np.minimum.reduceat(order, starts), np.diff(np.r_[starts, len(order)])) \
+        if len(order) else order
+    first_of = np.empty(len(hashes), dtype=np.int64)
+    first_of[order] = first
+    return first_of != np.arange(len(hashes)), first_of
+
+
+# -----------------------------
+# Matcher
+# -----------------------------
+class ThreeWayMatch:
+    def __init__(self, abs_tol=ABS_TOLERANCE, pct_tol=PCT_TOLERANCE, excluded_statuses=EXCLUDED_STATUSES):
+        """
+        Collects PO and invoice chunks; results() matches them.
+
+        Args:
+            abs_tol (float): Absolute tolerance of every comparison.
+            pct_tol (float): Tolerance as a share of the PO's ordered value (the larger one applies).
+            excluded_statuses (tuple): Invoice paymentStatus values left out of the match.
+        """
+        self.abs_tol = abs_tol
+        self.pct_tol = pct_tol
+        self.excluded_statuses = tuple(excluded_statuses)
+        self._po_parts = []       # (hashes, sums, keys) per chunk, reduced per PO
+        self._invoice_parts = []  # same, per poOrderNumber
+        self._invoices = []       # per invoice: po hash, amount, reference / number hashes, number
+        self.po_lines = 0
+        self.invoice_rows = 0
+
+    @traced("match.add_purchase_orders")
+    def add_purchase_orders(self, df):
+        """
+        Adds a chunk of PO lines (PO_COLUMNS); lines of one PO may span chunks.
+        """
+        keys = key_bytes(df["orderNumber"])
+        ordered = df["orderTotalValue"].to_numpy(dtype=np.float64, na_value=0.0)
+        values = np.column_stack([
+            ordered,
+            ordered - df["still_to_be_delivered_value"].to_numpy(dtype=np.float64, na_value=0.0),
+            ordered - df["still_to_be_invoiced_value"].to_numpy(dtype=np.float64, na_value=0.0),
+            np.ones(len(df)),
+        ])
+        self._po_parts.append(reduce_sorted(hash_bytes(keys), values, keys))
+        self.po_lines += len(df)
+
+    @traced("match.add_invoices")
+    def add_invoices(self, df):
+        """
+        Adds a chunk of invoices (INVOICE_COLUMNS).
+        """
+        self.invoice_rows += len(df)
+        if self.excluded_statuses:
+            df = df[~df["paymentStatus"].isin(self.excluded_statuses).to_numpy()]
+        keys = key_bytes(df["poOrderNumber"])
+        po_hash = hash_bytes(keys)
+        amount = df["totalPaymentDue"].to_numpy(dtype=np.float64, na_value=0.0)
+        self._invoice_parts.append(reduce_sorted(po_hash, np.column_stack([amount, np.ones(len(df))]), keys))
+        numbers = key_bytes(df["invoiceNumber"])
+        self._invoices.append((
+            po_hash, amount, hash_bytes(key_bytes(df["supplierReference"])), hash_bytes(numbers), numbers))
+
+    @classmethod
+    def run(cls, procurement_dir=PROCUREMENT_DIR, chunksize=CHUNK_ROWS, **tolerances):
+        """
+        Streams purchase_orders and invoices of ``procurement_dir`` (flat CSVs
+        or the partitioned layout) through a new matcher.
+        """
+        matcher = cls(**tolerances)
+        for chunk in iter_procurement(procurement_dir, "purchase_orders", PO_COLUMNS, chunksize, KEY_DTYPES):
+            matcher.add_purchase_orders(chunk)
+        for chunk in iter_procurement(procurement_dir, "invoices", INVOICE_COLUMNS, chunksize, KEY_DTYPES):
+            matcher.add_invoices(chunk)
+        return matcher
+
+    # -----------------------------
+    # Results
+    # -----------------------------
+    @staticmethod
+    def _merge_parts(parts, width):
+        """
+        Reduces the per-chunk aggregates to one part, in place, so the chunk
+        arrays are freed before matching.
+        """
+        if not parts:
+            return np.empty(0, dtype=np.uint64), np.empty((0, width)), np.empty(0, dtype="S1")
+        if len(parts) > 1:
+            parts[:] = [reduce_sorted(*(np.concatenate(col) for col in zip(*parts)))]
+        return parts[0]
+
+    def _duplicates(self):
+        """
+        Per kept invoice: (po hash, amount, duplicate reason code or -1,
+        row of the first invoice it repeats, invoice numbers).
+        """
+        parts = self._invoices or [(np.empty(0, np.uint64), np.empty(0), np.empty(0, np.uint64),
+                                    np.empty(0, np.uint64), np.empty(0, dtype="S1"))]
+        parts[:] = [tuple(np.concatenate(col) for col in zip(*parts))]
+        po_hash, amount, ref_hash, number_hash, numbers = parts[0]
+        cents = np.round(amount * 100).astype(np.int64)
+        reason = np.full(len(po_hash), -1, dtype=np.int8)
+        first_of = np.arange(len(po_hash))
+        # Lowest priority first, so number > reference > amount wins; empty keys never repeat
+        checks = [(number_hash, number_hash), (combine(po_hash, ref_hash), ref_hash), (combine(po_hash, cents), po_hash)]
+        for code, (hashes, key) in reversed(list(enumerate(checks))):
+            repeated, first = repeats(hashes)
+            repeated &= key != 0
+            reason[repeated] = code
+            first_of[repeated] = first[repeated]
+        return po_hash, amount, reason, first_of, numbers
+
+    @traced("match.results")
+    def results(self):
+        """
+        Returns (matches, duplicates): one row per PO (plus one per unknown
+        poOrderNumber) with values, variances, flags and status, and one row
+        per duplicate invoice with the invoice it repeats.
+        """
+        po_hash, po_sums, po_keys = self._merge_parts(self._po_parts, 4)
+        inv_hash, inv_sums, inv_keys = self._merge_parts(self._invoice_parts, 2)
+
+        # Sort-merge: invoice groups into the sorted PO keys, verified on the key bytes
+        pos = np.minimum(np.searchsorted(po_hash, inv_hash), max(len(po_hash) - 1, 0))
+        found = (pos < len(po_hash)) & (po_hash[pos] == inv_hash) if len(po_hash) else np.zeros(len(inv_hash), bool)
+        if (po_keys[pos[found]] != inv_keys[found]).any():
+            raise ValueError("Hash collision between different PO keys; rerun with another key encoding")
+        invoiced = np.zeros(len(po_hash))
+        invoices = np.zeros(len(po_hash), dtype=np.int64)
+        invoiced[pos[found]] = inv_sums[found, 0]
+        invoices[pos[found]] = inv_sums[found, 1]
+
+        inv_po_hash, amount, reason, first_of, numbers = self._duplicates()
+        duplicate = reason >= 0
+        dup_po = np.searchsorted(po_hash, inv_po_hash[duplicate])
+        dup_known = dup_po < len(po_hash)
+        dup_known[dup_known] = po_hash[dup_po[dup_known]] == inv_po_hash[duplicate][dup_known]
+        duplicate_value = np.bincount(dup_po[dup_known], weights=amount[duplicate][dup_known], minlength=len(po_hash))
+
+        ordered, received, po_billed, lines = po_sums.T if len(po_sums) else np.empty((4, 0))
+        tolerance = np.maximum(self.abs_tol, self.pct_tol * np.abs(ordered))
+        over_billed = invoiced > ordered + tolerance
+        not_received = invoiced > received + tolerance
+        variance = invoiced - po_billed
+        status = np.select(
+            [(invoices == 0) & (po_billed <= tolerance), invoices == 0, over_billed, not_received,
+             np.abs(variance) > tolerance],
+            STATUSES[:5], default="matched")
+        matches = pd.DataFrame({
+            "orderNumber": po_keys.astype(str),
+            "lines": lines.astype(np.int64),
+            "ordered_value": ordered,
+            "received_value": received,
+            "po_invoiced_value": po_billed,
+            "invoiced_value": invoiced,
+            "invoices": invoices,
+            "variance": variance,
+            "over_billed_value": np.maximum(invoiced - ordered, 0.0),
+            "unreceived_billed_value": np.maximum(invoiced - received, 0.0),
+            "duplicate_value": duplicate_value,
+            "tolerance": tolerance,
+            "status": status,
+            "over_billed": over_billed,
+            "billed_not_received": not_received,
+            "duplicate_invoice": duplicate_value > 0,
+        })
+        orphans = ~found
+        if orphans.any():
+            orphan_value = inv_sums[orphans, 0]
+            matches = pd.concat([matches, pd.DataFrame({
+                "orderNumber": inv_keys[orphans].astype(str),
+                "lines": 0,
+                "invoiced_value": orphan_value,
+                "invoices": inv_sums[orphans, 1].astype(np.int64),
+                "variance": orphan_value,
+                "status": "no_po",
+            })], ignore_index=True)
+            matches = matches.fillna({c: 0.0 for c in matches.columns if c.endswith("_value") or c == "tolerance"})
+            matches = matches.fillna({c: False for c in ("over_billed", "billed_not_received", "duplicate_invoice")})
+
+        rows = np.flatnonzero(duplicate)
+        duplicates = pd.DataFrame({
+            "invoiceNumber": numbers[rows].astype(str),
+            "totalPaymentDue": amount[rows],
+            "duplicate_of": numbers[first_of[rows]].astype(str),
+            "reason": np.asarray(DUPLICATE_REASONS, dtype=object)[reason[rows]],
+        })
+        count("match.pos", len(po_hash))
+        count("match.invoices", len(amount))
+        count("match.duplicates", len(rows))
+        return matches, duplicates
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data-dir", default=PROCUREMENT_DIR, help="Procurement directory (flat CSVs or partitioned layout)")
+    parser.add_argument("--output", default=None, help="Directory for three_way_match.csv / duplicate_invoices.csv")
+    parser.add_argument("--abs-tol", type=float, default=ABS_TOLERANCE)
+    parser.add_argument("--pct-tol", type=float, default=PCT_TOLERANCE)
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    matcher = ThreeWayMatch.run(args.data_dir, args.chunksize, abs_tol=args.abs_tol, pct_tol=args.pct_tol)
+    matches, duplicates = matcher.results()
+    print(f"[OK] Matched {matcher.invoice_rows:,} invoices against {matcher.po_lines:,} PO lines "
+          f"({len(matches):,} POs, {len(duplicates):,} duplicate invoices)")
+    print(matches["status"].value_counts().reindex(STATUSES, fill_value=0).to_string())
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+        matches.to_csv(os.path.join(args.output, "three_way_match.csv"), index=False)
+        duplicates.to_csv(os.path.join(args.output, "duplicate_invoices.csv"), index=False)
+        print(f"[OK] Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+Compiled category trees for the ontology files:
+
+- ontologies/procurement_v0.9.md           procurement categories (L1-L4)
+- ontologies/marketing_taxonomy_v0.1.tsv   marketing channel hierarchy (id / parent id rows)
+- ontologies/channel_taxonomy_v0.9.json    SKOS channel concepts (skos_broader links)
+
+Each file is parsed once into a TaxonomyTree: node ids are assigned in DFS
+preorder, so a node's subtree is the id range [tin, tout] (Euler-tour
+interval; tin is the id itself). Ancestor / descendant tests and rollups
+such as "spend under L2 Raw Materials" are therefore range checks on
+integer arrays instead of string comparisons.
+
+Compiled trees are cached as .npz files under data/processed/taxonomy/,
+keyed by the SHA-1 of the source file, and memoized per process.
+"""
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ONTOLOGY_DIR = os.path.join(ROOT_DIR, "ontologies")
+CACHE_DIR = os.path.join(ROOT_DIR, "data", "processed", "taxonomy")
+PROCUREMENT_ONTOLOGY = os.path.join(ONTOLOGY_DIR, "procurement_v0.9.md")
+MARKETING_TAXONOMY = os.path.join(ONTOLOGY_DIR, "marketing_taxonomy_v0.1.tsv")
+CHANNEL_TAXONOMY = os.path.join(ONTOLOGY_DIR, "channel_taxonomy_v0.9.json")
+ROOT_CODE = "ROOT"  # synthetic root of the procurement categories
+CATEGORY_LEVELS = ["category_L1", "category_L2", "category_L3", "category_L4"]
+
+# Markdown prefixes of the procurement category levels (depth 1-4)
+MARKDOWN_LEVELS = [
+    ("### L1: ", ""),
+    ("-   **L2: ", "**"),
+    ("    -   **L3: ", "**"),
+    ("        -   L4: ", ""),
+]
+
+
+class TaxonomyTree:
+    def __init__(self, codes, labels, parent, aliases=None):
+        """
+        Builds the tree from nodes in DFS preorder.
+
+        Args:
+            codes (list): Unique node codes; node i has id i.
+            labels (list): Display label per node.
+            parent (array): Parent id per node (-1 for roots); parents precede children.
+            aliases (dict): Extra lookup names (lowercase) -> node id.
+        """
+        self.codes = list(codes)
+        self.labels = list(labels)
+        self.parent = np.asarray(parent, dtype=np.int32)
+        n = len(self.codes)
+        self.depth = np.zeros(n, dtype=np.int16)
+        for i in range(n):
+            if self.parent[i] >= 0:
+                self.depth[i] = self.depth[self.parent[i]] + 1
+        # Preorder ids: the subtree of i ends where the next node at depth <= depth[i] starts
+        self.tin = np.arange(n, dtype=np.int32)
+        self.tout = np.empty(n, dtype=np.int32)
+        stack = []
+        for i in range(n):
+            while stack and self.depth[stack[-1]] >= self.depth[i]:
+                self.tout[stack.pop()] = i - 1
+            stack.append(i)
+        for i in stack:
+            self.tout[i] = n - 1
+        self._ids = {}
+        for name, node in (aliases or {}).items():
+            self._ids[name.lower()] = node
+        for i, label in enumerate(self.labels):
+            self._ids.setdefault(label.lower(), i)
+        for i, code in enumerate(self.codes):
+            self._ids[code.lower()] = i
+        self._aliases = dict(aliases or {})
+        self._paths = None
+
+    def __len__(self):
+        return len(self.codes)
+
+    @classmethod
+    def from_parent_codes(cls, codes, labels, parent_codes, aliases=None):
+        """
+        Builds the tree from nodes in any order; children keep their input order.
+        """
+        index = {code: i for i, code in enumerate(codes)}
+        children = {}
+        roots = []
+        for i, p in enumerate(parent_codes):
+            if p and p in index:
+                children.setdefault(index[p], []).append(i)
+            else:
+                roots.append(i)
+        order = []
+        stack = roots[::-1]
+        while stack:
+            i = stack.pop()
+            order.append(i)
+            stack.extend(children.get(i, [])[::-1])
+        new_id = {old: new for new, old in enumerate(order)}
+        parent = [new_id[index[parent_codes[i]]] if parent_codes[i] in index else -1 for i in order]
+        aliases = {name: new_id[index[code]] for name, code in (aliases or {}).items() if code in index}
+        return cls([codes[i] for i in order], [labels[i] for i in order], parent, aliases)
+
+    # -----------------------------
+    # Lookups
+    # -----------------------------
+    def id(self, name):
+        """
+        Node id of a code, label or alias (case-insensitive); -1 when unknown.
+        """
+        return self._ids.get(str(name).strip().lower(), -1)
+
+    def encode(self, values):
+        """
+        Node ids (int32 array, -1 for unknown) of codes / labels / aliases.
+        """
+        values = pd.Series(values)
+        uniques = values.astype(str).unique()
+        ids = pd.Series([self.id(v) for v in uniques], index=uniques, dtype=np.int32)
+        return values.astype(str).map(ids).to_numpy(dtype=np.int32)
+
+    def is_ancestor(self, a, b):
+        """
+        True when ``a`` is ``b`` or one of its ancestors.
+        """
+        return bool(self.tin[a] <= self.tin[b] <= self.tout[a])
+
+    def within(self, ids, node):
+        """
+        Boolean mask of ``ids`` (array) that lie in the subtree of ``node``
+        (an id, code or label).
+        """
+        node = node if isinstance(node, (int, np.integer)) else self.id(node)
+        ids = np.asarray(ids)
+        if node < 0:
+            return np.zeros(ids.shape, dtype=bool)
+        return (ids >= self.tin[node]) & (ids <= self.tout[node])
+
+    def descendants(self, node):
+        """
+        Ids of the subtree of ``node`` (itself included).
+        """
+        return np.arange(self.tin[node], self.tout[node] + 1, dtype=np.int32)
+
+    def children(self, node):
+        return np.flatnonzero(self.parent == node).astype(np.int32)
+
+    def ancestors(self, node):
+        """
+        Ids from the root down to ``node``.
+        """
+        path = []
+        while node >= 0:
+            path.append(int(node))
+            node = self.parent[node]
+        return path[::-1]
+
+    def ancestor_at(self, ids, depth):
+        """
+        Ancestor at ``depth`` of each id (the id itself when shallower, -1 for -1).
+        Rolls leaf-level ids up to one level in a single vectorized pass.
+        """
+        ids = np.asarray(ids, dtype=np.int32).copy()
+        valid = ids >= 0
+        for _ in range(int(self.depth.max()) - depth if len(self) else 0):
+            deeper = valid & (self.depth[np.maximum(ids, 0)] > depth)
+            if not deeper.any():
+                break
+            ids[deeper] = self.parent[ids[deeper]]
+        return ids
+
+    def path(self, node):
+        return [self.labels[i] for i in self.ancestors(node)]
+
+    def leaves(self):
+        return np.flatnonzero(self.tout == self.tin).astype(np.int32)
+
+    # -----------------------------
+    # Category paths (procurement)
+    # -----------------------------
+    def category_path(self, node):
+        """
+        Labels from the top level down to ``node`` (without a synthetic root).
+        """
+        path = self.ancestors(node)
+        if self.codes[path[0]] == ROOT_CODE:
+            path = path[1:]
+        return tuple(self.labels[i] for i in path)
+
+    def encode_paths(self, df, columns=CATEGORY_LEVELS):
+        """
+        Deepest node id per row of label columns (e.g. category_L1..L4);
+        rows with unknown labels map to their deepest known prefix (-1: none).
+        """
+        if self._paths is None:
+            self._paths = {self.category_path(i): i for i in range(len(self))}
+        keys = df[list(columns)].astype(str).apply(lambda col: col.str.strip())
+        uniques = keys.drop_duplicates()
+        ids = {}
+        for row in uniques.itertuples(index=False):
+            node = -1
+            for k in range(len(row), 0, -1):
+                node = self._paths.get(tuple(row[:k]), -1)
+                if node >= 0:
+                    break
+            ids[tuple(row)] = node
+        return np.fromiter((ids[tuple(r)] for r in keys.itertuples(index=False)), dtype=np.int32, count=len(keys))
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        alias_names = list(self._aliases)
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, codes=np.array(self.codes, dtype=str), labels=np.array(self.labels, dtype=str),
+                     parent=self.parent, alias_names=np.array(alias_names, dtype=str),
+                     alias_ids=np.array([self._aliases[a] for a in alias_names], dtype=np.int32))
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as z:
+            aliases = dict(zip(z["alias_names"].tolist(), z["alias_ids"].tolist()))
+            return cls(z["codes"].tolist(), z["labels"].tolist(), z["parent"], aliases)
+
+
+# -----------------------------
+# Parsers
+# -----------------------------
+def parse_procurement_markdown(path):
+    """
+    Procurement categories ("### L1: ...", "-   **L2: ...**", ...). Node
+    codes are the " > "-joined label paths under a synthetic root.
+    """
+    codes, labels, parent = [ROOT_CODE], ["Procurement Categories"], [-1]
+    stack = [0]  # node id per depth
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            for depth, (prefix, suffix) in enumerate(MARKDOWN_LEVELS, start=1):
+                if line.startswith(prefix) and (not suffix or line.rstrip().endswith(suffix)):
+                    label = line[len(prefix):].rstrip()
+                    label = label[:-len(suffix)] if suffix else label
+                    label = label.strip()
+                    if len(stack) < depth:
+                        break  # level without its parent level (malformed); skip
+                    del stack[depth:]
+                    up = stack[depth - 1]
+                    codes.append((codes[up] + " > " if up else "") + label)
+                    labels.append(label)
+                    parent.append(up)
+                    stack.append(len(codes) - 1)
+                    break
+    return TaxonomyTree(codes, labels, parent)
+
+
+def parse_tsv(path):
+    """
+    Rows of id, parent id, name, ... (columns by position; the header of
+    the shipped file is misspelled).
+    """
+    df = pd.read_csv(path, sep="\t", dtype=str, keep_default_na=False)
+    codes, parents, names = (df.iloc[:, i].str.strip().tolist() for i in range(3))
+    return TaxonomyTree.from_parent_codes(codes, names, parents)
+
+
+def parse_skos_json(path):
+    """
+    SKOS concepts (code, skos_prefLabel, skos_altLabel, skos_broader.code).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        nodes = json.load(f)["nodes"]
+    codes = [n["code"] for n in nodes]
+    labels = [n.get("skos_prefLabel") or n["code"] for n in nodes]
+    parents = [(n.get("skos_broader") or {}).get("code") for n in nodes]
+    aliases = {alt: n["code"] for n in nodes for alt in (n.get("skos_altLabel") or [])}
+    return TaxonomyTree.from_parent_codes(codes, labels, parents, aliases)
+
+
+PARSERS = {".md": parse_procurement_markdown, ".tsv": parse_tsv, ".json": parse_skos_json}
+_trees = {}
+
+
+def file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def load_taxonomy(path, cache_dir=CACHE_DIR):
+    """
+    Returns the compiled tree of an ontology file, from the process memo,
+    the .npz cache (keyed by the file's SHA-1) or by parsing it.
+    """
+    digest = file_hash(path)
+    key = (os.path.abspath(path), digest)
+    tree = _trees.get(key)
+    if tree is not None:
+        return tree
+    name = os.path.splitext(os.path.basename(path))[0]
+    cached = os.path.join(cache_dir, f"{name}-{digest[:16]}.npz") if cache_dir else None
+    if cached and os.path.exists(cached):
+        tree = TaxonomyTree.load(cached)
+    else:
+        tree = PARSERS[os.path.splitext(path)[1].lower()](path)
+        if cached:
+            tree.save(cached)
+    _trees[key] = tree
+    return tree
+
+
+def procurement_categories():
+    return load_taxonomy(PROCUREMENT_ONTOLOGY)
+
+
+def marketing_taxonomy():
+    return load_taxonomy(MARKETING_TAXONOMY)
+
+
+def channel_taxonomy():
+    return load_taxonomy(CHANNEL_TAXONOMY)
@@ -0,0 +1,165 @@
+"""
+answer_cache.py
+
+Semantic answer cache for RAG Chat.
+
+Questions are normalized (Unicode NFKC, case-folded, punctuation dropped,
+whitespace collapsed) and looked up first by exact normalized text, then by
+cosine similarity of their embeddings against the cached questions with the
+same key facts: numbers, years, months, quarters and ids ("2024", "june",
+"q3", "adidas_bf_001", "sup 00123"). Questions that differ only in such a
+token embed almost identically but ask something else, so they never share
+an answer. A hit returns the stored answer and retrieval metadata without
+touching the retriever or the generator.
+
+Every entry carries the data version it was answered against. A lookup
+under a different version clears the cache. Entries are evicted least
+recently used once their estimated size exceeds ``max_bytes``.
+"""
+import json
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+# Calibrated on paraphrase / non-paraphrase question pairs with the hashing
+# embedder and equal key facts: questions about another brand, platform,
+# country or metric score up to 0.85, reworded paraphrases ("list all",
+# "which ... are open for") 0.90 and above.
+DEFAULT_THRESHOLD = 0.88
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+_NON_WORD_RE = re.compile(r"[^\w\s]+")
+_SPACE_RE = re.compile(r"\s+")
+MONTHS = {
+    "january", "february", "march", "april", "may", "june", "july", "august", "september", "october",
+    "november", "december", "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+}
+_QUARTER_RE = re.compile(r"^(q[1-4]|h[12])$")
+
+
+def normalize_question(question):
+    text = unicodedata.normalize("NFKC", question).casefold()
+    return _SPACE_RE.sub(" ", _NON_WORD_RE.sub(" ", text)).strip()
+
+
+def question_facts(key):
+    """
+    Key facts of a normalized question: tokens with a digit (numbers,
+    years, ids), month names and quarters / halves.
+    """
+    return frozenset(
+        token for token in key.split()
+        if any(ch.isdigit() for ch in token) or token in MONTHS or _QUARTER_RE.match(token)
+    )
+
+
+class AnswerCache:
+    def __init__(self, embedder, threshold=DEFAULT_THRESHOLD, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Args:
+            embedder: Embedder with ``dim`` and ``embed(texts)`` (L2-normalized rows).
+            threshold (float): Minimum cosine similarity for a near-duplicate hit.
+            max_bytes (int): Memory budget for stored answers and metadata.
+        """
+        self.embedder = embedder
+        self.threshold = threshold
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = {"exact": 0, "semantic": 0}
+        self.misses = 0
+        self.clear()
+
+    def clear(self, version=None):
+        self.version = version
+        self.entries = OrderedDict()  # normalized question -> entry
+        self.slots = {}                # normalized question -> row in self.vectors
+        self.free = []
+        self.vectors = np.zeros((64, self.embedder.dim), dtype=np.float32)
+        self.keys = [None] * len(self.vectors)
+        self.facts = np.zeros(len(self.vectors), dtype=np.int64)  # hash of question_facts() per row
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    # -----------------------------
+    # Lookup / store
+    # -----------------------------
+    def get(self, question, version):
+        """
+        Returns (entry, match, similarity) or (None, None, best similarity
+        among the entries with the same key facts). ``match`` is "exact" or
+        "semantic".
+        """
+        key = normalize_question(question)
+        with self.lock:
+            if version != self.version:
+                self.clear(version)
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits["exact"] += 1
+                return entry, "exact", 1.0
+            if not self.entries:
+                self.misses += 1
+                return None, None, 0.0
+            sims = self.vectors @ self.embedder.embed([key])[0]
+            sims[self.facts != hash(question_facts(key))] = -1.0
+            row = int(np.argmax(sims))
+            similarity = max(float(sims[row]), 0.0)
+            if similarity >= self.threshold and self.keys[row] is not None:
+                hit = self.keys[row]
+                self.entries.move_to_end(hit)
+                self.hits["semantic"] += 1
+                return self.entries[hit], "semantic", similarity
+            self.misses += 1
+            return None, None, similarity
+
+    def put(self, question, version, answer, metadata):
+        key = normalize_question(question)
+        entry = {"question": question, "answer": answer, "metadata": metadata}
+        size = len(key) + len(json.dumps(entry, default=str)) + 4 * self.embedder.dim
+        if size > self.max_bytes:
+            return
+        vector = self.embedder.embed([key])[0]
+        with self.lock:
+            if version != self.version:
+                self.clear(version)
+            if key in self.entries:
+                self._remove(key)
+            if self.free:
+                row = self.free.pop()
+            else:
+                row = len(self.slots)
+                if row >= len(self.vectors):
+                    self.vectors = np.vstack([self.vectors, np.zeros_like(self.vectors)])
+                    self.keys.extend([None] * (len(self.vectors) - len(self.keys)))
+                    self.facts = np.concatenate([self.facts, np.zeros_like(self.facts)])
+            self.vectors[row] = vector
+            self.keys[row] = key
+            self.facts[row] = hash(question_facts(key))
+            self.slots[key] = row
+            self.entries[key] = dict(entry, bytes=size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+
+    def _remove(self, key):
+        entry = self.entries.pop(key)
+        row = self.slots.pop(key)
+        self.vectors[row] = 0.0
+        self.keys[row] = None
+        self.free.append(row)
+        self.bytes -= entry["bytes"]
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "version": self.version,
+        }
@@ -0,0 +1,46 @@
+"""
+build_index.py
+
+Offline build of the RAG retrieval index (CPU only, no network).
+
+Usage (from the repository root):
+    python -m rag.build_index [--quantize] [--dim 256]
+    python -m rag.build_index --index ivf --nlist 1024 --pq-m 32 --nprobe 16
+    python -m rag.build_index --embedder spacy --model <path-to-pipeline-with-vectors>
+"""
+import argparse
+import time
+
+from rag.embeddings import get_embedder, DEFAULT_DIM
+from rag.retriever import Retriever, INDEX_DIR
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", default=INDEX_DIR)
+    parser.add_argument("--embedder", choices=["hashing", "spacy"], default="hashing")
+    parser.add_argument("--model", default=None, help="spaCy pipeline with word vectors (--embedder spacy)")
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM, help="Hashing embedder dimension")
+    parser.add_argument("--index", choices=["auto", "flat", "ivf"], default="auto")
+    parser.add_argument("--quantize", action="store_true", help="Store flat index vectors as int8")
+    parser.add_argument("--nlist", type=int, default=None, help="IVF lists (default ~4*sqrt(n))")
+    parser.add_argument("--pq-m", type=int, default=0, help="IVF product-quantization sub-spaces (0 = off)")
+    parser.add_argument("--nprobe", type=int, default=8, help="IVF lists scanned per query")
+    parser.add_argument("--refine", type=int, default=16, help="IVF-PQ exact re-rank factor")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    embedder = get_embedder(args.embedder, dim=args.dim, model=args.model)
+    retriever = Retriever.build(
+        embedder=embedder, index_type=args.index, quantize=args.quantize,
+        nlist=args.nlist, pq_m=args.pq_m, nprobe=args.nprobe, refine=args.refine,
+    )
+    retriever.save(args.output)
+    print(
+        f"[OK] Indexed {len(retriever)} nodes (dim={embedder.dim}, {retriever.index.kind}) "
+        f"in {time.perf_counter() - start:.1f}s -> {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
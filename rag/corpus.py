@@ -0,0 +1,229 @@
+"""
+corpus.py
+
+Builds the retrieval corpus: one short text description per graph node
+(campaigns, products, brands, channels, suppliers, KPI definitions) plus
+heading-sized chunks of the ontology documents.
+
+Every document is a dict {"node_id", "node_type", "title", "text"}; node ids
+use the "<type>:<key>" form shared with the knowledge graph.
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+import pandas as pd
+
+from etl.marketing.campaign_data import load_campaign_rows, ROOT_DIR, CAMPAIGNS_PATH, KPI_DEFINITIONS_PATH
+from etl.marketing.kpi_engine import KPIEngine
+
+MARKETING_DIR = os.path.join(ROOT_DIR, "data", "processed", "marketing")
+DICT_DIR = os.path.join(ROOT_DIR, "data", "dictionaries", "marketing")
+PROCUREMENT_DIR = os.path.join(ROOT_DIR, "data", "raw")
+ONTOLOGY_DIR = os.path.join(ROOT_DIR, "ontologies")
+
+# Files the corpus is derived from; their size / mtime make up the data version
+SOURCE_FILES = [
+    CAMPAIGNS_PATH,
+    os.path.join(MARKETING_DIR, "products_v1.csv"),
+    os.path.join(MARKETING_DIR, "orders_v1.csv"),
+    os.path.join(DICT_DIR, "brands.json"),
+    os.path.join(DICT_DIR, "channels.json"),
+    KPI_DEFINITIONS_PATH,
+    os.path.join(PROCUREMENT_DIR, "products.csv"),
+    os.path.join(PROCUREMENT_DIR, "suppliers.csv"),
+    os.path.join(PROCUREMENT_DIR, "purchase_orders.csv"),
+    os.path.join(PROCUREMENT_DIR, "invoices.csv"),
+]
+
+MAX_CHUNK_CHARS = 1200
+
+# ISO country codes used by the marketing exports -> names used in questions
+COUNTRY_NAMES = {
+    "DE": "Germany", "AT": "Austria", "CH": "Switzerland", "FR": "France", "IT": "Italy",
+    "ES": "Spain", "NL": "Netherlands", "GB": "United Kingdom", "UK": "United Kingdom", "US": "United States",
+}
+
+
+def data_version(paths=None):
+    """
+    Returns a short hash over the size and modification time of the corpus
+    source files (and ontology documents), so it can be polled cheaply. It
+    changes whenever the graph snapshot changes.
+    """
+    paths = list(paths or SOURCE_FILES) + sorted(glob.glob(os.path.join(ONTOLOGY_DIR, "*.md")))
+    digest = hashlib.sha1()
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        digest.update(f"{os.path.basename(path)}:{st.st_size}:{st.st_mtime_ns};".encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def _doc(node_type, key, title, text):
+    return {"node_id": f"{node_type}:{key}", "node_type": node_type, "title": title, "text": text}
+
+
+def campaign_docs(path=CAMPAIGNS_PATH):
+    rows = load_campaign_rows(path)
+    grouped = rows.groupby("campaign_id", sort=True)
+    summary = grouped.agg(
+        campaign_name=("campaign_name", "first"),
+        brand_name=("brand_name", "first"),
+        category=("category", "first"),
+        country=("country", "first"),
+        objective=("objective", "first"),
+        primary_KPI=("primary_KPI", "first"),
+        currency=("currency", "first"),
+        start_date=("start_date", "min"),
+        end_date=("end_date", "max"),
+        actual_spend=("actual_spend", "sum"),
+        impressions=("impressions", "sum"),
+        clicks=("clicks", "sum"),
+        sessions=("sessions", "sum"),
+        conversions=("conversions", "sum"),
+        revenue=("revenue", "sum"),
+        views=("views", "sum"),
+    )
+    channels = grouped["channel"].agg(lambda s: ", ".join(sorted(set(s.dropna().str.upper()))))
+    platforms = grouped["media_platform"].agg(lambda s: ", ".join(sorted(set(s.dropna()))))
+    kpis = KPIEngine().evaluate_frame(summary, ["roas", "ctr", "cvr"])
+
+    docs = []
+    for cid, r in summary.iterrows():
+        text = (
+            f"Campaign {r.campaign_name} ({cid}) by brand {r.brand_name}, category {r.category}, "
+            f"country {COUNTRY_NAMES.get(r.country, r.country)} ({r.country}), objective {r.objective}, primary KPI {r.primary_KPI}. "
+            f"Runs {r.start_date:%Y-%m-%d} to {r.end_date:%Y-%m-%d} "
+            f"({r.start_date:%B %Y}). Channels: {channels[cid]}. Platforms: {platforms[cid]}. "
+            f"Spend {r.actual_spend:,.0f} {r.currency}, revenue {r.revenue:,.0f} {r.currency}, "
+            f"ROAS {kpis.at[cid, 'roas']:.2f}, CTR {kpis.at[cid, 'ctr']:.2f}%, CVR {kpis.at[cid, 'cvr']:.2f}%."
+        )
+        docs.append(_doc("campaign", cid, r.campaign_name, text))
+    return docs
+
+
+def marketing_product_docs(path=os.path.join(MARKETING_DIR, "products_v1.csv")):
+    df = pd.read_csv(path, encoding="utf-8-sig")
+    df.columns = df.columns.str.strip()
+    docs = []
+    for r in df.itertuples(index=False):
+        text = (
+            f"Product {r.SKU_name} (SKU {r.SKU_id}, product {r.product_id}) by brand {r.brand}, "
+            f"category {r.category_level_1} / {r.category_level_2}, RRP {r.RRP}."
+        )
+        docs.append(_doc("product", r.SKU_id, r.SKU_name, text))
+    return docs
+
+
+def procurement_product_docs(path=os.path.join(PROCUREMENT_DIR, "products.csv")):
+    df = pd.read_csv(path)
+    docs = []
+    for r in df.itertuples(index=False):
+        text = (
+            f"Procurement product {r.name} (SKU {r.sku}): {r.description} "
+            f"Category {r.category_L1} > {r.category_L2} > {r.category_L3} > {r.category_L4}. "
+            f"Unit {r.unitOfMeasure}{', critical item' if str(r.isCritical) == 'True' else ''}."
+        )
+        docs.append(_doc("product", r.sku, r.name, text))
+    return docs
+
+
+def supplier_docs(path=os.path.join(PROCUREMENT_DIR, "suppliers.csv")):
+    df = pd.read_csv(path)
+    docs = []
+    for r in df.itertuples(index=False):
+        text = (
+            f"Supplier {r.legalName} ({r.vendorCode}) in {r.country}, contact {r.contactPerson}, "
+            f"financial health {r.financialHealth}, risk score {r.riskScore}, "
+            f"{'active' if str(r.isActive) == 'True' else 'inactive'}."
+        )
+        docs.append(_doc("supplier", r.vendorCode, r.legalName, text))
+    return docs
+
+
+def brand_docs(path=os.path.join(DICT_DIR, "brands.json")):
+    with open(path, "r", encoding="utf-8") as f:
+        brands = json.load(f)
+    return [
+        _doc("brand", b["name"], b["name"],
+             f"Brand {b['name']} ({', '.join(b.get('aliases', []))}), category {b.get('category')}, market {b.get('market')}.")
+        for b in brands
+    ]
+
+
+def channel_docs(path=os.path.join(DICT_DIR, "channels.json")):
+    with open(path, "r", encoding="utf-8") as f:
+        channels = json.load(f)
+    return [
+        _doc("channel", c["name"], c["name"],
+             f"Marketing channel {c['name']} ({c['type']}), platforms: {', '.join(c['subcategories'])}.")
+        for c in channels
+    ]
+
+
+def kpi_docs(path=KPI_DEFINITIONS_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        definitions = json.load(f)["data"]
+    docs = []
+    for d in definitions:
+        name = d["en"]["name"]
+        parts = [f"KPI {name} ({d['code']}).", d["en"].get("definition") or ""]
+        if d.get("formula"):
+            parts.append(f"Formula: {d['formula']}.")
+        if d.get("example"):
+            parts.append(f"Example: {d['example']}")
+        if d.get("synonyms"):
+            parts.append(f"Also known as {', '.join(d['synonyms'])}.")
+        docs.append(_doc("kpi", d["code"], name, " ".join(p for p in parts if p)))
+    return docs
+
+
+def ontology_docs(directory=ONTOLOGY_DIR):
+    """
+    Splits every ontology markdown file at its headings; sections longer than
+    MAX_CHUNK_CHARS are cut at line boundaries.
+    """
+    docs = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.md"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        with open(path, "r", encoding="utf-8") as f:
+            sections = re.split(r"\n(?=#{1,3} )", f.read())
+        n = 0
+        for section in sections:
+            title = section.strip().splitlines()[0].lstrip("# ").strip() if section.strip() else name
+            chunk = ""
+            for line in section.splitlines(keepends=True):
+                if len(chunk) + len(line) > MAX_CHUNK_CHARS and chunk.strip():
+                    docs.append(_doc("ontology", f"{name}#{n}", title, chunk.strip()))
+                    n, chunk = n + 1, ""
+                chunk += line
+            if chunk.strip():
+                docs.append(_doc("ontology", f"{name}#{n}", title, chunk.strip()))
+                n += 1
+    return docs
+
+
+def build_corpus(marketing_dir=MARKETING_DIR, procurement_dir=PROCUREMENT_DIR):
+    """
+    Returns every retrievable document. Sources that are missing on disk
+    are skipped with a warning. The table directories can point at another
+    dataset (e.g. a scaled benchmark copy); dictionaries stay shared.
+    """
+    builders = [
+        (campaign_docs, os.path.join(marketing_dir, "campaigns_v1.csv")),
+        (marketing_product_docs, os.path.join(marketing_dir, "products_v1.csv")),
+        (procurement_product_docs, os.path.join(procurement_dir, "products.csv")),
+        (supplier_docs, os.path.join(procurement_dir, "suppliers.csv")),
+        (brand_docs, None), (channel_docs, None), (kpi_docs, None), (ontology_docs, None),
+    ]
+    docs = []
+    for build, path in builders:
+        try:
+            docs.extend(build() if path is None else build(path))
+        except FileNotFoundError as e:
+            print(f"[WARN] {build.__name__} skipped: {e}")
+    return docs
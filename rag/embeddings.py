@@ -0,0 +1,101 @@
+"""
+embeddings.py
+
+Offline text embedders for the RAG retrieval path. Nothing here touches the
+network:
+
+- HashingEmbedder (default): signed feature hashing of word unigrams, word
+  bigrams and character trigrams (stop words removed, weighted by kind)
+  into a fixed-size float32 vector. It needs no model files and is
+  deterministic across processes.
+- SpacyEmbedder: mean word vectors of a locally installed spaCy pipeline that
+  ships vectors (the HEL-14 NER model has none, so it is not usable here).
+"""
+import re
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+DEFAULT_DIM = 256
+
+_WORD_RE = re.compile(r"[a-z0-9äöüß]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by did do does for from had has have how i in is it me of on or "
+    "show tell that the their this to was we were what when where which who why with".split()
+)
+
+# feature kind -> weight (whole words dominate, trigrams only help with
+# spelling variants and compound words)
+FEATURE_WEIGHTS = {"word": 1.0, "bigram": 0.5, "trigram": 0.25}
+
+
+def _features(text):
+    words = [w for w in _WORD_RE.findall(text.lower()) if w not in STOPWORDS]
+    feats = [("word", w) for w in words]
+    feats += [("bigram", f"{a} {b}") for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f"<{w}>"
+        feats += [("trigram", padded[i:i + 3]) for i in range(len(padded) - 2)]
+    return feats
+
+
+class HashingEmbedder:
+    name = "hashing"
+
+    def __init__(self, dim=DEFAULT_DIM):
+        self.dim = dim
+        self._embed_cached = lru_cache(maxsize=4096)(self._embed_one)
+
+    def _embed_one(self, text):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for kind, feat in _features(text):
+            h = zlib.crc32(f"{kind}:{feat}".encode("utf-8"))
+            weight = FEATURE_WEIGHTS[kind]
+            vec[h % self.dim] += weight if (h >> 31) & 1 else -weight
+        vec = np.sign(vec) * np.sqrt(np.abs(vec))  # sublinear term frequency
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
+    def embed(self, texts):
+        """
+        Returns an (n, dim) float32 matrix of L2-normalized embeddings.
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            out[i] = self._embed_cached(text)
+        return out
+
+
+class SpacyEmbedder:
+    name = "spacy"
+
+    def __init__(self, model):
+        import spacy
+
+        self.model = model
+        self.nlp = spacy.load(model, exclude=["ner", "parser", "tagger", "lemmatizer", "attribute_ruler"])
+        self.dim = self.nlp.vocab.vectors_length
+        if self.dim == 0:
+            raise ValueError(f"spaCy pipeline {model!r} has no word vectors")
+
+    def embed(self, texts, batch_size=256):
+        if isinstance(texts, str):
+            texts = [texts]
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, doc in enumerate(self.nlp.pipe(texts, batch_size=batch_size)):
+            vec = doc.vector
+            norm = np.linalg.norm(vec)
+            out[i] = vec / norm if norm > 0 else vec
+        return out
+
+
+def get_embedder(name="hashing", dim=DEFAULT_DIM, model=None):
+    if name == "hashing":
+        return HashingEmbedder(dim)
+    if name == "spacy":
+        return SpacyEmbedder(model)
+    raise ValueError(f"Unknown embedder: {name}")
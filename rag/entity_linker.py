@@ -0,0 +1,310 @@
+"""
+entity_linker.py
+
+Links entity mentions (NER spans, question fragments) to knowledge-graph node
+ids ("campaign:ADIDAS_BF_001", "brand:Adidas", ...).
+
+- Aliases come from the campaign, brand and channel dictionaries and the
+  product / supplier tables. Each alias is normalized (NFKC, casefold,
+  punctuation to spaces) and, for company names, also stored without legal
+  suffixes ("EuroTech Solutions NV" -> "eurotech solutions").
+- Exact lookups hit a dict from normalized alias to alias rows.
+- Fuzzy candidates come from a character 3-gram inverted index (CSR
+  postings). A batch of mentions is scored in one vectorized pass: the
+  postings of each mention's rarest trigrams (enough that every alias able
+  to reach the threshold shares one) are concatenated into (mention, alias)
+  pairs, pairs of the wrong node type are dropped, and np.unique counts the
+  shared trigrams; the common trigrams are then looked up only for these
+  candidates, which alone get a Dice score.
+- Results are cached per (normalized surface form, node type).
+"""
+import json
+import os
+import re
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from etl.marketing.campaign_data import CAMPAIGNS_PATH
+from rag.corpus import DICT_DIR, MARKETING_DIR, PROCUREMENT_DIR
+
+DEFAULT_THRESHOLD = 0.5
+CACHE_SIZE = 100_000
+SCORE_CHUNK = 512  # mentions per scoring pass; bounds the candidate pairs
+
+# NER label -> node type
+LABEL_TYPES = {
+    "CAMPAIGN": "campaign",
+    "BRAND": "brand",
+    "CHANNEL": "channel",
+    "PRODUCT": "product",
+    "SKU": "product",
+    "SUPPLIER": "supplier",
+}
+
+LEGAL_SUFFIXES = {
+    "inc", "ltd", "llc", "plc", "gmbh", "ag", "nv", "bv", "sa", "sas", "srl", "spa", "co", "corp",
+    "corporation", "company", "kg", "oy", "ab", "as",
+}
+
+_NON_ALNUM_RE = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKC", str(text)).casefold().replace("’", "'").replace("'", "")
+    return _NON_ALNUM_RE.sub(" ", text).strip()
+
+
+def strip_legal_suffix(norm):
+    words = norm.split()
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+def trigrams(norm):
+    padded = f"  {norm} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def dictionary_aliases():
+    """
+    Returns a DataFrame (node_id, node_type, alias) from the dictionaries
+    and master-data tables; missing sources are skipped.
+    """
+    rows = []
+
+    def add(node_type, key, *aliases):
+        for alias in aliases:
+            if alias is not None and str(alias).strip() and str(alias) != "nan":
+                rows.append((f"{node_type}:{key}", node_type, str(alias)))
+
+    def load_json(name):
+        path = os.path.join(DICT_DIR, name)
+        if not os.path.exists(path):
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    for c in load_json("campaigns_dictionary.json"):
+        add("campaign", c["campaign_id"], c["campaign_id"], c["campaign_name"])
+    if os.path.exists(CAMPAIGNS_PATH):
+        campaigns = pd.read_csv(CAMPAIGNS_PATH, encoding="utf-8-sig", usecols=["campaign_id", "campaign_name"])
+        for r in campaigns.drop_duplicates().itertuples(index=False):
+            add("campaign", r.campaign_id, r.campaign_id, r.campaign_name)
+    for b in load_json("brands.json"):
+        add("brand", b["name"], b["name"], *b.get("aliases", []))
+    for c in load_json("channels.json"):
+        add("channel", c["name"], c["name"], c["name"].replace("_", " "))
+
+    products_path = os.path.join(MARKETING_DIR, "products_v1.csv")
+    if os.path.exists(products_path):
+        df = pd.read_csv(products_path, encoding="utf-8-sig")
+        df.columns = df.columns.str.strip()
+        for r in df.itertuples(index=False):
+            add("product", r.SKU_id, r.SKU_id, r.SKU_name)
+    for name, node_type, key_col, alias_cols in [
+        ("products.csv", "product", "sku", ["sku", "name"]),
+        ("suppliers.csv", "supplier", "vendorCode", ["vendorCode", "legalName"]),
+    ]:
+        path = os.path.join(PROCUREMENT_DIR, name)
+        if os.path.exists(path):
+            df = pd.read_csv(path, usecols=alias_cols if key_col in alias_cols else [key_col] + alias_cols)
+            for r in df.itertuples(index=False):
+                r = r._asdict()
+                add(node_type, r[key_col], *(r[c] for c in alias_cols))
+    return pd.DataFrame(rows, columns=["node_id", "node_type", "alias"])
+
+
+class EntityLinker:
+    def __init__(self, aliases=None, threshold=DEFAULT_THRESHOLD, cache_size=CACHE_SIZE):
+        """
+        Args:
+            aliases (DataFrame): node_id / node_type / alias rows
+                (dictionary_aliases() by default).
+            threshold (float): Minimum Dice similarity for a fuzzy link.
+        """
+        aliases = dictionary_aliases() if aliases is None else aliases
+        norms = aliases["alias"].map(normalize)
+        stripped = norms.map(strip_legal_suffix)
+        table = pd.concat([
+            aliases.assign(norm=norms),
+            aliases.assign(norm=stripped)[stripped != norms],
+        ], ignore_index=True)
+        table = table[table["norm"] != ""].drop_duplicates(["node_id", "norm"]).reset_index(drop=True)
+
+        self.threshold = threshold
+        self.node_ids = table["node_id"].to_numpy()
+        self.node_types = table["node_type"].to_numpy()
+        self.aliases = table["alias"].to_numpy()
+        self.norms = table["norm"].to_numpy()
+        self.types = sorted(set(self.node_types))
+        self.type_codes = {t: i for i, t in enumerate(self.types)}
+        self.alias_type_codes = np.array([self.type_codes[t] for t in self.node_types], dtype=np.int64)
+
+        self.exact = {}
+        for i, norm in enumerate(self.norms):
+            self.exact.setdefault(norm, []).append(i)
+
+        # trigram inverted index (CSR: gram id -> alias rows)
+        self.gram_ids = {}
+        gram_rows, alias_rows = [], []
+        for i, norm in enumerate(self.norms):
+            for gram in trigrams(norm):
+                gram_rows.append(self.gram_ids.setdefault(gram, len(self.gram_ids)))
+                alias_rows.append(i)
+        gram_rows = np.asarray(gram_rows, dtype=np.int64)
+        order = np.argsort(gram_rows, kind="stable")
+        self.postings = np.asarray(alias_rows, dtype=np.int32)[order]
+        self.posting_ptr = np.concatenate([[0], np.cumsum(np.bincount(gram_rows, minlength=len(self.gram_ids)))])
+        self.alias_grams = np.bincount(alias_rows, minlength=len(self.norms)).astype(np.float32)
+
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.stats = {"cache_hits": 0, "exact": 0, "fuzzy": 0, "unlinked": 0}
+
+    def __len__(self):
+        return len(self.norms)
+
+    # -----------------------------
+    # Linking
+    # -----------------------------
+    def _result(self, mention, row, score, match):
+        if row is None:
+            return None
+        return {
+            "mention": mention,
+            "node_id": self.node_ids[row],
+            "node_type": self.node_types[row],
+            "alias": self.aliases[row],
+            "score": round(float(score), 4),
+            "match": match,
+        }
+
+    def _exact(self, norm, node_type):
+        rows = self.exact.get(norm) or self.exact.get(strip_legal_suffix(norm))
+        if rows and node_type:
+            rows = [r for r in rows if self.node_types[r] == node_type]
+        return rows[0] if rows else None
+
+    def _score_fuzzy(self, norms, node_types):
+        """
+        Returns (best alias row or -1, Dice score) for each normalized mention.
+
+        Only aliases that can reach the threshold are scored: such an alias
+        shares at least ``min_overlap`` trigrams with the mention, hence one
+        of its rarest ``n - min_overlap + 1`` indexed trigrams. Their postings
+        give the candidate (mention, alias) pairs, counted with np.unique; the
+        remaining (common) trigrams are then only looked up for those pairs.
+        """
+        n_alias = len(self.norms)
+        mention_grams = np.array([len(trigrams(n)) for n in norms], dtype=np.float32)
+        mention_types = np.array([self.type_codes.get(t, -2) if t else -1 for t in node_types], dtype=np.int64)
+        bound = self.threshold / (2.0 - self.threshold)
+
+        probe_idx, probe_postings, common = [], [], []
+        for m, norm in enumerate(norms):
+            ids = sorted((self.gram_ids[g] for g in trigrams(norm) if g in self.gram_ids),
+                         key=lambda g: self.posting_ptr[g + 1] - self.posting_ptr[g])
+            min_overlap = max(1, int(np.ceil(bound * mention_grams[m] - 1e-6)))
+            n_probe = len(ids) - min_overlap + 1
+            for g in ids[:max(n_probe, 0)]:
+                start, end = self.posting_ptr[g], self.posting_ptr[g + 1]
+                probe_postings.append(self.postings[start:end])
+                probe_idx.append(np.full(end - start, m, dtype=np.int64))
+            common.append(ids[max(n_probe, 0):] if n_probe > 0 else [])
+
+        best = np.full(len(norms), -1)
+        scores = np.zeros(len(norms), dtype=np.float64)
+        if not probe_postings:
+            return best, scores
+        mention_idx, postings = np.concatenate(probe_idx), np.concatenate(probe_postings)
+        wanted = mention_types[mention_idx]
+        keep = (wanted == -1) | (self.alias_type_codes[postings] == wanted)
+        pairs, overlap = np.unique(mention_idx[keep] * n_alias + postings[keep], return_counts=True)
+        if not len(pairs):
+            return best, scores
+        mention_idx, alias_idx = pairs // n_alias, pairs % n_alias
+
+        # postings are sorted by alias row, so the common trigrams are
+        # membership tests of each mention's (sorted) candidates
+        bounds = np.searchsorted(mention_idx, np.arange(len(norms) + 1))
+        for m, ids in enumerate(common):
+            lo, hi = bounds[m], bounds[m + 1]
+            if lo == hi:
+                continue
+            candidates = alias_idx[lo:hi]
+            for g in ids:
+                posting = self.postings[self.posting_ptr[g]:self.posting_ptr[g + 1]]
+                pos = np.minimum(np.searchsorted(posting, candidates), len(posting) - 1)
+                overlap[lo:hi] += posting[pos] == candidates
+        dice = 2.0 * overlap / (mention_grams[mention_idx] + self.alias_grams[alias_idx])
+
+        # pairs are sorted by (mention, alias); the first pair of each mention
+        # after a stable sort by descending score is its best (lowest row on ties)
+        order = np.lexsort((-dice, mention_idx))
+        mentions, first = np.unique(mention_idx[order], return_index=True)
+        best[mentions] = alias_idx[order[first]]
+        scores[mentions] = dice[order[first]]
+        return best, scores
+
+    def link_batch(self, mentions, labels=None):
+        """
+        Links a batch of mention strings. ``labels`` (NER labels or node
+        types, optional) restrict candidates to the matching node type.
+        Returns one result dict (or None) per mention.
+        """
+        labels = labels if labels is not None else [None] * len(mentions)
+        results = [None] * len(mentions)
+        pending = OrderedDict()  # (norm, type) -> [positions]
+
+        for pos, (mention, label) in enumerate(zip(mentions, labels)):
+            node_type = LABEL_TYPES.get(label, label) if label else None
+            key = (normalize(mention), node_type)
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                cached = self.cache[key]
+                results[pos] = dict(cached, mention=mention) if cached else None
+            else:
+                pending.setdefault(key, []).append(pos)
+
+        fuzzy = []
+        for key in pending:
+            row = self._exact(*key)
+            if row is not None:
+                self._store(key, self._result(None, row, 1.0, "exact"), pending[key], mentions, results)
+                self.stats["exact"] += 1
+            elif key[0]:
+                fuzzy.append(key)
+            else:
+                self._store(key, None, pending[key], mentions, results)
+
+        for start in range(0, len(fuzzy), SCORE_CHUNK):
+            chunk = fuzzy[start:start + SCORE_CHUNK]
+            best, scores = self._score_fuzzy([k[0] for k in chunk], [k[1] for k in chunk])
+            for key, row, score in zip(chunk, best.tolist(), scores.tolist()):
+                result = self._result(None, row, score, "fuzzy") if row >= 0 and score >= self.threshold else None
+                self.stats["fuzzy" if result else "unlinked"] += 1
+                self._store(key, result, pending[key], mentions, results)
+        return results
+
+    def link(self, mention, label=None):
+        return self.link_batch([mention], [label])[0]
+
+    def link_ents(self, ents):
+        """
+        Links NER spans as written by HEL-14/nlp/scripts/extract_entities.py
+        ({"start", "end", "label", "text"}); adds "node_id" / "link" to each.
+        """
+        links = self.link_batch([e["text"] for e in ents], [e.get("label") for e in ents])
+        return [dict(e, node_id=link["node_id"] if link else None, link=link) for e, link in zip(ents, links)]
+
+    def _store(self, key, result, positions, mentions, results):
+        self.cache[key] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        for pos in positions:
+            results[pos] = dict(result, mention=mentions[pos]) if result else None
@@ -0,0 +1,199 @@
+"""
+graph.py
+
+In-memory knowledge graph over the marketing and procurement tables, stored
+in CSR form (indptr / indices / relation codes) for O(1) neighbour slicing.
+
+Nodes use the "<type>:<key>" ids of rag/corpus.py, plus order, customer,
+purchase-order, invoice and risk nodes that have no corpus document. Edges
+are stored in both directions; the reverse copy carries relation code
+``rel + len(RELATIONS)``. Within a row, neighbours are sorted by
+relation and then by neighbour degree (highest first). A fan-out cap is
+shared across the node's relations and keeps the best-connected neighbours
+of each, so a capped lookup costs the same for a brand with 100k orders as
+for a leaf.
+"""
+import json
+import os
+import numpy as np
+import pandas as pd
+
+from etl.cross_domain_queries import read_table
+from etl.procurement.partitioned_store import read_procurement
+from rag.corpus import DICT_DIR, MARKETING_DIR, PROCUREMENT_DIR, data_version
+from etl.marketing.campaign_data import load_campaign_rows
+
+GRAPH_FILE = "graph.npz"
+
+RELATIONS = [
+    "RUNS",          # brand -> campaign
+    "USES_CHANNEL",  # campaign -> channel
+    "HAS_ORDER",     # campaign -> order
+    "CONTAINS",      # order -> product
+    "PLACED",        # customer -> order
+    "OWNS",          # brand -> product
+    "ISSUED_TO",     # purchase order -> supplier
+    "ORDERS",        # purchase order -> product
+    "BILLS",         # invoice -> purchase order
+    "HAS_RISK",      # supplier -> risk
+]
+
+
+def split_limit(sizes, limit):
+    """
+    Shares ``limit`` slots across groups of the given sizes as evenly as
+    possible (unused share of small groups goes to the larger ones).
+    """
+    take = np.zeros(len(sizes), dtype=np.int64)
+    remaining = limit
+    active = np.flatnonzero(sizes)
+    while remaining > 0 and len(active):
+        share = max(1, remaining // len(active))
+        for g in active:
+            extra = min(share, sizes[g] - take[g], remaining)
+            take[g] += extra
+            remaining -= extra
+        active = active[take[active] < sizes[active]]
+    return take
+
+
+def node_type(node_id):
+    return node_id.split(":", 1)[0]
+
+
+def relation_name(code):
+    return RELATIONS[code % len(RELATIONS)]
+
+
+def is_reverse(code):
+    return code >= len(RELATIONS)
+
+
+def _edges(src_type, src, rel, dst_type, dst):
+    df = pd.DataFrame({"src": src.astype(str).values, "dst": dst.astype(str).values}).dropna()
+    df = df[(df["src"] != "") & (df["dst"] != "") & (df["src"] != "nan") & (df["dst"] != "nan")]
+    return pd.DataFrame({"src": src_type + ":" + df["src"], "rel": rel, "dst": dst_type + ":" + df["dst"]})
+
+
+def graph_edges(marketing_dir=MARKETING_DIR, procurement_dir=PROCUREMENT_DIR):
+    """
+    Returns a DataFrame of (src, rel, dst) node-id triples from the source
+    tables. Brand names are mapped onto the brands dictionary spelling.
+    """
+    with open(os.path.join(DICT_DIR, "brands.json"), "r", encoding="utf-8") as f:
+        brand_names = {b["name"].lower(): b["name"] for b in json.load(f)}
+    brand = lambda s: s.astype(str).str.strip().map(lambda b: brand_names.get(b.lower(), b))
+
+    campaigns = load_campaign_rows(os.path.join(marketing_dir, "campaigns_v1.csv"))
+    orders = read_table(os.path.join(marketing_dir, "orders_v1.csv"))
+    products = read_table(os.path.join(marketing_dir, "products_v1.csv"))
+    pos = read_procurement(procurement_dir, "purchase_orders", ["orderNumber", "supplierVendorCode", "productSku"])
+    invoices = read_procurement(procurement_dir, "invoices", ["invoiceNumber", "poOrderNumber"])
+    risks = read_table(os.path.join(procurement_dir, "risks.csv"))
+
+    parts = [
+        _edges("brand", brand(campaigns["brand_name"]), "RUNS", "campaign", campaigns["campaign_id"]),
+        _edges("campaign", campaigns["campaign_id"], "USES_CHANNEL", "channel", campaigns["channel"].str.upper()),
+        _edges("campaign", orders["campaign_id"], "HAS_ORDER", "order", orders["order_id"]),
+        _edges("order", orders["order_id"], "CONTAINS", "product", orders["SKU_id"]),
+        _edges("customer", orders["customer_id"], "PLACED", "order", orders["order_id"]),
+        _edges("brand", brand(products["brand"]), "OWNS", "product", products["SKU_id"]),
+        _edges("po", pos["orderNumber"], "ISSUED_TO", "supplier", pos["supplierVendorCode"]),
+        _edges("po", pos["orderNumber"], "ORDERS", "product", pos["productSku"]),
+        _edges("invoice", invoices["invoiceNumber"], "BILLS", "po", invoices["poOrderNumber"]),
+        _edges("supplier", risks["supplierVendorCode"], "HAS_RISK", "risk", risks["riskId"]),
+    ]
+    return pd.concat(parts, ignore_index=True).drop_duplicates()
+
+
+class KnowledgeGraph:
+    def __init__(self, node_ids, indptr, indices, relations, version=None):
+        self.node_ids = list(node_ids)
+        self.index = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        self.indptr = indptr
+        self.indices = indices
+        self.relations = relations
+        self.version = version
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    @property
+    def edge_count(self):
+        return len(self.indices) // 2
+
+    @classmethod
+    def from_edges(cls, edges, version=None):
+        """
+        Builds the CSR arrays from a (src, rel, dst) DataFrame.
+        """
+        codes, node_ids = pd.factorize(pd.concat([edges["src"], edges["dst"]], ignore_index=True))
+        n_edges = len(edges)
+        src, dst = codes[:n_edges], codes[n_edges:]
+        rel = edges["rel"].map({r: i for i, r in enumerate(RELATIONS)}).to_numpy(dtype=np.int8)
+
+        rows = np.concatenate([src, dst])
+        cols = np.concatenate([dst, src]).astype(np.int32)
+        rels = np.concatenate([rel, rel + len(RELATIONS)]).astype(np.int8)
+        degree = np.bincount(rows, minlength=len(node_ids))
+        order = np.lexsort((-degree[cols], rels, rows))
+        indptr = np.concatenate([[0], np.cumsum(degree)]).astype(np.int64)
+        return cls(node_ids, indptr, cols[order], rels[order], version)
+
+    @classmethod
+    def build(cls):
+        return cls.from_edges(graph_edges(), version=data_version())
+
+    # -----------------------------
+    # Access
+    # -----------------------------
+    def degree(self, node):
+        i = self.index[node] if isinstance(node, str) else node
+        return int(self.indptr[i + 1] - self.indptr[i])
+
+    def neighbors(self, node, limit=None):
+        """
+        Returns (neighbour indices, relation codes) for a node id or index.
+        With ``limit``, at most that many neighbours are returned, shared
+        across relations (see module docstring).
+        """
+        i = self.index[node] if isinstance(node, str) else node
+        start, end = self.indptr[i], self.indptr[i + 1]
+        if limit is None or end - start <= limit:
+            return self.indices[start:end], self.relations[start:end]
+        bounds = np.searchsorted(self.relations[start:end], np.arange(2 * len(RELATIONS) + 1)) + start
+        take = split_limit(np.diff(bounds), limit)
+        picked = np.concatenate([np.arange(b, b + t) for b, t in zip(bounds[:-1], take) if t])
+        return self.indices[picked], self.relations[picked]
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(
+            path, indptr=self.indptr, indices=self.indices, relations=self.relations,
+            node_ids=np.array(self.node_ids, dtype=object).astype(str),
+            meta=np.array(json.dumps({"version": self.version})),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            return cls(data["node_ids"].tolist(), data["indptr"], data["indices"], data["relations"], meta["version"])
+
+    @classmethod
+    def load_or_build(cls, directory):
+        """
+        Loads the saved graph if it matches the current data version,
+        otherwise rebuilds and saves it.
+        """
+        path = os.path.join(directory, GRAPH_FILE)
+        if os.path.exists(path):
+            graph = cls.load(path)
+            if graph.version == data_version():
+                return graph
+        graph = cls.build()
+        graph.save(path)
+        return graph
@@ -0,0 +1,159 @@
+"""
+hybrid.py
+
+Graph-aware hybrid retrieval: vector top-k hits seed a bounded k-hop
+expansion over the knowledge graph.
+
+- Each hop h scans at most ``fanout[h]`` neighbours per frontier node
+  (shared across relations, see KnowledgeGraph.neighbors), and expansion
+  stops as soon as ``budget`` nodes are collected. Work per query is
+  therefore bounded by sum(fanout) * budget, regardless of hub degree.
+- Score: a seed keeps its cosine similarity. Every node also receives
+  ``decay * score / sqrt(degree)`` from each collected neighbour that
+  reaches it, so nodes connected to several seeds rank higher while hubs
+  (channels, big brands) do not win just by being connected to everything.
+- Expansion results are cached (LRU) per seed set, keyed by the seed ids
+  and their rounded scores plus the expansion parameters.
+"""
+import math
+import time
+from collections import OrderedDict
+
+from etl.instrumentation import traced
+from rag.graph import is_reverse, node_type, relation_name
+
+DEFAULT_FANOUT = (12, 4)
+DEFAULT_BUDGET = 40
+DEFAULT_DECAY = 0.5
+CACHE_SIZE = 256
+
+
+class HybridRetriever:
+    def __init__(self, retriever, graph, seeds=5, fanout=DEFAULT_FANOUT, budget=DEFAULT_BUDGET,
+                 decay=DEFAULT_DECAY, cache_size=CACHE_SIZE):
+        """
+        Args:
+            retriever (Retriever): Vector retriever used for the seeds.
+            graph (KnowledgeGraph): Graph to expand over.
+            seeds (int): Vector hits used as seeds.
+            fanout (tuple): Neighbour cap per frontier node, one entry per hop.
+            budget (int): Maximum number of nodes collected (seeds included).
+            decay (float): Score multiplier per hop.
+        """
+        self.retriever = retriever
+        self.graph = graph
+        self.seeds = seeds
+        self.fanout = tuple(fanout)
+        self.budget = budget
+        self.decay = decay
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.docs_by_id = {d["node_id"]: d for d in retriever.docs}
+        self.last_timings = {}
+
+    # -----------------------------
+    # Expansion
+    # -----------------------------
+    @traced("retrieve.graph")
+    def expand(self, seed_hits):
+        """
+        Expands ``seed_hits`` (vector hits: dicts with node_id and score)
+        over the graph. Returns (scores, info, edges) keyed by graph index;
+        seeds that are not graph nodes are kept under their node id.
+        """
+        graph = self.graph
+        scores, info, edges = {}, {}, []
+        frontier = []
+        for hit in seed_hits:
+            key = graph.index.get(hit["node_id"], hit["node_id"])
+            if key in scores:
+                continue
+            scores[key] = hit["score"]
+            info[key] = (0, None, None)
+            if isinstance(key, int):
+                frontier.append(key)
+
+        for hop, cap in enumerate(self.fanout, 1):
+            next_frontier = []
+            for node in frontier:
+                neighbours, relations = graph.neighbors(node, limit=cap)
+                contribution = scores[node] * self.decay
+                parent = info[node][1]
+                for n, rel in zip(neighbours.tolist(), relations.tolist()):
+                    if n == parent:
+                        continue
+                    if n in info:
+                        scores[n] += contribution / math.sqrt(graph.degree(n))
+                        continue
+                    if len(info) >= self.budget:
+                        break
+                    scores[n] = contribution / math.sqrt(graph.degree(n))
+                    info[n] = (hop, node, rel)
+                    edges.append((node, rel, n))
+                    next_frontier.append(n)
+                if len(info) >= self.budget:
+                    break
+            if len(info) >= self.budget:
+                break
+            frontier = sorted(next_frontier, key=lambda n: -scores[n])
+        return scores, info, edges
+
+    def _node(self, key, score, info):
+        node_id = self.graph.node_ids[key] if isinstance(key, int) else key
+        doc = self.docs_by_id.get(node_id, {})
+        hop, via, rel = info
+        return {
+            "node_id": node_id,
+            "node_type": doc.get("node_type", node_type(node_id)),
+            "title": doc.get("title", node_id.split(":", 1)[-1]),
+            "text": doc.get("text", ""),
+            "score": round(float(score), 4),
+            "hop": hop,
+            "via": self.graph.node_ids[via] if via is not None else None,
+            "relation": relation_name(rel) if rel is not None else None,
+        }
+
+    def _relationship(self, src, rel, dst):
+        ids = self.graph.node_ids
+        source, target = (ids[dst], ids[src]) if is_reverse(rel) else (ids[src], ids[dst])
+        return {"source": source, "relation": relation_name(rel), "target": target}
+
+    # -----------------------------
+    # Query
+    # -----------------------------
+    def retrieve(self, question, k=10):
+        """
+        Returns {"nodes": ranked node dicts, "relationships": traversed edges,
+        "seeds": vector hits} for ``question``.
+        """
+        start = time.perf_counter()
+        seed_hits = self.retriever.retrieve(question, k=self.seeds)
+        vector_done = time.perf_counter()
+
+        key = (tuple((h["node_id"], round(h["score"], 3)) for h in seed_hits),
+               self.fanout, self.budget, self.decay, k)
+        cache_hit = key in self.cache
+        if cache_hit:
+            self.cache.move_to_end(key)
+            result = self.cache[key]
+        else:
+            scores, info, edges = self.expand(seed_hits)
+            ranked = sorted(scores, key=lambda n: -scores[n])[:k]
+            result = {
+                "nodes": [self._node(n, scores[n], info[n]) for n in ranked],
+                "relationships": [self._relationship(*e) for e in edges],
+                "seeds": seed_hits,
+                "expanded": len(info),
+            }
+            self.cache[key] = result
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+        end = time.perf_counter()
+        self.last_timings = {
+            "vector_ms": round((vector_done - start) * 1000, 3),
+            "graph_ms": round((end - vector_done) * 1000, 3),
+            "total_ms": round((end - start) * 1000, 3),
+            "cache_hit": cache_hit,
+        }
+        return result
@@ -0,0 +1,283 @@
+"""
+ivf_index.py
+
+Approximate inner-product index (IVF, optionally with product quantization)
+for large RAG corpora.
+
+- Training clusters a sample of the vectors into ``nlist`` inverted lists
+  (spherical k-means). Vectors are stored grouped by list in one contiguous
+  array (CSR layout: offsets + ids), so probing a list is a slice.
+- With ``pq_m > 0`` each vector is also encoded as ``pq_m`` uint8 codes
+  (256 centroids per sub-space). Search then scores probed rows with a
+  per-query lookup table and, if the float vectors are kept, re-ranks the
+  best ``k * refine`` candidates exactly.
+- ``add`` assigns new vectors to their lists and appends them to a small
+  delta segment that is searched exactly and merged into the main lists
+  once it grows past ``COMPACT_RATIO`` of the index.
+
+Knobs: ``nprobe`` (lists scanned per query) and ``refine`` trade latency for
+recall at search time; ``nlist`` and ``pq_m`` are fixed at build time.
+"""
+import json
+import os
+import numpy as np
+
+from rag.vector_index import merge_topk
+
+COMPACT_MIN_ROWS = 4096
+COMPACT_RATIO = 0.05
+ASSIGN_BLOCK_ROWS = 65536
+PQ_CENTROIDS = 256
+PQ_SAMPLE_ROWS = 32768
+
+
+# -----------------------------
+# K-means helpers
+# -----------------------------
+def assign(x, centroids, spherical=True, block_rows=ASSIGN_BLOCK_ROWS):
+    """
+    Returns the index of the nearest centroid for every row of ``x``
+    (max inner product if ``spherical``, else min L2 distance).
+    """
+    out = np.empty(len(x), dtype=np.int32)
+    half_norms = None if spherical else 0.5 * (centroids ** 2).sum(axis=1)
+    for start in range(0, len(x), block_rows):
+        scores = np.asarray(x[start:start + block_rows], dtype=np.float32) @ centroids.T
+        if half_norms is not None:
+            scores -= half_norms
+        out[start:start + len(scores)] = scores.argmax(axis=1)
+    return out
+
+
+def kmeans(x, k, iters=12, spherical=True, seed=0):
+    """
+    Lloyd's k-means on the rows of ``x``; empty clusters are re-seeded
+    from random rows. Returns a (k, d) float32 centroid matrix.
+    """
+    rng = np.random.default_rng(seed)
+    x = np.ascontiguousarray(x, dtype=np.float32)
+    centroids = x[rng.choice(len(x), k, replace=len(x) < k)].copy()
+    for _ in range(iters):
+        labels = assign(x, centroids, spherical)
+        order = np.argsort(labels, kind="stable")
+        counts = np.bincount(labels, minlength=k)
+        present = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[present]
+        centroids[present] = np.add.reduceat(x[order], starts, axis=0) / counts[present, None]
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = x[rng.choice(len(x), len(empty))]
+        if spherical:
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            centroids /= np.where(norms > 0, norms, 1.0)
+    return centroids
+
+
+# -----------------------------
+# IVF index
+# -----------------------------
+class IVFIndex:
+    kind = "ivf"
+
+    def __init__(self, dim, nlist=256, pq_m=0, keep_vectors=True, nprobe=8, refine=16):
+        """
+        Args:
+            dim (int): Embedding dimension.
+            nlist (int): Number of inverted lists (coarse clusters).
+            pq_m (int): PQ sub-spaces (0 disables PQ); must divide ``dim``.
+            keep_vectors (bool): Keep float32 vectors (always true without PQ).
+            nprobe (int): Lists scanned per query.
+            refine (int): With PQ, re-rank ``k * refine`` candidates exactly.
+        """
+        if pq_m and dim % pq_m:
+            raise ValueError(f"pq_m={pq_m} must divide dim={dim}")
+        self.dim = dim
+        self.nlist = nlist
+        self.pq_m = pq_m
+        self.keep_vectors = keep_vectors or not pq_m
+        self.nprobe = nprobe
+        self.refine = refine
+
+        self.centroids = None
+        self.codebooks = None  # (pq_m, 256, dim // pq_m)
+        self.offsets = np.zeros(nlist + 1, dtype=np.int64)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.vectors = np.empty((0, dim), dtype=np.float32) if self.keep_vectors else None
+        self.codes = np.empty((0, pq_m), dtype=np.uint8) if pq_m else None
+
+        self.delta_ids = np.empty(0, dtype=np.int64)
+        self.delta_lists = np.empty(0, dtype=np.int32)
+        self.delta_vectors = np.empty((0, dim), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.ids) + len(self.delta_ids)
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    # -----------------------------
+    # Build
+    # -----------------------------
+    def train(self, vectors, sample_rows=65536, seed=0):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        rng = np.random.default_rng(seed)
+        sample = vectors[np.sort(rng.choice(len(vectors), min(sample_rows, len(vectors)), replace=False))]
+        self.nlist = min(self.nlist, len(sample))
+        self.offsets = np.zeros(self.nlist + 1, dtype=np.int64)
+        self.centroids = kmeans(sample, self.nlist, spherical=True, seed=seed)
+        if self.pq_m:
+            sub = sample[:PQ_SAMPLE_ROWS].reshape(-1, self.pq_m, self.dim // self.pq_m)
+            self.codebooks = np.stack([
+                kmeans(sub[:, j], PQ_CENTROIDS, iters=8, spherical=False, seed=seed + j) for j in range(self.pq_m)
+            ])
+
+    @classmethod
+    def build(cls, vectors, nlist=None, **params):
+        """
+        Trains on (a sample of) ``vectors`` and adds them all. ``nlist``
+        defaults to ~4 * sqrt(n).
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        nlist = nlist or max(1, int(4 * np.sqrt(len(vectors))))
+        index = cls(vectors.shape[1], nlist=nlist, **params)
+        index.train(vectors)
+        index.add(vectors)
+        index.compact()
+        return index
+
+    def encode(self, vectors):
+        sub = vectors.reshape(len(vectors), self.pq_m, -1)
+        codes = np.empty((len(vectors), self.pq_m), dtype=np.uint8)
+        for j in range(self.pq_m):
+            codes[:, j] = assign(sub[:, j], self.codebooks[j], spherical=False)
+        return codes
+
+    def add(self, vectors, ids=None):
+        """
+        Appends vectors (ids default to consecutive integers after the
+        current size) to the delta segment; compacts when it grows large.
+        """
+        if not self.is_trained:
+            raise RuntimeError("IVFIndex must be trained before add()")
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of shape (n, {self.dim}), got {vectors.shape}")
+        if ids is None:
+            ids = np.arange(len(self), len(self) + len(vectors), dtype=np.int64)
+        self.delta_ids = np.concatenate([self.delta_ids, np.asarray(ids, dtype=np.int64)])
+        self.delta_lists = np.concatenate([self.delta_lists, assign(vectors, self.centroids)])
+        self.delta_vectors = np.vstack([self.delta_vectors, vectors])
+        if len(self.delta_ids) >= max(COMPACT_MIN_ROWS, COMPACT_RATIO * len(self.ids)):
+            self.compact()
+
+    def compact(self):
+        """
+        Merges the delta segment into the inverted lists.
+        """
+        if not len(self.delta_ids):
+            return
+        counts = np.diff(self.offsets)
+        lists = np.concatenate([np.repeat(np.arange(self.nlist, dtype=np.int32), counts), self.delta_lists])
+        order = np.argsort(lists, kind="stable")
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(lists, minlength=self.nlist))]).astype(np.int64)
+        self.ids = np.concatenate([self.ids, self.delta_ids])[order]
+        if self.keep_vectors:
+            self.vectors = np.ascontiguousarray(np.vstack([self.vectors, self.delta_vectors])[order])
+        if self.pq_m:
+            self.codes = np.ascontiguousarray(np.vstack([self.codes, self.encode(self.delta_vectors)])[order])
+        self.delta_ids = np.empty(0, dtype=np.int64)
+        self.delta_lists = np.empty(0, dtype=np.int32)
+        self.delta_vectors = np.empty((0, self.dim), dtype=np.float32)
+
+    # -----------------------------
+    # Search
+    # -----------------------------
+    def _search_one(self, q, lists, k, refine):
+        slices = [(self.offsets[l], self.offsets[l + 1]) for l in lists]
+        positions = np.concatenate([np.arange(a, b) for a, b in slices]) if slices else np.empty(0, dtype=np.int64)
+        if not len(positions):
+            return np.empty(0, dtype=np.float32), positions
+
+        if self.pq_m:
+            lut = np.einsum("msd,md->ms", self.codebooks, q.reshape(self.pq_m, -1))
+            codes = np.concatenate([self.codes[a:b] for a, b in slices])
+            scores = lut.ravel()[codes.astype(np.int64) + np.arange(self.pq_m) * PQ_CENTROIDS].sum(axis=1)
+            if self.keep_vectors and refine:
+                keep = min(len(scores), k * refine)
+                top = np.argpartition(-scores, keep - 1)[:keep]
+                positions = positions[top]
+                scores = self.vectors[positions] @ q
+        else:
+            scores = np.concatenate([self.vectors[a:b] @ q for a, b in slices])
+
+        kk = min(k, len(scores))
+        top = np.argpartition(-scores, kk - 1)[:kk]
+        return scores[top].astype(np.float32), self.ids[positions[top]]
+
+    def search(self, queries, k=10, nprobe=None, refine=None):
+        """
+        Returns (scores, ids), each of shape (n_queries, k), best first.
+        ids are -1 where fewer than k candidates were found.
+        """
+        queries = np.ascontiguousarray(np.atleast_2d(queries), dtype=np.float32)
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        refine = self.refine if refine is None else refine
+        probes = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+
+        out_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        out_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for qi, q in enumerate(queries):
+            scores, ids = self._search_one(q, probes[qi], k, refine)
+            if len(self.delta_ids):
+                delta_scores = self.delta_vectors @ q
+                scores = np.concatenate([scores, delta_scores])
+                ids = np.concatenate([ids, self.delta_ids])
+            best_s, best_i = merge_topk(
+                np.empty((1, 0), dtype=np.float32), np.empty((1, 0), dtype=np.int64), scores[None], ids[None], k
+            )
+            out_scores[qi, :best_s.shape[1]] = best_s[0]
+            out_ids[qi, :best_i.shape[1]] = best_i[0]
+        return out_scores, out_ids
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def save(self, directory):
+        self.compact()
+        os.makedirs(directory, exist_ok=True)
+        arrays = {"centroids": self.centroids, "offsets": self.offsets, "ids": self.ids}
+        if self.keep_vectors:
+            arrays["vectors"] = self.vectors
+        if self.pq_m:
+            arrays["codes"] = self.codes
+            arrays["codebooks"] = self.codebooks
+        for name, arr in arrays.items():
+            np.save(os.path.join(directory, f"ivf_{name}.npy"), arr)
+        meta = {
+            "dim": self.dim, "nlist": self.nlist, "pq_m": self.pq_m,
+            "keep_vectors": self.keep_vectors, "nprobe": self.nprobe, "refine": self.refine,
+        }
+        with open(os.path.join(directory, "ivf_meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+    @classmethod
+    def load(cls, directory, mmap=False):
+        """
+        Loads a saved index; with ``mmap`` the list payloads (ids, vectors,
+        codes) stay on disk and are paged in as lists are probed.
+        """
+        with open(os.path.join(directory, "ivf_meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls(**meta)
+        mode = "r" if mmap else None
+        path = lambda name: os.path.join(directory, f"ivf_{name}.npy")
+        index.centroids = np.load(path("centroids"))
+        index.offsets = np.load(path("offsets"))
+        index.ids = np.load(path("ids"), mmap_mode=mode)
+        if index.keep_vectors:
+            index.vectors = np.load(path("vectors"), mmap_mode=mode)
+        if index.pq_m:
+            index.codes = np.load(path("codes"), mmap_mode=mode)
+            index.codebooks = np.load(path("codebooks"))
+        return index
@@ -0,0 +1,225 @@
+"""
+pipeline.py
+
+Asynchronous answer pipeline for RAG Chat: retrieval and generation run on a
+worker thread and tokens are handed to the caller through a queue, so the
+Streamlit script thread only renders.
+
+Generators are pluggable objects with ``generate(question, result, history)``
+yielding text chunks:
+
+- StubGenerator (default): deterministic, offline summary of the retrieved
+  nodes and relationships, emitted word by word.
+- OllamaGenerator: streams from a local Ollama server (requires the
+  ``ollama`` package); selected with RAG_GENERATOR=ollama.
+
+With an AnswerCache, repeated and near-duplicate questions are answered on
+the calling thread from the cache, skipping retrieval and generation.
+"""
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from etl.instrumentation import count, span
+
+TOP_K = 8
+MAX_RELATIONSHIPS = 15
+HISTORY_TURNS = 6
+WORKERS = 2
+
+_DONE = object()
+
+
+def format_answer(result, max_relationships=MAX_RELATIONSHIPS):
+    """
+    Grounded plain-text summary of a HybridRetriever result.
+    """
+    nodes, relationships = result["nodes"], result["relationships"][:max_relationships]
+    if not nodes:
+        return "No matching graph nodes found."
+    lines = [f"Top {len(nodes)} matching graph nodes:"]
+    for i, n in enumerate(nodes, 1):
+        via = f", via {n['relation']} from {n['via']}" if n["via"] else ""
+        summary = f" — {n['text'][:240]}" if n["text"] else ""
+        lines.append(f"{i}. {n['title']} ({n['node_id']}, score {n['score']:.2f}{via}){summary}")
+    if relationships:
+        lines.append("Relationships:")
+        lines += [f"• {r['source']} —{r['relation']}→ {r['target']}" for r in relationships]
+    return "\n".join(lines)
+
+
+# -----------------------------
+# Generators
+# -----------------------------
+class StubGenerator:
+    name = "stub"
+
+    def __init__(self, delay=0.0):
+        """
+        Args:
+            delay (float): Seconds to wait per token (to exercise streaming).
+        """
+        self.delay = delay
+
+    def generate(self, question, result, history=()):
+        for token in re.findall(r"\S+\s*|\n", format_answer(result)):
+            if self.delay:
+                time.sleep(self.delay)
+            yield token
+
+
+class OllamaGenerator:
+    name = "ollama"
+
+    def __init__(self, model=None, host=None):
+        import ollama
+
+        self.model = model or os.environ.get("RAG_OLLAMA_MODEL", "llama3.1")
+        self.client = ollama.Client(host=host or os.environ.get("OLLAMA_HOST"))
+
+    def generate(self, question, result, history=()):
+        context = format_answer(result)
+        messages = [{
+            "role": "system",
+            "content": "Answer using only the knowledge-graph context below. Cite node ids.\n\n" + context,
+        }]
+        messages += [{"role": m["role"], "content": m["content"]} for m in history]
+        messages.append({"role": "user", "content": question})
+        for chunk in self.client.chat(model=self.model, messages=messages, stream=True):
+            yield chunk["message"]["content"]
+
+
+def get_generator(name=None):
+    name = name or os.environ.get("RAG_GENERATOR", "stub")
+    if name == "stub":
+        return StubGenerator()
+    if name == "ollama":
+        return OllamaGenerator()
+    raise ValueError(f"Unknown generator: {name}")
+
+
+# -----------------------------
+# Pipeline
+# -----------------------------
+class AnswerStream:
+    """
+    Iterable over the tokens of one answer. ``metadata`` is complete once
+    iteration finishes; worker errors are re-raised in the consumer.
+    """
+
+    def __init__(self):
+        self.tokens = queue.Queue()
+        self.text = ""
+        self.metadata = {}
+        self.error = None
+
+    def __iter__(self):
+        while True:
+            token = self.tokens.get()
+            if token is _DONE:
+                break
+            self.text += token
+            yield token
+        if self.error is not None:
+            raise self.error
+
+
+class AnswerPipeline:
+    def __init__(self, retriever, generator=None, cache=None, workers=WORKERS, k=TOP_K, history_turns=HISTORY_TURNS):
+        """
+        Args:
+            retriever (HybridRetriever): Retrieval backend.
+            generator: Token generator (StubGenerator by default).
+            cache (AnswerCache): Optional answer cache.
+            workers (int): Concurrent answers in flight.
+            history_turns (int): Previous messages passed to the generator.
+        """
+        self.retriever = retriever
+        self.generator = generator or get_generator()
+        self.cache = cache
+        self.k = k
+        self.history_turns = history_turns
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rag-answer")
+        self.lock = threading.Lock()
+
+    @property
+    def version(self):
+        return self.retriever.retriever.version
+
+    def submit(self, question, history=()):
+        """
+        Starts answering ``question`` in the background and returns an
+        AnswerStream immediately (already complete on a cache hit).
+        """
+        stream = AnswerStream()
+        if self.cache is not None:
+            start = time.perf_counter()
+            entry, match, similarity = self.cache.get(question, self.version)
+            count("answer_cache.hits" if entry is not None else "answer_cache.misses")
+            if entry is not None:
+                lookup_ms = round((time.perf_counter() - start) * 1000, 3)
+                stream.metadata = dict(
+                    entry["metadata"],
+                    latency_ms=lookup_ms,
+                    timings={"cache_lookup_ms": lookup_ms, "ttft_ms": lookup_ms, "total_ms": lookup_ms},
+                    cache={"hit": True, "match": match, "similarity": round(similarity, 4),
+                           "cached_question": entry["question"]},
+                )
+                stream.tokens.put(entry["answer"])
+                stream.tokens.put(_DONE)
+                return stream
+        history = list(history)[-self.history_turns:] if self.history_turns else []
+        self.executor.submit(self._run, stream, question, history, time.perf_counter())
+        return stream
+
+    def _run(self, stream, question, history, submitted):
+        try:
+            start = time.perf_counter()
+            with self.lock, span("retrieve"):  # retriever caches are not thread-safe
+                result = self.retriever.retrieve(question, k=self.k)
+                retrieval = dict(self.retriever.last_timings)
+            retrieved = time.perf_counter()
+
+            first_token = None
+            tokens = []
+            with span("generate", generator=self.generator.name):
+                for token in self.generator.generate(question, result, history):
+                    if first_token is None:
+                        first_token = time.perf_counter()
+                    tokens.append(token)
+                    stream.tokens.put(token)
+            end = time.perf_counter()
+
+            backend = self.retriever.retriever
+            relationships = result["relationships"][:MAX_RELATIONSHIPS]
+            stream.metadata = {
+                "retrieved_nodes": [n["node_id"] for n in result["nodes"]],
+                "similarity_scores": [n["score"] for n in result["nodes"]],
+                "relationships": relationships,
+                "top_chunks": [
+                    {"node_id": h["node_id"], "title": h["title"], "text": h["text"]} for h in result["seeds"]
+                ],
+                "latency_ms": round((end - submitted) * 1000, 2),
+                "timings": {
+                    "queue_ms": round((start - submitted) * 1000, 3),
+                    "retrieval_ms": round((retrieved - start) * 1000, 3),
+                    "retrieval": retrieval,
+                    "ttft_ms": round(((first_token or end) - submitted) * 1000, 3),
+                    "generation_ms": round((end - retrieved) * 1000, 3),
+                    "total_ms": round((end - submitted) * 1000, 3),
+                },
+                "generator": self.generator.name,
+                "expanded_nodes": result["expanded"],
+                "index_version": backend.version,
+                "index_size": len(backend),
+                "cache": {"hit": False},
+            }
+            if self.cache is not None:
+                self.cache.put(question, backend.version, "".join(tokens), stream.metadata)
+        except Exception as e:
+            stream.error = e
+        finally:
+            stream.tokens.put(_DONE)
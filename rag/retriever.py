@@ -0,0 +1,133 @@
+"""
+retriever.py
+
+Retrieval service used by the RAG Chat page: embeds the question with the
+same offline embedder as the corpus and returns the top-k graph nodes with
+their similarity scores.
+"""
+import json
+import os
+import time
+import numpy as np
+
+from etl.instrumentation import traced
+from etl.marketing.campaign_data import ROOT_DIR
+from rag.corpus import build_corpus, data_version
+from rag.embeddings import get_embedder
+from rag.ivf_index import IVFIndex
+from rag.vector_index import FlatIndex
+
+INDEX_DIR = os.path.join(ROOT_DIR, "data", "processed", "rag")
+INDEX_TYPES = {"flat": FlatIndex, "ivf": IVFIndex}
+
+# Corpora at least this large get the approximate IVF index by default
+IVF_MIN_ROWS = 100_000
+
+
+class Retriever:
+    def __init__(self, docs, index, embedder, version):
+        self.docs = docs
+        self.index = index
+        self.embedder = embedder
+        self.version = version
+
+    def __len__(self):
+        return len(self.docs)
+
+    @classmethod
+    def build(cls, docs=None, embedder=None, index_type="auto", quantize=False, **ivf_params):
+        """
+        Embeds ``docs`` (the full corpus by default) into a new index.
+
+        Args:
+            index_type (str): "flat" (exact), "ivf" (approximate) or "auto"
+                (IVF from IVF_MIN_ROWS documents on).
+            quantize (bool): int8 storage for the flat index.
+            ivf_params: nlist / pq_m / keep_vectors / nprobe / refine for IVFIndex.
+        """
+        embedder = embedder or get_embedder()
+        docs = build_corpus() if docs is None else docs
+        vectors = np.empty((len(docs), embedder.dim), dtype=np.float32)
+        batch = 4096
+        for start in range(0, len(docs), batch):
+            vectors[start:start + batch] = embedder.embed([d["text"] for d in docs[start:start + batch]])
+
+        if index_type == "auto":
+            index_type = "ivf" if len(docs) >= IVF_MIN_ROWS else "flat"
+        if index_type == "ivf":
+            index = IVFIndex.build(vectors, **ivf_params)
+        else:
+            index = FlatIndex(embedder.dim, quantize=quantize)
+            index.add(vectors)
+        return cls(docs, index, embedder, data_version())
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def save(self, directory=INDEX_DIR):
+        self.index.save(directory)
+        with open(os.path.join(directory, "nodes.jsonl"), "w", encoding="utf-8") as f:
+            for doc in self.docs:
+                f.write(json.dumps(doc, ensure_ascii=False) + "\n")
+        manifest = {
+            "version": self.version,
+            "embedder": self.embedder.name,
+            "dim": self.embedder.dim,
+            "model": getattr(self.embedder, "model", None),
+            "index": self.index.kind,
+            "quantize": getattr(self.index, "quantize", False),
+            "count": len(self.docs),
+        }
+        with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+    @classmethod
+    def load(cls, directory=INDEX_DIR, mmap=False):
+        with open(os.path.join(directory, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        with open(os.path.join(directory, "nodes.jsonl"), "r", encoding="utf-8") as f:
+            docs = [json.loads(line) for line in f]
+        embedder = get_embedder(manifest["embedder"], dim=manifest["dim"], model=manifest.get("model"))
+        index = INDEX_TYPES[manifest.get("index", "flat")].load(directory, mmap=mmap)
+        return cls(docs, index, embedder, manifest["version"])
+
+    @classmethod
+    def load_or_build(cls, directory=INDEX_DIR):
+        """
+        Loads the offline index if it matches the current data version,
+        otherwise rebuilds and saves it.
+        """
+        manifest_path = os.path.join(directory, "manifest.json")
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                if json.load(f).get("version") == data_version():
+                    return cls.load(directory)
+        retriever = cls.build()
+        retriever.save(directory)
+        return retriever
+
+    # -----------------------------
+    # Query
+    # -----------------------------
+    @traced("retrieve.vector")
+    def retrieve_batch(self, questions, k=5):
+        """
+        Returns one ranked hit list per question. Each hit is the corpus
+        document plus "score" (cosine similarity) and "rank".
+        """
+        scores, ids = self.index.search(self.embedder.embed(questions), k=k)
+        results = []
+        for row_scores, row_ids in zip(scores, ids):
+            hits = []
+            for rank, (score, idx) in enumerate(zip(row_scores.tolist(), row_ids.tolist()), 1):
+                if idx < 0:
+                    break
+                hits.append(dict(self.docs[idx], score=round(float(score), 4), rank=rank))
+            results.append(hits)
+        return results
+
+    def retrieve(self, question, k=5):
+        start = time.perf_counter()
+        hits = self.retrieve_batch([question], k=k)[0]
+        self.last_latency_ms = (time.perf_counter() - start) * 1000
+        return hits
@@ -0,0 +1,151 @@
+"""
+vector_index.py
+
+Exact (brute-force) inner-product index over L2-normalized embeddings.
+
+Vectors live in one contiguous float32 matrix, or as int8 codes with a
+per-row scale (4x less memory). Search scans the matrix in fixed-size
+blocks, scores a whole batch of queries per block with one matrix product,
+and keeps a running top-k per query, so memory use stays bounded at any
+corpus size.
+"""
+import os
+import numpy as np
+
+BLOCK_ROWS = 65536
+
+
+def quantize_int8(vectors):
+    """
+    Symmetric per-row int8 quantization. Returns (codes, scales) with
+    vectors ~= codes * scales[:, None].
+    """
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.round(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def merge_topk(best_scores, best_ids, scores, ids, k):
+    """
+    Merges candidate (scores, ids) of shape (n_queries, m) into the running
+    per-query top-k and returns the new (scores, ids), sorted descending.
+    """
+    all_scores = np.concatenate([best_scores, scores], axis=1)
+    all_ids = np.concatenate([best_ids, ids], axis=1)
+    if all_scores.shape[1] > k:
+        part = np.argpartition(-all_scores, k - 1, axis=1)[:, :k]
+        all_scores = np.take_along_axis(all_scores, part, axis=1)
+        all_ids = np.take_along_axis(all_ids, part, axis=1)
+    order = np.argsort(-all_scores, axis=1, kind="stable")
+    return np.take_along_axis(all_scores, order, axis=1), np.take_along_axis(all_ids, order, axis=1)
+
+
+class FlatIndex:
+    kind = "flat"
+
+    def __init__(self, dim, quantize=False):
+        """
+        Args:
+            dim (int): Embedding dimension.
+            quantize (bool): Store int8 codes + per-row scales instead of float32.
+        """
+        self.dim = dim
+        self.quantize = quantize
+        self.vectors = np.empty((0, dim), dtype=np.int8 if quantize else np.float32)
+        self.scales = np.empty(0, dtype=np.float32)
+
+    def __len__(self):
+        return self._size
+
+    # Rows live in buffers with spare capacity (doubled when full), so a
+    # build from many batches copies every row O(1) times amortized.
+    @property
+    def vectors(self):
+        return self._vectors[:self._size]
+
+    @vectors.setter
+    def vectors(self, value):
+        self._vectors = value
+        self._size = len(value)
+
+    @property
+    def scales(self):
+        return self._scales[:self._size]
+
+    @scales.setter
+    def scales(self, value):
+        self._scales = value
+
+    def _reserve(self, rows):
+        if rows <= len(self._vectors):
+            return
+        capacity = max(rows, 2 * len(self._vectors), 1024)
+        grown = np.empty((capacity, self.dim), dtype=self._vectors.dtype)
+        grown[:self._size] = self._vectors[:self._size]
+        self._vectors = grown
+        if self.quantize:
+            scales = np.empty(capacity, dtype=np.float32)
+            scales[:self._size] = self._scales[:self._size]
+            self._scales = scales
+
+    def add(self, vectors):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of shape (n, {self.dim}), got {vectors.shape}")
+        start, end = self._size, self._size + len(vectors)
+        self._reserve(end)
+        if self.quantize:
+            codes, scales = quantize_int8(vectors)
+            self._vectors[start:end] = codes
+            self._scales[start:end] = scales
+        else:
+            self._vectors[start:end] = vectors
+        self._size = end
+
+    def search(self, queries, k=10, block_rows=BLOCK_ROWS):
+        """
+        Returns (scores, ids), each of shape (n_queries, k), best first.
+        ids are -1 where the index holds fewer than k vectors.
+        """
+        queries = np.ascontiguousarray(np.atleast_2d(queries), dtype=np.float32)
+        n_q = len(queries)
+        best_scores = np.full((n_q, 0), -np.inf, dtype=np.float32)
+        best_ids = np.full((n_q, 0), -1, dtype=np.int64)
+        queries_t = queries.T.copy()
+
+        for start in range(0, len(self.vectors), block_rows):
+            block = self.vectors[start:start + block_rows]
+            if self.quantize:
+                scores = (block.astype(np.float32) @ queries_t) * self.scales[start:start + len(block), None]
+            else:
+                scores = block @ queries_t
+            scores = scores.T  # (n_q, rows)
+            kk = min(k, scores.shape[1])
+            part = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+            cand_scores = np.take_along_axis(scores, part, axis=1)
+            best_scores, best_ids = merge_topk(best_scores, best_ids, cand_scores, part + start, k)
+
+        if best_scores.shape[1] < k:
+            pad = k - best_scores.shape[1]
+            best_scores = np.pad(best_scores, ((0, 0), (0, pad)), constant_values=-np.inf)
+            best_ids = np.pad(best_ids, ((0, 0), (0, pad)), constant_values=-1)
+        return best_scores, best_ids
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "vectors.npy"), self.vectors)
+        if self.quantize:
+            np.save(os.path.join(directory, "scales.npy"), self.scales)
+
+    @classmethod
+    def load(cls, directory, mmap=False):
+        vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r" if mmap else None)
+        index = cls(vectors.shape[1], quantize=vectors.dtype == np.int8)
+        index.vectors = vectors
+        if index.quantize:
+            index.scales = np.load(os.path.join(directory, "scales.npy"))
+        return index
@@ -1,42 +1,94 @@
+# Run from the repository root: python -m scripts.validate_csv [--data-dir DIR]
+"""
+Checks the marketing CSVs of a data directory (the processed exports by
+default, or a scaled benchmark copy):
+  1) row counts, when expected counts are given
+  2) referential integrity of orders: campaign_id (or "organic"),
+     (campaign_id, ad_group_id) and SKU_id
+  3) every campaign order falls inside its campaign's date window
+     (earliest ad-group start to latest ad-group end)
+"""
+import argparse
+import os
+import sys
 import pandas as pd
 
-# CSV paths
-camp = "data/processed/marketing/campaigns_summary.csv"
-prod = "data/processed/marketing/products_v1.csv"
-ordr = "data/processed/marketing/orders_v1.csv"
-
-# Load
-dfc = pd.read_csv(camp)
-dfp = pd.read_csv(prod)
-dfo = pd.read_csv(ordr)
-
-# 1) Basic count checks
-assert len(dfc) == 30, f"Expected 30 campaigns, got {len(dfc)}"
-assert len(dfp) == 200, f"Expected 200 products, got {len(dfp)}"
-assert len(dfo) == 500, f"Expected 500 orders, got {len(dfo)}"
-
-# 2) Referential integrity
-camp_ids = set(dfc["campaign_id"])
-prod_ids = set(dfp["product_id"])
-bad_c = dfo.loc[~dfo["campaign_id"].isin(camp_ids)]
-bad_p = dfo.loc[~dfo["product_id"].isin(prod_ids)]
-assert bad_c.empty, f"{len(bad_c)} orders reference missing campaign_id"
-assert bad_p.empty, f"{len(bad_p)} orders reference missing product_id"
-
-# 3) Date range validation
-dfc["start_date"] = pd.to_datetime(dfc["start_date"])
-dfc["end_date"] = pd.to_datetime(dfc["end_date"])
-dfo["order_date"] = pd.to_datetime(dfo["order_date"])
-
-merged = dfo.merge(
-    dfc[["campaign_id", "start_date", "end_date"]],
-    on="campaign_id",
-    how="left"
-)
-viol = merged[
-    (merged["order_date"] < merged["start_date"]) |
-    (merged["order_date"] > merged["end_date"])
-]
-assert viol.empty, f"{len(viol)} orders fall outside campaign period"
-
-print("[OK] CSV validation passed for counts, keys, and date ranges.")
+from etl.instrumentation import span
+
+DATA_DIR = "data/processed/marketing"
+ORGANIC = "organic"
+
+
+def read_columns(path, columns):
+    df = pd.read_csv(path, encoding="utf-8-sig", usecols=lambda c: c.strip() in columns, dtype=str)
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def validate(data_dir=DATA_DIR, expected=None):
+    """
+    Returns a list of failure messages (empty when the data is consistent).
+
+    Args:
+        expected (dict): Optional {"campaigns", "products", "orders"} row counts.
+    """
+    with span("load"):
+        dfc = read_columns(os.path.join(data_dir, "campaigns_v1.csv"),
+                           {"campaign_id", "ad_group_id", "start_date", "end_date"})
+        dfp = read_columns(os.path.join(data_dir, "products_v1.csv"), {"SKU_id"})
+        dfo = read_columns(os.path.join(data_dir, "orders_v1.csv"),
+                           {"campaign_id", "ad_group_id", "SKU_id", "Order_date"})
+    failures = []
+
+    # 1) Basic count checks
+    counts = {"campaigns": dfc["campaign_id"].nunique(), "products": len(dfp), "orders": len(dfo)}
+    for name, n in (expected or {}).items():
+        if n is not None and counts[name] != n:
+            failures.append(f"Expected {n} {name}, got {counts[name]}")
+
+    # 2) Referential integrity
+    with span("check.keys"):
+        campaign = dfo["campaign_id"].fillna("")
+        bad_c = ~(campaign.isin(dfc["campaign_id"]) | (campaign == ORGANIC))
+        has_group = dfo["ad_group_id"].notna() & (dfo["ad_group_id"] != "")
+        group_keys = set(dfc["campaign_id"] + "|" + dfc["ad_group_id"])
+        bad_g = has_group & ~(campaign + "|" + dfo["ad_group_id"].fillna("")).isin(group_keys)
+        bad_p = ~dfo["SKU_id"].isin(dfp["SKU_id"])
+    if bad_c.any():
+        failures.append(f"{int(bad_c.sum())} orders reference missing campaign_id")
+    if bad_g.any():
+        failures.append(f"{int(bad_g.sum())} orders reference an ad_group_id outside their campaign")
+    if bad_p.any():
+        failures.append(f"{int(bad_p.sum())} orders reference missing SKU_id")
+
+    # 3) Date range validation
+    with span("check.dates"):
+        windows = dfc.assign(
+            start_date=pd.to_datetime(dfc["start_date"]), end_date=pd.to_datetime(dfc["end_date"])
+        ).groupby("campaign_id").agg(start_date=("start_date", "min"), end_date=("end_date", "max"))
+        in_campaign = campaign.isin(windows.index)
+        order_date = pd.to_datetime(dfo.loc[in_campaign, "Order_date"])
+        window = windows.reindex(campaign[in_campaign])
+        viol = (order_date.to_numpy() < window["start_date"].to_numpy()) | \
+               (order_date.to_numpy() > window["end_date"].to_numpy())
+    if viol.any():
+        failures.append(f"{int(viol.sum())} orders fall outside campaign period")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--expect-campaigns", type=int, default=None)
+    parser.add_argument("--expect-products", type=int, default=None)
+    parser.add_argument("--expect-orders", type=int, default=None)
+    args = parser.parse_args()
+
+    failures = validate(args.data_dir, {
+        "campaigns": args.expect_campaigns, "products": args.expect_products, "orders": args.expect_orders,
+    })
+    for failure in failures:
+        print(f"[FAIL] {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"[OK] CSV validation passed for counts, keys, and date ranges ({args.data_dir}).")
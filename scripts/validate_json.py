@@ -1,5 +1,8 @@
+# Run from the repository root: python -m scripts.validate_json
 import json, sys
 
+from etl.instrumentation import span
+
 paths = [
     "data/dictionaries/marketing/brands.json",
     "data/dictionaries/marketing/channels.json",
@@ -10,13 +13,14 @@ paths = [
 ok = True
 for p in paths:
     try:
-        if p.endswith(".jsonl"):
-            with open(p, "r", encoding="utf-8") as f:
-                for i, line in enumerate(f, 1):
-                    if line.strip():
-                        json.loads(line)
-        else:
-            json.load(open(p, "r", encoding="utf-8"))
+        with span("load", path=p):
+            if p.endswith(".jsonl"):
+                with open(p, "r", encoding="utf-8") as f:
+                    for i, line in enumerate(f, 1):
+                        if line.strip():
+                            json.loads(line)
+            else:
+                json.load(open(p, "r", encoding="utf-8"))
         print(f"[OK] {p}")
     except Exception as e:
         ok = False
@@ -0,0 +1,32 @@
+"""
+Recomputes the stored KPI columns of campaigns_v1.csv (ctr, conversion_rate,
+vtr, roas) from the raw counts and reports rows that drifted.
+
+Usage (from the repository root):
+    python -m scripts.validate_kpis [--rtol 0.05] [--strict]
+"""
+import argparse
+import sys
+
+from etl.instrumentation import span
+from etl.marketing.campaign_data import load_campaign_rows, CAMPAIGNS_PATH
+from etl.marketing.kpi_engine import KPIEngine
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--input", default=CAMPAIGNS_PATH)
+parser.add_argument("--rtol", type=float, default=0.05)
+parser.add_argument("--strict", action="store_true", help="Exit with 1 when drift is found")
+args = parser.parse_args()
+
+with span("load"):
+    df = load_campaign_rows(args.input)
+with span("score"):
+    drift = KPIEngine().check_stored(df, rtol=args.rtol)
+
+if drift.empty:
+    print(f"[OK] Stored KPIs of {len(df)} rows match the recomputed values.")
+    sys.exit(0)
+
+print(f"[WARN] {len(drift)} stored KPI values differ from the recomputed values:")
+print(drift.to_string(index=False))
+sys.exit(1 if args.strict else 0)
@@ -1,13 +1,17 @@
+# Run from the repository root: python -m scripts.validate_summary
 import pandas as pd
 import numpy as np
 
+from etl.instrumentation import span
+
 path = r"G:\내 드라이브\0. Algorise\helixgraph\data\processed\marketing\campaigns_summary.csv"
 
 print(f"\n[INFO] Checking CSV integrity: {path}\n")
 
 # 파일 로드
 try:
-    df = pd.read_csv(path)
+    with span("load"):
+        df = pd.read_csv(path)
 except Exception as e:
     print(f"[FAIL] Unable to load CSV: {e}")
     raise SystemExit(1)